@@ -0,0 +1,233 @@
+# src/benchmark.py
+"""
+数据处理流水线基准测试
+生成符合UserData约束的合成数据集，通过公开的流水线接口分别计时解析、
+校验与处理（run_pipeline）、写出各阶段以及端到端的process_file，
+记录峰值内存，结果保存为JSON并支持与基线比较
+"""
+
+import json
+import multiprocessing
+import os
+import platform
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.models import UserData
+from src.validation import compile_rules
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# 默认的数据集规模：1e3 ~ 1e7 行
+DEFAULT_SIZES = (1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+# 参与比较的计时指标（越小越好）；process_file为CLI实际执行的端到端处理，不计入total
+STAGES = ('parse', 'pipeline', 'write')
+METRICS = tuple(f"{stage}_s" for stage in STAGES) + ('total_s', 'process_file_s', 'peak_rss_mb')
+
+_FIRST_NAMES = np.array(['Alice', 'Bob', 'Charlie', 'David', 'Eve', 'Frank', 'Grace', 'Heidi',
+                         'Ivan', 'Judy', 'Mallory', 'Niaj', 'Olivia', 'Peggy', 'Rupert', 'Sybil'])
+_CITIES = np.array(['New York', 'London', 'Tokyo', 'Paris', 'Berlin', 'Beijing', 'Shanghai',
+                    'Sydney', 'Toronto', 'Madrid'])
+
+# 生成数据时每次写出的行数
+_GENERATE_CHUNK = 1_000_000
+
+
+def generate_dataset(path, rows: int, seed: int = 42, model=UserData):
+    """
+    生成符合模型约束的合成用户数据集（CSV）
+
+    age在模型声明的ge/le范围内均匀分布，name和city为非空字符串。
+    相同的rows和seed总是生成相同的文件。
+
+    Args:
+        path: 输出文件路径
+        rows: 行数
+        seed: 随机种子
+        model: 声明约束的Pydantic模型类
+    """
+    rules = {rule.name: rule for rule in compile_rules(model)}
+    age_rule = rules['age']
+    low = int(age_rule.ge if age_rule.ge is not None else 0)
+    high = int(age_rule.le if age_rule.le is not None else 150)
+
+    rng = np.random.default_rng(seed)
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        f.write('name,age,city\n')
+        for start in range(0, rows, _GENERATE_CHUNK):
+            count = min(_GENERATE_CHUNK, rows - start)
+            ids = np.arange(start, start + count).astype(str)
+            chunk = pd.DataFrame({
+                'name': np.char.add(_FIRST_NAMES[rng.integers(0, len(_FIRST_NAMES), count)], ids),
+                'age': rng.integers(low, high + 1, count),
+                'city': _CITIES[rng.integers(0, len(_CITIES), count)],
+            })
+            chunk.to_csv(f, header=False, index=False)
+
+
+def dataset_path(workdir, rows: int, seed: int) -> str:
+    """数据集缓存路径，已存在时直接复用"""
+    path = os.path.join(workdir, f"users_{rows}_{seed}.csv")
+    if not os.path.exists(path):
+        generate_dataset(path, rows, seed)
+    return path
+
+
+def _peak_rss_mb() -> Optional[float]:
+    """当前进程的峰值常驻内存（MB）"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux以KB为单位，macOS以字节为单位
+    divisor = 1024 * 1024 if platform.system() == 'Darwin' else 1024
+    return round(peak / divisor, 2)
+
+
+def measure(input_path, output_path) -> Dict[str, float]:
+    """
+    对一个数据集分阶段计时
+
+    各阶段使用与process-data相同的公开接口：按read_dtypes解析、run_pipeline校验并处理、
+    write_frame写出；另外单独计时一次端到端的process_file
+
+    Returns:
+        各阶段耗时（秒）、总耗时、端到端耗时、吞吐量和峰值内存
+    """
+    from src.data_processor import process_file, read_dtypes, run_pipeline
+    from src.io_formats import read_frame, write_frame
+
+    timings = {}
+    start = time.perf_counter()
+    names = pd.read_csv(input_path, nrows=0).columns
+    df = read_frame(input_path, dtype=read_dtypes(names=names))
+    timings['parse_s'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    try:
+        df = run_pipeline(df)
+    except ValueError as e:
+        raise ValueError(f"基准数据集包含无效行: {e}")
+    timings['pipeline_s'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    write_frame(df, output_path)
+    timings['write_s'] = time.perf_counter() - start
+
+    result = {key: round(value, 6) for key, value in timings.items()}
+    result['total_s'] = round(sum(timings.values()), 6)
+
+    start = time.perf_counter()
+    process_file(input_path, output_path)
+    result['process_file_s'] = round(time.perf_counter() - start, 6)
+    result['rows'] = len(df)
+    result['rows_per_s'] = round(len(df) / result['total_s'], 1) if result['total_s'] else None
+    result['peak_rss_mb'] = _peak_rss_mb()
+    return result
+
+
+def _measure_task(args) -> Dict[str, float]:
+    return measure(*args)
+
+
+def run_benchmark(sizes: Sequence[int] = DEFAULT_SIZES, seed: int = 42, workdir: str = '.cache/benchmark',
+                  isolate: bool = True) -> Dict:
+    """
+    运行基准测试
+
+    Args:
+        sizes: 各数据集的行数
+        seed: 生成数据集的随机种子
+        workdir: 存放合成数据集和输出的目录
+        isolate: 是否在独立的子进程中测量每个数据集，使峰值内存互不影响
+
+    Returns:
+        包含运行环境信息和每个数据集测量结果的字典
+    """
+    os.makedirs(workdir, exist_ok=True)
+    results: List[Dict] = []
+    for rows in sizes:
+        input_path = dataset_path(workdir, rows, seed)
+        output_path = os.path.join(workdir, f"output_{rows}.csv")
+        if isolate:
+            context = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                result = executor.submit(_measure_task, (input_path, output_path)).result()
+        else:
+            result = measure(input_path, output_path)
+        os.remove(output_path)
+        results.append(result)
+
+    return {
+        'meta': {
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'seed': seed,
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'results': results,
+    }
+
+
+def save_results(results: Dict, path):
+    """保存结果为JSON"""
+    directory = os.path.dirname(str(path))
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+def load_results(path) -> Dict:
+    """读取JSON结果"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compare_results(baseline: Dict, current: Dict, threshold: float = 0.1,
+                    min_seconds: float = 0.01) -> List[Dict]:
+    """
+    比较两次基准测试结果
+
+    Args:
+        baseline: 基线结果
+        current: 当前结果
+        threshold: 允许的相对增幅，超出即视为性能回退（0.1表示10%）
+        min_seconds: 基线耗时低于该值的计时指标不参与比较，避免噪声误报
+
+    Returns:
+        每个指标的比较结果，regression为True表示回退
+    """
+    baseline_by_rows = {result['rows']: result for result in baseline['results']}
+    comparisons = []
+    for result in current['results']:
+        base = baseline_by_rows.get(result['rows'])
+        if base is None:
+            continue
+        for metric in METRICS:
+            old, new = base.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            if metric.endswith('_s') and old < min_seconds:
+                continue
+            change = (new - old) / old
+            comparisons.append({
+                'rows': result['rows'],
+                'metric': metric,
+                'baseline': old,
+                'current': new,
+                'change': round(change, 4),
+                'regression': change > threshold,
+            })
+    return comparisons
@@ -25,6 +25,9 @@ class Config(BaseSettings):
     DATA_FILE_PATH: str = Field(default="data/input.csv", description="数据文件路径")
     DATABASE_URL: str = Field(default="sqlite:///./test.db", description="数据库URL")
     APP_ENV: str = Field(default=app_env, description="应用环境")
+    CACHE_DIR: str = Field(default=".cache/results", description="结果缓存目录")
+    CACHE_MAX_BYTES: int = Field(default=1024 * 1024 * 1024, description="结果缓存容量上限（字节）")
+    CACHE_HARDLINK: bool = Field(default=False, description="命中缓存时是否以硬链接方式生成输出文件（输出与缓存共享文件，原地修改输出会使条目失效）")
 
 # 创建配置实例
 settings = Config()
\ No newline at end of file
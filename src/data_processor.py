@@ -1,47 +1,439 @@
 # src/data_processor.py
+import io
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 import pandas as pd
 from src.models import UserData, ProcessedUserData
-from typing import List
+from src.validation import validate_frame, first_error, compile_rules, reject_frame
+from src.dtypes import compact_frame, parse_dtypes, plan_dtypes
+from src.io_formats import CsvAppendWriter, FrameWriter, detect_format, iter_frames, open_writer, read_frame, write_frame
+from typing import Iterator, List, Optional, Sequence, Tuple
 from datetime import datetime
+from loguru import logger
 
-def load_data(file_path):
-    """加载数据并进行校验"""
+# 校验失败时的处理方式：raise立即抛出异常；quarantine将无效行写入隔离文件并继续处理
+ON_ERROR_CHOICES = ('raise', 'quarantine')
+
+def validate_data(df):
+    """校验已读取的数据（整表或分块），校验失败时抛出异常"""
+    # 使用列式校验引擎一次性校验整列数据，替代逐行构造UserData
+    _, errors = validate_frame(df, UserData)
+    error = first_error(errors)
+    if error:
+        raise ValueError(error)
+    return df
+
+def load_data(file_path, fmt: Optional[str] = None, columns: Optional[Sequence[str]] = None,
+              compact: bool = False):
+    """
+    加载数据并进行校验
+    
+    CSV的列类型与process_file相同：除整数校验字段外按字符串读取，保留原始文本（如"1.50"），
+    因此process_data(load_data(...))与process_file对同一输入的输出一致
+    
+    Args:
+        file_path: 输入文件路径
+        fmt: 输入文件格式，为None时按扩展名识别
+        columns: 只读取的列（列投影）
+        compact: 是否使用根据UserData规划的紧凑dtype，并记录转换前后的内存占用
+    """
     try:
-        df = pd.read_csv(file_path)
-        
-        # 将DataFrame转换为用户数据模型列表进行校验
-        user_data_list: List[UserData] = []
-        for idx in range(len(df)):
-            # 使用Pydantic模型进行数据校验
-            user_data = UserData(
-                name=str(df.iloc[idx]['name']),
-                age=int(df.iloc[idx]['age']),
-                city=str(df.iloc[idx]['city'])
-            )
-            user_data_list.append(user_data)
-        
+        df = read_frame(file_path, fmt=fmt, columns=columns, dtype=_input_dtypes(file_path, fmt, False))
+        validate_data(df)
+        if compact:
+            df, before, after = compact_frame(df)
+            logger.info(f"内存占用: {before / 1024 / 1024:.2f} MB -> {after / 1024 / 1024:.2f} MB")
         return df
     except Exception as e:
         raise Exception(f"加载数据失败: {str(e)}")
 
-def process_data(df):
-    """处理数据并进行校验"""
-    try:
-        # 示例数据处理：添加一个新列
-        df['processed'] = True
-        
-        # 使用Pydantic模型进行处理后数据校验
-        processed_data_list: List[ProcessedUserData] = []
-        for idx in range(len(df)):
-            processed_data = ProcessedUserData(
-                name=str(df.iloc[idx]['name']),
-                age=int(df.iloc[idx]['age']),
-                city=str(df.iloc[idx]['city']),
-                processed=bool(df.iloc[idx]['processed']),
-                processed_at=datetime.now()
-            )
-            processed_data_list.append(processed_data)
+def read_dtypes(compact: bool = False, names: Optional[Sequence[str]] = None) -> Optional[dict]:
+    """
+    CSV解析时使用的dtype
+    
+    pandas按每次读取到的数据推断列类型，同一列在某个分块中含缺失值时会被推断为float64，
+    输出为"1.0"而其他分块输出"1"。指定names（表头列名）时，除整数校验字段（校验后统一为int64）
+    外的列一律按字符串读取，使整体读取与分块、分区读取的结果一致。
+    
+    Args:
+        compact: 是否使用紧凑dtype，字符串字段在解析时即转换为规划的dtype（如category）
+        names: CSV表头的列名
+        
+    Returns:
+        传给read_csv的dtype字典，无需指定时为None
+    """
+    dtypes = {}
+    if names is not None:
+        integers = {rule.name for rule in compile_rules(UserData) if rule.kind == 'int'}
+        dtypes.update({name: 'str' for name in names if name not in integers})
+    if compact:
+        dtypes.update(parse_dtypes(plan_dtypes()))
+    return dtypes or None
+
+def _input_dtypes(file_path, fmt: Optional[str], compact: bool) -> Optional[dict]:
+    """输入文件的解析dtype：CSV按表头确定，列式格式的列类型由文件本身决定"""
+    if detect_format(file_path, fmt) != 'csv':
+        return read_dtypes(compact)
+    return read_dtypes(compact, pd.read_csv(file_path, nrows=0).columns)
+
+def _use_validated(df, cleaned):
+    """
+    校验字段取自校验后的值（字符串去除首尾空白，整数列为int64）
+
+    隔离模式下使用，使有效行的输出与同一块中是否存在被隔离的无效行
+    （如age列因无效值被读为字符串）无关
+    """
+    for rule in compile_rules(UserData):
+        if rule.name not in df.columns:
+            continue
+        column = cleaned[rule.name]
+        dtype = df[rule.name].dtype
+        if rule.kind == 'int':
+            if column.dtype.kind == 'f' and not column.isna().any():
+                column = column.astype('int64')
+        elif pd.api.types.is_string_dtype(dtype) and not isinstance(dtype, pd.CategoricalDtype):
+            column = column.astype(dtype)
+        df[rule.name] = column
+    return df
+
+def _compact_validated(df, cleaned):
+    """将已校验数据转换为紧凑dtype，整数列取自校验后的值"""
+    plan = plan_dtypes()
+    for name in plan.keys() - parse_dtypes(plan).keys():
+        if name in df.columns:
+            df[name] = cleaned[name]
+    df, before, after = compact_frame(df, plan)
+    logger.info(f"内存占用: {before / 1024 / 1024:.2f} MB -> {after / 1024 / 1024:.2f} MB")
+    return df
+
+def _apply_processing(df):
+    """数据处理：添加processed列"""
+    # 示例数据处理：添加一个新列
+    df['processed'] = True
+    return df
+
+def _build_records(cleaned, processed_at: datetime) -> List[ProcessedUserData]:
+    """
+    由已校验的数据构造处理后的模型对象（跳过重复校验）
+    
+    model_construct不做类型转换，整数字段在含无效值的块中校验后为float64，
+    先转换为Int64，使记录中的值为int
+    """
+    rules = compile_rules(UserData)
+    fields = [rule.name for rule in rules]
+    cleaned = cleaned[fields].copy()
+    for rule in rules:
+        if rule.kind == 'int' and cleaned[rule.name].dtype.kind == 'f':
+            cleaned[rule.name] = cleaned[rule.name].astype('Int64')
+    return [
+        ProcessedUserData.model_construct(**row, processed=True, processed_at=processed_at)
+        for row in cleaned.to_dict('records')
+    ]
+
+def run_pipeline(df, return_records: bool = False, processed_at: Optional[datetime] = None,
+                 rejects: Optional[FrameWriter] = None, compact: bool = False,
+                 validated_values: bool = False):
+    """
+    融合的校验与处理流水线，每行只校验一次
+    
+    Args:
+        df: 读取的原始数据，会原地添加processed列
+        return_records: 是否同时返回校验后的ProcessedUserData列表
+        processed_at: 整批数据共用的处理时间，为None时取当前时间
+        rejects: 隔离文件写入器。指定后无效行连同行号和错误信息写入其中，
+            只处理有效行；为None时遇到无效行抛出异常
+        compact: 校验通过后是否转换为紧凑dtype（如age转为uint8）
+        validated_values: 是否输出校验后的值（字符串去除首尾空白）而不是读取的原始值；
+            指定rejects时总是输出校验后的值
         
+    Returns:
+        处理后的DataFrame；return_records为True时返回(DataFrame, 记录列表)
+        
+    Raises:
+        ValueError: 数据校验失败（未指定rejects时）
+    """
+    cleaned, errors = validate_frame(df, UserData)
+    if rejects is None:
+        error = first_error(errors)
+        if error:
+            raise ValueError(error)
+    else:
+        valid = errors.isna().to_numpy()
+        if not valid.all():
+            rejects.write(reject_frame(df, errors))
+            df = df[valid].copy()
+            cleaned = cleaned[valid]
+    
+    if rejects is not None or validated_values:
+        df = _use_validated(df, cleaned)
+    if compact:
+        df = _compact_validated(df, cleaned)
+    df = _apply_processing(df)
+    if not return_records:
         return df
+    return df, _build_records(cleaned, processed_at or datetime.now())
+
+def iter_pipeline(file_path, chunksize: int, processed_at: Optional[datetime] = None,
+                  fmt: Optional[str] = None, columns: Optional[Sequence[str]] = None,
+                  rejects: Optional[FrameWriter] = None, compact: bool = False) -> Iterator[pd.DataFrame]:
+    """
+    分块加载数据并逐块执行校验与处理
+    
+    Args:
+        file_path: 输入文件路径
+        chunksize: 每块的行数
+        processed_at: 所有数据块共用的处理时间
+        fmt: 输入文件格式，为None时按扩展名识别
+        columns: 只读取的列（列投影）
+        rejects: 隔离文件写入器，见run_pipeline
+        compact: 是否使用紧凑dtype，见run_pipeline
+        
+    Yields:
+        处理后的数据块，索引延续整个文件的行号
+    """
+    processed_at = processed_at or datetime.now()
+    try:
+        dtype = _input_dtypes(file_path, fmt, compact)
+        for chunk in iter_frames(file_path, chunksize, fmt=fmt, columns=columns, dtype=dtype):
+            yield run_pipeline(chunk, processed_at=processed_at, rejects=rejects, compact=compact)
     except Exception as e:
-        raise Exception(f"处理数据失败: {str(e)}")
\ No newline at end of file
+        raise Exception(f"加载数据失败: {str(e)}")
+
+def process_data(df, return_records: bool = False, processed_at: Optional[datetime] = None):
+    """处理数据并进行校验（run_pipeline的兼容包装）"""
+    try:
+        return run_pipeline(df, return_records=return_records, processed_at=processed_at)
+    except Exception as e:
+        raise Exception(f"处理数据失败: {str(e)}")
+
+# 并行模式下单个分区的目标字节数，分区数不少于工作进程数
+PARTITION_BYTES = 64 * 1024 * 1024
+
+def plan_partitions(file_path, workers: int, partition_bytes: int = PARTITION_BYTES) -> Tuple[bytes, List[Tuple[int, int]]]:
+    """
+    按字节范围切分CSV文件，分区边界对齐到行尾
+    
+    Args:
+        file_path: 输入文件路径
+        workers: 工作进程数
+        partition_bytes: 单个分区的目标字节数
+        
+    Returns:
+        (表头行字节, [(起始偏移, 结束偏移), ...])
+    """
+    size = os.path.getsize(file_path)
+    with open(file_path, 'rb') as f:
+        header = f.readline()
+        data_start = f.tell()
+        data_size = size - data_start
+        if data_size <= 0:
+            return header, []
+        
+        count = max(workers, -(-data_size // partition_bytes))
+        step = max(1, data_size // count)
+        bounds = [data_start]
+        for i in range(1, count):
+            # 从目标位置的前一个字节读到行尾，使边界恰好落在下一行的开头
+            f.seek(data_start + i * step - 1)
+            f.readline()
+            position = f.tell()
+            if bounds[-1] < position < size:
+                bounds.append(position)
+        bounds.append(size)
+    return header, list(zip(bounds[:-1], bounds[1:]))
+
+def default_reject_path(output_path) -> str:
+    """默认的隔离文件路径"""
+    return f"{output_path}.rejects.csv"
+
+def _process_partition(task) -> Tuple[int, Optional[int], Optional[str]]:
+    """
+    工作进程：解析、校验并处理一个字节分区，结果写入分区文件
+    
+    隔离模式下无效行写入分区隔离文件（行号为分区内行号），由主进程修正后合并。
+    
+    Returns:
+        (分区行数, 首个错误在分区内的位置, 错误信息)
+    """
+    file_path, header, start, end, columns, part_path, part_format, write_header, reject_part, compact = task
+    with open(file_path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    # 与串行处理使用相同的dtype，避免各分区分别推断列类型导致输出格式不一致
+    names = pd.read_csv(io.BytesIO(header), nrows=0).columns
+    df = pd.read_csv(io.BytesIO(header + data), usecols=columns, dtype=read_dtypes(compact, names))
+    rows = len(df)
+    
+    cleaned, errors = validate_frame(df, UserData)
+    invalid = errors.notna().to_numpy()
+    if invalid.any():
+        if reject_part is None:
+            position = int(np.flatnonzero(invalid)[0])
+            return rows, position, errors.iloc[position]
+        reject_frame(df, errors).to_csv(reject_part, index=False)
+        df = df[~invalid].copy()
+        cleaned = cleaned[~invalid]
+    
+    if reject_part is not None:
+        df = _use_validated(df, cleaned)
+    if compact:
+        df = _compact_validated(df, cleaned)
+    df = _apply_processing(df)
+    if part_format == 'csv':
+        df.to_csv(part_path, header=write_header, index=False)
+    else:
+        write_frame(df, part_path, part_format)
+    return rows, None, None
+
+def _merge_reject_parts(reject_parts: List[Tuple[str, int]], rejects: FrameWriter) -> int:
+    """将各分区的隔离文件按顺序合并，并把分区内行号换算为文件行号，返回隔离的行数"""
+    count = 0
+    for reject_part, offset in reject_parts:
+        if not os.path.exists(reject_part):
+            continue
+        # 以字符串读取，保持无效行的原始文本
+        part = pd.read_csv(reject_part, dtype=str, keep_default_na=False)
+        part['row'] = part['row'].astype('int64') + offset
+        rejects.write(part)
+        count += len(part)
+    return count
+
+def process_file_parallel(input_path, output_path, workers: int, output_format: Optional[str] = None,
+                          columns: Optional[Sequence[str]] = None,
+                          rejects: Optional[FrameWriter] = None, compact: bool = False) -> int:
+    """
+    在进程池中并行加载、校验、处理数据，并按原始顺序合并结果
+    
+    输入按字节范围切分，分区边界对齐到换行符，因此只支持CSV输入，
+    且要求记录内不含换行（即不支持带引号的多行字段）。
+    
+    Args:
+        input_path: 输入CSV文件路径
+        output_path: 输出文件路径
+        workers: 工作进程数
+        output_format: 输出文件格式，为None时按扩展名识别
+        columns: 只读取的列（列投影）
+        rejects: 隔离文件写入器，见run_pipeline
+        compact: 是否使用紧凑dtype，见run_pipeline
+        
+    Returns:
+        int: 写入的行数
+    """
+    output_format = detect_format(output_path, output_format)
+    header, ranges = plan_partitions(input_path, workers)
+    if not ranges:
+        return _process_serial(input_path, output_path, None, 'csv', output_format, columns, rejects, compact)
+    
+    # CSV分区文件直接按字节拼接；列式格式的分区以Feather暂存后依次追加写出
+    part_format = 'csv' if output_format == 'csv' else 'feather'
+    columns = list(columns) if columns else None
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tasks = [
+            (input_path, header, start, end, columns,
+             os.path.join(tmp_dir, f"part-{i:05d}.{part_format}"), part_format, i == 0,
+             os.path.join(tmp_dir, f"rejects-{i:05d}.csv") if rejects is not None else None, compact)
+            for i, (start, end) in enumerate(ranges)
+        ]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_process_partition, tasks))
+        
+        total = 0
+        offsets = []
+        for rows_in_part, position, message in results:
+            if position is not None:
+                raise Exception(f"加载数据失败: 第{total + position + 1}行: {message}")
+            offsets.append(total)
+            total += rows_in_part
+        
+        rejected = 0
+        if rejects is not None:
+            rejected = _merge_reject_parts([(task[8], offset) for task, offset in zip(tasks, offsets)], rejects)
+        
+        part_paths = [task[5] for task in tasks]
+        if part_format == 'csv':
+            with open(output_path, 'wb') as out:
+                for part_path in part_paths:
+                    with open(part_path, 'rb') as part:
+                        shutil.copyfileobj(part, out)
+        else:
+            with open_writer(output_path, output_format) as writer:
+                for part_path in part_paths:
+                    writer.write(read_frame(part_path, part_format))
+    return total - rejected
+
+def _process_serial(input_path, output_path, chunksize, input_format, output_format, columns, rejects,
+                    compact) -> int:
+    """单进程处理：整体加载或分块流式处理"""
+    if chunksize is None:
+        try:
+            df = read_frame(input_path, input_format, columns, dtype=_input_dtypes(input_path, input_format, compact))
+            df = run_pipeline(df, rejects=rejects, compact=compact)
+        except Exception as e:
+            raise Exception(f"加载数据失败: {str(e)}")
+        write_frame(df, output_path, output_format)
+        return len(df)
+    
+    with open_writer(output_path, output_format) as writer:
+        for chunk in iter_pipeline(input_path, chunksize, fmt=input_format, columns=columns,
+                                   rejects=rejects, compact=compact):
+            writer.write(chunk)
+    return writer.rows
+
+def process_file(input_path, output_path, chunksize: Optional[int] = None, workers: int = 1,
+                 input_format: Optional[str] = None, output_format: Optional[str] = None,
+                 columns: Optional[Sequence[str]] = None, on_error: str = 'raise',
+                 reject_path: Optional[str] = None, compact: bool = False) -> int:
+    """
+    加载、校验、处理数据并写入输出文件
+    
+    Args:
+        input_path: 输入文件路径
+        output_path: 输出文件路径
+        chunksize: 分块行数，为None时整体加载；指定后以流式方式逐块处理，
+            内存占用与文件大小无关，输出与整体处理逐字节一致
+        workers: 工作进程数，大于1时按字节分区并行处理，不能与chunksize同时使用
+        input_format: 输入格式（csv/parquet/feather），为None时按扩展名识别
+        output_format: 输出格式（csv/parquet/feather），为None时按扩展名识别
+        columns: 只读取的列（列投影），为None时读取全部列
+        on_error: 'raise'遇到无效行即失败；'quarantine'将无效行连同行号和错误信息
+            写入隔离文件，继续处理有效行，结束时记录统计
+        reject_path: 隔离文件路径，默认为"<输出文件>.rejects.csv"
+        compact: 是否使用根据UserData规划的紧凑dtype（name/city在解析时即转换，
+            age校验通过后转为uint8），以降低每批数据的内存占用
+        
+    Returns:
+        int: 写入的行数
+    """
+    if on_error not in ON_ERROR_CHOICES:
+        raise ValueError(f"不支持的on_error取值: {on_error}")
+    input_format = detect_format(input_path, input_format)
+    output_format = detect_format(output_path, output_format)
+    if workers > 1:
+        if chunksize is not None:
+            raise ValueError("workers与chunksize不能同时使用")
+        if input_format != 'csv':
+            raise ValueError("并行处理只支持CSV输入")
+    
+    if on_error == 'raise':
+        if workers > 1:
+            return process_file_parallel(input_path, output_path, workers,
+                                         output_format=output_format, columns=columns, compact=compact)
+        return _process_serial(input_path, output_path, chunksize, input_format, output_format, columns, None,
+                               compact)
+    
+    reject_path = reject_path or default_reject_path(output_path)
+    if os.path.exists(reject_path):
+        os.remove(reject_path)
+    with CsvAppendWriter(reject_path) as rejects:
+        if workers > 1:
+            rows = process_file_parallel(input_path, output_path, workers, output_format=output_format,
+                                         columns=columns, rejects=rejects, compact=compact)
+        else:
+            rows = _process_serial(input_path, output_path, chunksize, input_format, output_format,
+                                   columns, rejects, compact)
+    logger.info(f"数据处理完成: 有效 {rows} 行, 隔离 {rejects.rows} 行"
+                + (f", 隔离文件: {reject_path}" if rejects.rows else ""))
+    return rows
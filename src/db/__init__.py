@@ -8,10 +8,35 @@ from .models import Base
 from .database import DatabaseManager, get_db, db_manager, initialize_databases
 from .decorators import transactional, with_db_session
 from .crud import CRUDMixin
+from .cache import IdentityCache
+from .serializer import ModelSerializer, serializer_for
 from .config import DATABASE_CONFIG, AUTO_CREATE_TABLES
 
-# 自动初始化数据库
-if AUTO_CREATE_TABLES:
-    initialize_databases(DATABASE_CONFIG)
+# 登记数据库配置；导入时不创建引擎和连接，引擎在首次使用某个数据库时创建，
+# AUTO_CREATE_TABLES为true时同时创建该数据库的表
+initialize_databases(DATABASE_CONFIG, create_tables=False)
+db_manager.auto_create_tables = AUTO_CREATE_TABLES
 
-__all__ = ['DatabaseManager', 'get_db', 'transactional', 'with_db_session', 'CRUDMixin', 'Base', 'db_manager', 'initialize_databases']
\ No newline at end of file
+# 异步接口在首次访问时才导入（sqlalchemy.ext.asyncio导入较慢，只使用同步接口时不需要）
+_ASYNC_EXPORTS = {
+    'AsyncDatabaseManager': 'async_database',
+    'get_async_db': 'async_database',
+    'get_async_db_manager': 'async_database',
+    'initialize_async_databases': 'async_database',
+    'async_transactional': 'async_decorators',
+    'async_with_db_session': 'async_decorators',
+}
+
+
+def __getattr__(name):
+    module = _ASYNC_EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+__all__ = ['DatabaseManager', 'get_db', 'transactional', 'with_db_session', 'CRUDMixin', 'IdentityCache', 'ModelSerializer', 'serializer_for', 'Base', 'db_manager', 'initialize_databases',
+           'AsyncDatabaseManager', 'get_async_db', 'get_async_db_manager', 'initialize_async_databases',
+           'async_transactional', 'async_with_db_session']
\ No newline at end of file
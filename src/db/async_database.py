@@ -0,0 +1,246 @@
+# src/db/async_database.py
+"""
+异步数据库管理器
+为asyncio服务提供与DatabaseManager对应的异步引擎和会话管理功能
+"""
+
+import os
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncGenerator, Dict, Optional, Union
+
+from loguru import logger
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from .database import Base
+from .engine import build_async_engine, normalize_config
+from .routing import ROUTING_OPTIONS
+
+# 当前任务使用的数据库名称；asyncio任务之间互不影响
+_current_db_name: ContextVar[str] = ContextVar('current_db_name', default='default')
+
+
+class AsyncDatabaseManager:
+    """异步数据库管理器类"""
+
+    def __init__(self, default_url: Optional[Union[str, Dict[str, Any]]] = None):
+        """
+        初始化异步数据库管理器
+
+        Args:
+            default_url: 默认数据库的URL或配置字典，见add_database
+        """
+        self.databases: Dict[str, dict] = {}
+        self.engines: Dict[str, Any] = {}
+        self.sessions: Dict[str, Any] = {}
+
+        if default_url is None:
+            default_url = os.getenv("DATABASE_URL", "sqlite:///./app.db")
+        self.add_database("default", default_url)
+
+    def add_database(self, name: str, database_url: Union[str, Dict[str, Any]], **engine_options):
+        """
+        添加数据库配置
+
+        配置格式与DatabaseManager.add_database相同；未指定驱动的URL自动使用
+        异步驱动（如sqlite -> sqlite+aiosqlite），因此可以与同步管理器共用同一份配置。
+        异步管理器不做读写分离，配置中的replicas、replica_strategy和read_your_writes
+        会被忽略，所有语句都使用主库。
+
+        Args:
+            name: 数据库名称
+            database_url: 数据库URL，或包含url和引擎参数的配置字典
+            **engine_options: 引擎参数，优先于配置字典和环境变量
+        """
+        config = {"url": database_url} if isinstance(database_url, str) else dict(database_url)
+        config.update(engine_options)
+        ignored = [key for key in ROUTING_OPTIONS if config.pop(key, None) is not None]
+        if ignored:
+            logger.debug(f"异步数据库 '{name}' 不使用读写分离，忽略配置: {', '.join(ignored)}")
+        url, options = normalize_config(name, config)
+        self.databases[name] = {
+            "url": url,
+            "options": options,
+        }
+        engine = build_async_engine(url, options)
+        # 提交后不使实例过期，避免在异步代码中访问属性时触发隐式IO
+        session_factory = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+
+        self.engines[name] = engine
+        self.sessions[name] = session_factory
+
+    def get_current_db_name(self) -> str:
+        """
+        获取当前任务的数据库名称
+
+        Returns:
+            str: 数据库名称
+        """
+        return _current_db_name.get() or 'default'
+
+    def set_current_db_name(self, name: str):
+        """
+        设置当前任务的数据库名称
+
+        Args:
+            name: 数据库名称
+        """
+        if name not in self.databases:
+            raise ValueError(f"Database '{name}' not configured")
+        _current_db_name.set(name)
+
+    def get_engine(self, name: Optional[str] = None):
+        """
+        获取异步数据库引擎
+
+        Args:
+            name: 数据库名称，如果为None则使用当前任务的数据库
+
+        Returns:
+            AsyncEngine: 异步数据库引擎
+        """
+        if name is None:
+            name = self.get_current_db_name()
+        return self.engines[name]
+
+    def get_session_factory(self, name: Optional[str] = None):
+        """
+        获取异步会话工厂
+
+        Args:
+            name: 数据库名称，如果为None则使用当前任务的数据库
+
+        Returns:
+            async_sessionmaker: 异步会话工厂
+        """
+        if name is None:
+            name = self.get_current_db_name()
+        return self.sessions[name]
+
+    async def create_tables(self, db_name: Optional[str] = None):
+        """
+        创建所有表
+
+        Args:
+            db_name: 数据库名称，如果为None则使用当前任务的数据库
+        """
+        async with self.get_engine(db_name).begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    async def drop_tables(self, db_name: Optional[str] = None):
+        """
+        删除所有表
+
+        Args:
+            db_name: 数据库名称，如果为None则使用当前任务的数据库
+        """
+        async with self.get_engine(db_name).begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+
+    def get_session(self, db_name: Optional[str] = None) -> AsyncSession:
+        """
+        获取异步数据库会话
+
+        Args:
+            db_name: 数据库名称，如果为None则使用当前任务的数据库
+
+        Returns:
+            AsyncSession: 异步数据库会话对象
+        """
+        return self.get_session_factory(db_name)()
+
+    @asynccontextmanager
+    async def get_db_session(self, db_name: Optional[str] = None) -> AsyncGenerator[AsyncSession, None]:
+        """
+        获取异步数据库会话上下文管理器
+
+        Args:
+            db_name: 数据库名称，如果为None则使用当前任务的数据库
+
+        Yields:
+            AsyncSession: 异步数据库会话对象
+        """
+        db = self.get_session(db_name)
+        try:
+            yield db
+        except Exception:
+            await db.rollback()
+            raise
+        finally:
+            await db.close()
+
+    async def dispose(self):
+        """关闭所有数据库的连接池"""
+        for engine in self.engines.values():
+            await engine.dispose()
+
+
+# 全局异步数据库管理器实例，首次使用时按DATABASE_CONFIG创建，
+# 避免在只使用同步接口时加载异步驱动
+async_db_manager: Optional[AsyncDatabaseManager] = None
+
+
+def get_async_db_manager() -> AsyncDatabaseManager:
+    """
+    获取全局异步数据库管理器
+
+    Returns:
+        AsyncDatabaseManager: 首次调用时按DATABASE_CONFIG配置所有数据库
+    """
+    global async_db_manager
+    if async_db_manager is None:
+        from .config import DATABASE_CONFIG
+        manager = AsyncDatabaseManager(DATABASE_CONFIG.get("default"))
+        for name, config in DATABASE_CONFIG.items():
+            if name != "default":
+                manager.add_database(name, config)
+        async_db_manager = manager
+    return async_db_manager
+
+
+async def get_async_db(db_name: Optional[str] = None) -> AsyncGenerator[AsyncSession, None]:
+    """
+    获取异步数据库会话依赖
+
+    Args:
+        db_name: 数据库名称，如果为None则使用当前任务的数据库
+
+    Yields:
+        AsyncSession: 异步数据库会话对象
+    """
+    db = get_async_db_manager().get_session(db_name)
+    try:
+        yield db
+    except Exception:
+        await db.rollback()
+        raise
+    finally:
+        await db.close()
+
+
+async def initialize_async_databases(config: Optional[Dict[str, Union[str, Dict[str, Any]]]] = None,
+                                     default_url: Optional[str] = None) -> AsyncDatabaseManager:
+    """
+    初始化异步数据库配置并创建表
+
+    Args:
+        config: 数据库配置字典，格式与initialize_databases相同
+        default_url: 默认数据库URL，指定时重新创建全局异步管理器
+
+    Returns:
+        AsyncDatabaseManager: 全局异步数据库管理器
+    """
+    global async_db_manager
+    if default_url is not None:
+        async_db_manager = AsyncDatabaseManager(default_url)
+    manager = get_async_db_manager()
+    if config:
+        for name, url in config.items():
+            manager.add_database(name, url)
+
+    for db_name in manager.databases:
+        try:
+            await manager.create_tables(db_name)
+        except Exception as e:
+            logger.warning(f"警告: 无法为数据库 '{db_name}' 创建表: {e}")
+    return manager
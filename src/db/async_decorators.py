@@ -0,0 +1,80 @@
+# src/db/async_decorators.py
+"""
+异步数据库装饰器
+提供transactional和with_db_session的异步版本
+"""
+
+from functools import wraps
+from typing import Any, Callable, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .async_database import get_async_db_manager
+
+
+def async_transactional(db_name: Optional[str] = None):
+    """
+    异步事务处理装饰器
+    自动处理数据库事务，包括提交和回滚
+
+    Args:
+        db_name: 数据库名称，如果为None则使用当前任务的数据库
+
+    Returns:
+        Callable: 装饰器函数
+    """
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        async def wrapper(*args, **kwargs) -> Any:
+            manager = get_async_db_manager()
+            if db_name:
+                manager.set_current_db_name(db_name)
+
+            # 查找参数中的数据库会话
+            db_session = next((arg for arg in args if isinstance(arg, AsyncSession)), None)
+            if db_session is not None:
+                try:
+                    result = await func(*args, **kwargs)
+                    await db_session.commit()
+                    return result
+                except Exception:
+                    await db_session.rollback()
+                    raise
+
+            async with manager.get_session(db_name) as db_session:
+                try:
+                    result = await func(db_session, *args, **kwargs)
+                    await db_session.commit()
+                    return result
+                except Exception:
+                    await db_session.rollback()
+                    raise
+
+        return wrapper
+    return decorator
+
+
+def async_with_db_session(db_name: Optional[str] = None):
+    """
+    异步数据库会话装饰器
+    自动为函数提供异步数据库会话参数
+
+    Args:
+        db_name: 数据库名称，如果为None则使用当前任务的数据库
+
+    Returns:
+        Callable: 装饰器函数
+    """
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        async def wrapper(*args, **kwargs) -> Any:
+            manager = get_async_db_manager()
+            if db_name:
+                manager.set_current_db_name(db_name)
+
+            async with manager.get_session(db_name) as db_session:
+                # 将数据库会话作为第一个参数传递
+                return await func(db_session, *args, **kwargs)
+
+        return wrapper
+    return decorator
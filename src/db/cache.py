@@ -0,0 +1,182 @@
+# src/db/cache.py
+"""
+标识缓存
+为get_by_id提供进程级、按模型启用的读穿透缓存，缓存的是脱离会话的列值快照，
+按LRU容量和TTL淘汰，并在写入、提交和回滚时失效
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+# 会话info中记录待提交后失效的缓存键
+_PENDING_KEY = 'identity_cache_pending'
+
+# 会话info中记录本事务内放入缓存的键，回滚时使其失效
+_READ_KEY = 'identity_cache_read'
+
+
+class IdentityCache:
+    """线程安全的LRU+TTL缓存，值为列值快照字典"""
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = 300.0):
+        """
+        Args:
+            maxsize: 最多缓存的记录数
+            ttl: 快照的有效秒数，为None时不过期
+        """
+        if maxsize < 1:
+            raise ValueError("maxsize必须大于0")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable) -> Optional[Dict[str, Any]]:
+        """
+        获取快照
+
+        Returns:
+            快照的副本，未命中或已过期时返回None
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                snapshot, expires_at = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return dict(snapshot)
+                del self._data[key]
+                self.evictions += 1
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, snapshot: Dict[str, Any]):
+        """存入快照，超出容量时淘汰最久未使用的条目"""
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._data[key] = (dict(snapshot), expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable):
+        """使单个条目失效"""
+        with self._lock:
+            if self._data.pop(key, None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self.invalidations += len(self._data)
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        命中统计
+
+        Returns:
+            包含size、hits、misses、hit_rate、evictions、invalidations的字典
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
+
+
+def cache_key(db: Session, id: Any) -> tuple:
+    """缓存键：同一模型在不同数据库中的记录互不影响"""
+    return (str(db.get_bind().url), id)
+
+
+def snapshot(instance) -> Dict[str, Any]:
+    """提取实例的列值快照"""
+    mapper = inspect(instance).mapper
+    return {attr.key: getattr(instance, attr.key) for attr in mapper.column_attrs}
+
+
+def _model_cache(instance) -> Optional[IdentityCache]:
+    return getattr(type(instance), '__identity_cache__', None)
+
+
+def defer_invalidation(session: Session, cache: IdentityCache, key: Optional[Hashable] = None):
+    """
+    登记提交后再次失效的缓存键
+
+    批量语句绕过工作单元，after_flush收集不到它们修改的记录；
+    只在执行时失效的话，提交前其他会话的读取会把旧值重新放入缓存
+
+    Args:
+        session: 执行写入的会话
+        cache: 模型的缓存
+        key: 缓存键，为None时提交后清空整个缓存
+    """
+    session.info.setdefault(_PENDING_KEY, set()).add((cache, key))
+
+
+def has_uncommitted_writes(session: Session) -> bool:
+    """会话中是否有未写出或未提交的修改，此时读到的值可能被回滚，不能放入缓存"""
+    return bool(session.new or session.dirty or session.deleted or session.info.get(_PENDING_KEY))
+
+
+def remember_read(session: Session, cache: IdentityCache, key: Hashable):
+    """登记本事务中放入缓存的键，事务回滚时使其失效"""
+    session.info.setdefault(_READ_KEY, set()).add((cache, key))
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_flushed(session, flush_context):
+    """记录本次写出中被修改或删除的已缓存模型记录，提交后使其失效"""
+    pending = None
+    for instance in list(session.dirty) + list(session.deleted):
+        cache = _model_cache(instance)
+        if cache is None:
+            continue
+        if pending is None:
+            pending = session.info.setdefault(_PENDING_KEY, set())
+        pending.add((cache, cache_key(session, instance.id)))
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_committed(session):
+    """提交后使本事务中修改过的记录失效（包括transactional装饰器中的提交）"""
+    session.info.pop(_READ_KEY, None)
+    _invalidate_all(session.info.pop(_PENDING_KEY, ()))
+
+
+@event.listens_for(Session, 'after_rollback')
+def _invalidate_rolled_back(session):
+    """
+    回滚后使本事务中修改过和放入缓存的记录失效
+
+    写入语句执行后、提交前其他会话（或本会话）可能已把未提交的值放入缓存
+    """
+    _invalidate_all(session.info.pop(_PENDING_KEY, ()))
+    _invalidate_all(session.info.pop(_READ_KEY, ()))
+
+
+def _invalidate_all(entries):
+    for cache, key in entries:
+        if key is None:
+            cache.clear()
+        else:
+            cache.invalidate(key)
@@ -7,6 +7,10 @@
 import os
 
 # 数据库配置
+# 值可以是URL，也可以是包含url和引擎参数的字典，例如：
+# "default": {"url": "sqlite:///./app.db", "pool_pre_ping": True,
+#             "sqlite_pragmas": {"cache_size": -64000, "mmap_size": 268435456}}
+# 引擎参数也可以通过环境变量DB_<名称>_<参数>或DB_<参数>设置，见engine.options_from_env
 DATABASE_CONFIG = {
     "default": os.getenv("DATABASE_URL", "sqlite:///./app.db"),
     "analytics": os.getenv("ANALYTICS_DATABASE_URL", "sqlite:///./analytics.db"),
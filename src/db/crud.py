@@ -4,18 +4,315 @@ CRUD操作混入类
 提供基本的增删改查功能
 """
 
-from typing import List, Optional
-from sqlalchemy.orm import Session
+import base64
+import binascii
+import json
+from itertools import islice
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+from sqlalchemy import insert, inspect, select, tuple_, update
+from sqlalchemy.orm import Session, joinedload, make_transient_to_detached, selectinload
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime
+from .cache import IdentityCache, cache_key, defer_invalidation, has_uncommitted_writes, remember_read, snapshot
+from .serializer import serializer_for
+
+if TYPE_CHECKING:
+    # sqlalchemy.ext.asyncio导入较慢，只在类型检查时导入
+    from sqlalchemy.ext.asyncio import AsyncSession
 
 Base = declarative_base()
 
+# 自动填充为当前时间的时间戳字段
+TIMESTAMP_FIELDS = ('created_at', 'updated_at')
+
+# 关联关系的预加载策略：selectin对每个关联额外执行一条IN查询，joined在主查询中使用LEFT JOIN
+LOAD_STRATEGIES = {
+    'selectin': selectinload,
+    'joined': joinedload,
+}
+
+# load参数：关联关系名称列表（使用selectin），或{关联关系名称: 策略}；
+# 名称可以用点号表示嵌套关联，例如"orders.product"
+LoadOption = Optional[Union[Sequence[str], Dict[str, str]]]
+
+# filter的load参数未传入的标记，区分模型中名为load的列的过滤条件load=None
+_UNSET: Any = object()
+
+
+def _iter_batches(records, batch_size: int) -> Iterator[List[Dict[str, Any]]]:
+    """
+    将字典序列或DataFrame按批次切分为字典列表
+
+    DataFrame中的缺失值（NaN/NaT）转换为None，写入数据库时为NULL
+    """
+    if hasattr(records, 'columns') and hasattr(records, 'iloc'):
+        for start in range(0, len(records), batch_size):
+            chunk = records.iloc[start:start + batch_size]
+            chunk = chunk.astype(object).where(chunk.notna(), None)
+            yield chunk.to_dict('records')
+        return
+    iterator = iter(records)
+    while True:
+        batch = [dict(record) for record in islice(iterator, batch_size)]
+        if not batch:
+            return
+        yield batch
+
+
+def _encode_cursor(payload: Dict[str, Any]) -> str:
+    """将分页位置编码为不透明的游标字符串"""
+    def default(value):
+        if isinstance(value, datetime):
+            return {'$dt': value.isoformat()}
+        raise TypeError(f"游标不支持的类型: {type(value).__name__}")
+    raw = json.dumps(payload, default=default, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def _decode_cursor(cursor: str) -> Dict[str, Any]:
+    """解析游标字符串"""
+    def object_hook(obj):
+        if set(obj) == {'$dt'}:
+            return datetime.fromisoformat(obj['$dt'])
+        return obj
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        position = json.loads(raw, object_hook=object_hook)
+    except (binascii.Error, ValueError) as e:
+        raise ValueError(f"无效的分页游标: {cursor}") from e
+    if (not isinstance(position, dict) or set(position) != {'o', 'd', 'k'}
+            or not isinstance(position['k'], list) or len(position['k']) not in (1, 2)):
+        raise ValueError(f"无效的分页游标: {cursor}")
+    return position
+
+
 class CRUDMixin:
     """CRUD操作混入类"""
     
     __abstract__ = True
     
+    # get_by_id使用的标识缓存，通过enable_cache按模型启用
+    __identity_cache__: Optional[IdentityCache] = None
+    
+    @classmethod
+    def enable_cache(cls, maxsize: int = 1024, ttl: Optional[float] = 300.0) -> IdentityCache:
+        """
+        为本模型启用get_by_id的进程级缓存
+        
+        缓存保存列值快照，命中时以快照构造实例并以merge(load=False)加入会话，
+        不访问数据库。update、delete、批量写入方法和会话提交（包括transactional
+        装饰器中的提交）会使对应记录失效。
+        
+        Args:
+            maxsize: 最多缓存的记录数，超出时淘汰最久未使用的记录
+            ttl: 快照的有效秒数，为None时不过期
+            
+        Returns:
+            IdentityCache: 本模型的缓存
+        """
+        cls.__identity_cache__ = IdentityCache(maxsize=maxsize, ttl=ttl)
+        return cls.__identity_cache__
+    
+    @classmethod
+    def disable_cache(cls):
+        """关闭本模型的get_by_id缓存"""
+        cls.__identity_cache__ = None
+    
+    @classmethod
+    def cache_stats(cls) -> Optional[Dict[str, Any]]:
+        """
+        缓存命中统计
+        
+        Returns:
+            统计字典，未启用缓存时返回None
+        """
+        cache = cls.__identity_cache__
+        return cache.stats() if cache is not None else None
+    
+    @classmethod
+    def _invalidate_cache(cls, db: Session, ids: Optional[Iterable[Any]] = None):
+        """使缓存中的记录立即失效并在提交后再次失效，ids为None时清空本模型的缓存"""
+        cache = cls.__identity_cache__
+        if cache is None:
+            return
+        if ids is None:
+            cache.clear()
+            defer_invalidation(db, cache)
+            return
+        for id in ids:
+            key = cache_key(db, id)
+            cache.invalidate(key)
+            defer_invalidation(db, cache, key)
+    
+    @classmethod
+    def _prepare_batch(cls, batch: List[Dict[str, Any]], timestamp_fields: Sequence[str]):
+        """
+        检查批次中的字段并为缺失的时间戳字段填充当前时间
+        
+        executemany按第一条记录的字段生成语句，其他记录中多出的字段会被静默丢弃，
+        因此除自动填充的时间戳字段外，每条记录的字段必须与第一条相同
+        """
+        table = cls.__table__  # type: ignore
+        keys = set(batch[0])
+        fields = [name for name in timestamp_fields if name in table.c]
+        filled = set(fields)
+        names = set(keys)
+        for index, record in enumerate(batch):
+            if record.keys() != keys and (record.keys() ^ keys) - filled:
+                names.update(record)
+                unknown = names - set(table.c.keys())
+                if unknown:
+                    break
+                raise ValueError(f"批次中第{index + 1}条记录的字段与第一条不同: "
+                                 f"{', '.join(sorted(record))} / {', '.join(sorted(keys))}")
+        unknown = names - set(table.c.keys())
+        if unknown:
+            raise ValueError(f"{cls.__name__}没有字段: {', '.join(sorted(unknown))}")
+        now = datetime.utcnow()
+        for record in batch:
+            for name in fields:
+                if record.get(name) is None:
+                    record[name] = now
+    
+    @classmethod
+    def _expire_loaded(cls, db: Session, ids: Optional[Iterable[Any]] = None):
+        """
+        使会话中已加载的实例过期，下次访问时重新读取
+        
+        Args:
+            db: 数据库会话
+            ids: 记录ID，为None时使本模型的所有已加载实例过期
+        """
+        if ids is None:
+            for instance in list(db.identity_map.values()):
+                if isinstance(instance, cls):
+                    db.expire(instance)
+            return
+        for id in ids:
+            instance = db.identity_map.get(db.identity_key(cls, id))
+            if instance is not None:
+                db.expire(instance)
+    
+    @classmethod
+    def bulk_create(cls, db: Session, records: Union[Iterable[Dict[str, Any]], Any],
+                    batch_size: int = 1000, return_ids: bool = False):
+        """
+        批量创建记录
+        
+        按批次以executemany方式执行INSERT，不构造ORM对象，
+        插入的记录不会出现在会话中。所有记录必须包含相同的字段（自动填充的时间戳字段除外），否则抛出ValueError。
+        
+        Args:
+            db: 数据库会话
+            records: 字段值字典的可迭代对象，或列名与模型字段对应的DataFrame
+            batch_size: 每批插入的记录数
+            return_ids: 是否返回生成的ID
+            
+        Returns:
+            return_ids为True时返回按输入顺序排列的ID列表，否则返回插入的记录数
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size必须大于0")
+        table = cls.__table__  # type: ignore
+        statement = insert(table)
+        per_row = False
+        if return_ids:
+            dialect = db.get_bind().dialect
+            if dialect.insert_executemany_returning_sort_by_parameter_order:
+                statement = statement.returning(table.c.id, sort_by_parameter_order=True)
+            else:
+                # 数据库不支持executemany RETURNING时逐条插入取回ID
+                per_row = True
+        
+        # 先写出会话中待处理的对象，保证插入顺序与调用顺序一致
+        db.flush()
+        ids: List[int] = []
+        count = 0
+        for batch in _iter_batches(records, batch_size):
+            cls._prepare_batch(batch, TIMESTAMP_FIELDS)
+            if per_row:
+                for record in batch:
+                    ids.append(db.execute(statement, record).inserted_primary_key[0])
+            elif return_ids:
+                ids.extend(db.execute(statement, batch).scalars().all())
+            else:
+                db.execute(statement, batch)
+            count += len(batch)
+        return ids if return_ids else count
+    
+    @classmethod
+    def _load_options(cls, load: LoadOption) -> List[Any]:
+        """将load参数转换为查询的加载选项"""
+        if not load:
+            return []
+        paths = load.items() if isinstance(load, dict) else ((path, 'selectin') for path in load)
+        options = []
+        for path, strategy in paths:
+            if strategy not in LOAD_STRATEGIES:
+                raise ValueError(f"不支持的加载策略: {strategy}，可选: {', '.join(LOAD_STRATEGIES)}")
+            model, option = cls, None
+            for name in path.split('.'):
+                relationship = inspect(model).relationships.get(name)
+                if relationship is None:
+                    raise ValueError(f"{model.__name__}没有关联关系: {name}")
+                attribute = getattr(model, name)
+                option = (LOAD_STRATEGIES[strategy](attribute) if option is None
+                          else getattr(option, f"{strategy}load")(attribute))
+                model = relationship.mapper.class_
+            options.append(option)
+        return options
+    
+    def to_dict(self, relations: bool = False) -> Dict[str, Any]:
+        """
+        转换为字典，日期时间转换为ISO格式字符串
+        
+        Args:
+            relations: 是否包含已加载的关联关系，见loaded_relations。默认只输出列，
+                输出结果与实例之前是否在会话中加载过关联关系无关
+            
+        Returns:
+            {字段名: 值}
+        """
+        data = serializer_for(type(self)).to_dict(self)
+        if relations:
+            data.update(self.loaded_relations())
+        return data
+    
+    def loaded_relations(self, exclude: Sequence[str] = (), _path: frozenset = frozenset()) -> Dict[str, Any]:
+        """
+        序列化已加载的关联关系，不会触发新的查询
+        
+        关联对象使用其to_dict(relations=False)，并递归包含它已加载的关联关系，
+        指回上一级对象的反向关联不会重复输出。
+        
+        Args:
+            exclude: 不输出的关联关系名称
+            
+        Returns:
+            {关联关系名称: 字典、字典列表或None}
+        """
+        state = inspect(self)
+        path = _path | {id(self)}
+        result: Dict[str, Any] = {}
+        for relationship in state.mapper.relationships:
+            key = relationship.key
+            if key in exclude or key in state.unloaded:
+                continue
+            back = (relationship.back_populates,) if relationship.back_populates else ()
+            
+            def nested(related):
+                data = related.to_dict(relations=False)
+                if id(related) not in path:
+                    data.update(related.loaded_relations(exclude=back, _path=path))
+                return data
+            
+            value = state.dict.get(key)
+            if relationship.uselist:
+                result[key] = [nested(related) for related in value or ()]
+            else:
+                result[key] = nested(value) if value is not None else None
+        return result
+    
     @classmethod
     def create(cls, db: Session, **kwargs):
         """
@@ -34,21 +331,44 @@ class CRUDMixin:
         return instance
     
     @classmethod
-    def get_by_id(cls, db: Session, id: int):
+    def get_by_id(cls, db: Session, id: int, load: LoadOption = None):
         """
         根据ID获取记录
         
         Args:
             db: 数据库会话
             id: 记录ID
+            load: 预加载的关联关系，见LoadOption；指定时不使用标识缓存
             
         Returns:
             模型实例或None
         """
-        return db.query(cls).filter(cls.id == id).first()  # type: ignore
+        cache = cls.__identity_cache__
+        if cache is None or load:
+            return cls._load(db, id, load)
+        instance = db.identity_map.get(db.identity_key(cls, id))
+        if instance is not None:
+            return instance
+        key = cache_key(db, id)
+        values = cache.get(key)
+        if values is not None:
+            instance = cls(**values)
+            make_transient_to_detached(instance)
+            return db.merge(instance, load=False)
+        writes = has_uncommitted_writes(db)
+        instance = cls._load(db, id)
+        if instance is not None and not writes:
+            cache.put(key, snapshot(instance))
+            remember_read(db, cache, key)
+        return instance
+    
+    @classmethod
+    def _load(cls, db: Session, id: int, load: LoadOption = None):
+        """不经过缓存从数据库读取记录"""
+        return db.query(cls).options(*cls._load_options(load)).filter(cls.id == id).first()  # type: ignore
     
     @classmethod
-    def get_all(cls, db: Session, skip: int = 0, limit: int = 100):
+    def get_all(cls, db: Session, skip: int = 0, limit: int = 100, load: LoadOption = None):
         """
         获取所有记录
         
@@ -56,11 +376,111 @@ class CRUDMixin:
             db: 数据库会话
             skip: 跳过的记录数
             limit: 返回的记录数
+            load: 预加载的关联关系，例如["orders"]或{"user": "joined", "product": "selectin"}
             
         Returns:
             模型实例列表
         """
-        return db.query(cls).offset(skip).limit(limit).all()
+        return db.query(cls).options(*cls._load_options(load)).offset(skip).limit(limit).all()
+    
+    @classmethod
+    def _is_indexed(cls, column) -> bool:
+        if column.primary_key or column.index or column.unique:
+            return True
+        return any(index.columns.keys()[0] == column.key for index in column.table.indexes)
+    
+    @classmethod
+    def get_page(cls, db: Session, limit: int = 100, cursor: Optional[str] = None,
+                 order_by: str = 'id', descending: bool = False) -> Tuple[List[Any], Optional[str]]:
+        """
+        键集（seek）分页获取记录
+        
+        以上一页最后一条记录的(排序列, id)为起点查询下一页，
+        翻到任意深度的耗时都与第一页相同。排序列相同时按id排序，
+        排序列非id时，排序列为NULL的记录不会被返回。
+        
+        Args:
+            db: 数据库会话
+            limit: 每页记录数
+            cursor: 上一页返回的游标，为None时返回第一页
+            order_by: 排序列，必须是有索引的列
+            descending: 是否降序
+            
+        Returns:
+            (模型实例列表, 下一页游标)，没有下一页时游标为None
+        """
+        if limit < 1:
+            raise ValueError("limit必须大于0")
+        table = cls.__table__  # type: ignore
+        if order_by not in table.c:
+            raise ValueError(f"{cls.__name__}没有字段: {order_by}")
+        column = table.c[order_by]
+        if not cls._is_indexed(column):
+            raise ValueError(f"排序列 {order_by} 没有索引，无法用于键集分页")
+        id_column = table.c.id
+        by_id = column is id_column
+        
+        query = select(cls)
+        if not by_id:
+            query = query.where(column.isnot(None))
+        if cursor is not None:
+            position = _decode_cursor(cursor)
+            if position.get('o') != order_by or position.get('d') != descending:
+                raise ValueError("分页游标与当前的排序方式不一致")
+            if len(position['k']) != (1 if by_id else 2):
+                raise ValueError(f"无效的分页游标: {cursor}")
+            if by_id:
+                key, last = id_column, position['k'][0]
+            else:
+                key, last = tuple_(column, id_column), tuple_(*position['k'])
+            query = query.where(key < last if descending else key > last)
+        ordering = [id_column] if by_id else [column, id_column]
+        query = query.order_by(*[col.desc() if descending else col.asc() for col in ordering])
+        
+        rows = db.execute(query.limit(limit + 1)).scalars().all()
+        if len(rows) <= limit:
+            return list(rows), None
+        rows = rows[:limit]
+        last_row = rows[-1]
+        key = [last_row.id] if by_id else [getattr(last_row, column.key), last_row.id]
+        return list(rows), _encode_cursor({'o': order_by, 'd': descending, 'k': key})
+    
+    @classmethod
+    def iter_all(cls, db: Session, batch_size: int = 1000) -> Iterator[Any]:
+        """
+        按id顺序流式遍历所有记录
+        
+        使用yield_per每次只从数据库读取batch_size行，每批记录交给调用方后
+        将其中仍被引用的实例移出会话，内存占用与表大小无关。移出会话的实例
+        仍可读取已加载的字段，但对其所做的修改不会被提交。
+        遍历开始前已在会话中的实例不会被移出。
+        
+        Args:
+            db: 数据库会话
+            batch_size: 每次读取的行数
+            
+        Yields:
+            模型实例
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size必须大于0")
+        db.flush()
+        existing = set(db.identity_map.keys())
+        query = select(cls).order_by(cls.__table__.c.id).execution_options(yield_per=batch_size)  # type: ignore
+        result = db.execute(query).scalars()
+        try:
+            for partition in result.partitions():
+                keys = [inspect(instance).key for instance in partition]
+                # 逐条交出并释放引用，调用方不再持有的实例会自动离开会话的弱引用标识映射
+                partition.reverse()
+                while partition:
+                    yield partition.pop()
+                for key in keys:
+                    instance = db.identity_map.get(key)
+                    if instance is not None and key not in existing:
+                        db.expunge(instance)
+        finally:
+            result.close()
     
     @classmethod
     def update(cls, db: Session, id: int, **kwargs):
@@ -75,8 +495,9 @@ class CRUDMixin:
         Returns:
             更新后的模型实例或None
         """
-        instance = cls.get_by_id(db, id)
+        instance = cls._load(db, id)
         if instance:
+            cls._invalidate_cache(db, [id])
             for key, value in kwargs.items():
                 setattr(instance, key, value)
             # 只有当实例有updated_at属性时才更新
@@ -85,6 +506,136 @@ class CRUDMixin:
             db.flush()
         return instance
     
+    @classmethod
+    def update_many(cls, db: Session, ids: Iterable[int], batch_size: int = 1000, **kwargs) -> int:
+        """
+        将多条记录更新为相同的字段值
+        
+        按批次执行UPDATE ... WHERE id IN (...)，不加载实例；
+        会话中已加载的对应实例同步更新。
+        
+        Args:
+            db: 数据库会话
+            ids: 记录ID
+            batch_size: 每条语句包含的ID数
+            **kwargs: 要更新的字段值
+            
+        Returns:
+            int: 更新的记录数
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size必须大于0")
+        values = dict(kwargs)
+        if 'updated_at' in cls.__table__.c:  # type: ignore
+            values.setdefault('updated_at', datetime.utcnow())
+        iterator = iter(ids)
+        count = 0
+        while True:
+            batch = list(islice(iterator, batch_size))
+            if not batch:
+                return count
+            statement = update(cls).where(cls.id.in_(batch)).values(**values)  # type: ignore
+            count += db.execute(statement).rowcount
+            cls._invalidate_cache(db, batch)
+    
+    @classmethod
+    def bulk_update(cls, db: Session, records: Union[Iterable[Dict[str, Any]], Any],
+                    batch_size: int = 1000) -> int:
+        """
+        按主键批量更新记录，每条记录可以有不同的字段值
+        
+        每条记录必须包含id，按批次以executemany方式执行
+        UPDATE ... WHERE id = ?，不加载实例；会话中已加载的对应实例被设为过期。
+        未指定updated_at时填充为当前时间。
+        
+        Args:
+            db: 数据库会话
+            records: 包含id和待更新字段的字典的可迭代对象，或DataFrame
+            batch_size: 每批更新的记录数
+            
+        Returns:
+            int: 处理的记录数
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size必须大于0")
+        db.flush()
+        count = 0
+        for batch in _iter_batches(records, batch_size):
+            if any(record.get('id') is None for record in batch):
+                raise ValueError("bulk_update的每条记录都必须包含id")
+            cls._prepare_batch(batch, ('updated_at',))
+            db.execute(update(cls), batch)
+            ids = [record['id'] for record in batch]
+            cls._expire_loaded(db, ids)
+            cls._invalidate_cache(db, ids)
+            count += len(batch)
+        return count
+    
+    @classmethod
+    def upsert(cls, db: Session, records: Union[Iterable[Dict[str, Any]], Any],
+               conflict_columns: Optional[Sequence[str]] = None,
+               update_columns: Optional[Sequence[str]] = None,
+               batch_size: int = 1000) -> int:
+        """
+        批量插入或更新记录（INSERT ... ON CONFLICT DO UPDATE）
+        
+        与已有记录在conflict_columns上冲突时更新该记录，否则插入新记录。
+        新记录的created_at和updated_at为当前时间；更新时保留created_at，
+        updated_at更新为当前时间。仅支持SQLite和PostgreSQL。
+        
+        Args:
+            db: 数据库会话
+            records: 字段值字典的可迭代对象，或DataFrame
+            conflict_columns: 判断冲突的唯一列（须对应一个唯一约束），默认为模型中unique=True的列，
+                没有时为主键；模型有多个unique=True的列时必须指定
+            update_columns: 冲突时更新的列，默认为记录中除冲突列、id和created_at外的所有列
+            batch_size: 每批处理的记录数
+            
+        Returns:
+            int: 处理的记录数
+            
+        Raises:
+            ValueError: 数据库不是SQLite或PostgreSQL，或未指定conflict_columns且模型有多个唯一列
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size必须大于0")
+        table = cls.__table__  # type: ignore
+        dialect_name = db.get_bind().dialect.name
+        if dialect_name == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        elif dialect_name == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            raise ValueError(f"upsert不支持数据库: {dialect_name}")
+        if conflict_columns is None:
+            # 多个unique=True的列是各自独立的约束，ON CONFLICT只能指定其中一个
+            unique_columns = [column.name for column in table.c if column.unique]
+            if len(unique_columns) > 1:
+                raise ValueError(f"{cls.__name__}有多个唯一列({', '.join(unique_columns)})，"
+                                 f"请通过conflict_columns指定")
+            conflict_columns = unique_columns or [column.name for column in table.primary_key]
+        
+        db.flush()
+        count = 0
+        for batch in _iter_batches(records, batch_size):
+            cls._prepare_batch(batch, TIMESTAMP_FIELDS)
+            columns = update_columns
+            if columns is None:
+                columns = [name for name in batch[0]
+                           if name not in conflict_columns and name not in ('id', 'created_at')]
+            if 'updated_at' in table.c and 'updated_at' not in columns:
+                columns = list(columns) + ['updated_at']
+            statement = dialect_insert(table)
+            statement = statement.on_conflict_do_update(
+                index_elements=list(conflict_columns),
+                set_={name: statement.excluded[name] for name in columns},
+            )
+            db.execute(statement, batch)
+            count += len(batch)
+        cls._expire_loaded(db)
+        cls._invalidate_cache(db)
+        return count
+    
     @classmethod
     def delete(cls, db: Session, id: int) -> bool:
         """
@@ -97,27 +648,95 @@ class CRUDMixin:
         Returns:
             bool: 是否成功删除
         """
-        instance = cls.get_by_id(db, id)
+        instance = cls._load(db, id)
         if instance:
+            cls._invalidate_cache(db, [id])
             db.delete(instance)
             db.flush()
             return True
         return False
     
     @classmethod
-    def filter(cls, db: Session, **kwargs):
+    def filter(cls, db: Session, load: LoadOption = _UNSET, **kwargs):
         """
         根据条件过滤记录
         
         Args:
             db: 数据库会话
+            load: 预加载的关联关系，见get_all。模型有名为load的列时作为该列的过滤条件，
+                此时不预加载关联关系
             **kwargs: 过滤条件
             
         Returns:
             符合条件的模型实例列表
         """
-        query = db.query(cls)
+        if 'load' in inspect(cls).column_attrs:
+            if load is not _UNSET:
+                kwargs['load'] = load
+            load = None
+        elif load is _UNSET:
+            load = None
+        query = db.query(cls).options(*cls._load_options(load))
         for key, value in kwargs.items():
             if hasattr(cls, key):
                 query = query.filter(getattr(cls, key) == value)
-        return query.all()
\ No newline at end of file
+        return query.all()
+    
+    # 异步CRUD：在AsyncSession底层的同步会话上执行对应的同步方法，
+    # 行为（包括时间戳、缓存和会话同步）与同步版本一致
+    
+    @classmethod
+    async def acreate(cls, db: "AsyncSession", **kwargs):
+        """create的异步版本"""
+        return await db.run_sync(lambda session: cls.create(session, **kwargs))
+    
+    @classmethod
+    async def aget_by_id(cls, db: "AsyncSession", id: int, load: LoadOption = None):
+        """get_by_id的异步版本"""
+        return await db.run_sync(lambda session: cls.get_by_id(session, id, load=load))
+    
+    @classmethod
+    async def aget_all(cls, db: "AsyncSession", skip: int = 0, limit: int = 100, load: LoadOption = None):
+        """get_all的异步版本"""
+        return await db.run_sync(lambda session: cls.get_all(session, skip=skip, limit=limit, load=load))
+    
+    @classmethod
+    async def aget_page(cls, db: "AsyncSession", limit: int = 100, cursor: Optional[str] = None,
+                        order_by: str = 'id', descending: bool = False):
+        """get_page的异步版本"""
+        return await db.run_sync(lambda session: cls.get_page(
+            session, limit=limit, cursor=cursor, order_by=order_by, descending=descending))
+    
+    @classmethod
+    async def aupdate(cls, db: "AsyncSession", id: int, **kwargs):
+        """update的异步版本"""
+        return await db.run_sync(lambda session: cls.update(session, id, **kwargs))
+    
+    @classmethod
+    async def adelete(cls, db: "AsyncSession", id: int) -> bool:
+        """delete的异步版本"""
+        return await db.run_sync(lambda session: cls.delete(session, id))
+    
+    @classmethod
+    async def afilter(cls, db: "AsyncSession", load: LoadOption = _UNSET, **kwargs):
+        """filter的异步版本"""
+        return await db.run_sync(lambda session: cls.filter(session, load=load, **kwargs))
+    
+    @classmethod
+    async def abulk_create(cls, db: "AsyncSession", records, batch_size: int = 1000, return_ids: bool = False):
+        """bulk_create的异步版本"""
+        return await db.run_sync(lambda session: cls.bulk_create(
+            session, records, batch_size=batch_size, return_ids=return_ids))
+    
+    @classmethod
+    async def abulk_update(cls, db: "AsyncSession", records, batch_size: int = 1000) -> int:
+        """bulk_update的异步版本"""
+        return await db.run_sync(lambda session: cls.bulk_update(session, records, batch_size=batch_size))
+    
+    @classmethod
+    async def aupsert(cls, db: "AsyncSession", records, conflict_columns: Optional[Sequence[str]] = None,
+                      update_columns: Optional[Sequence[str]] = None, batch_size: int = 1000) -> int:
+        """upsert的异步版本"""
+        return await db.run_sync(lambda session: cls.upsert(
+            session, records, conflict_columns=conflict_columns,
+            update_columns=update_columns, batch_size=batch_size))
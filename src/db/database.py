@@ -4,13 +4,17 @@
 提供数据库连接和会话管理功能
 """
 
-from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.ext.declarative import declarative_base
 from contextlib import contextmanager
 import os
-from typing import Generator, Optional, Dict, Any
+import threading
+from typing import Generator, List, Optional, Dict, Any, Union
 from loguru import logger
+from .engine import build_engine, normalize_config
+from .instrumentation import DEFAULT_SLOW_QUERY_MS, QueryStats, instrument
+from .routing import DEFAULT_READ_YOUR_WRITES, ReplicaRouter, RoutingSession
+from .schema import clear_schema, stamp_schema, sync_schema
 
 # 创建基类
 Base = declarative_base()
@@ -29,35 +33,97 @@ except ImportError:
 class DatabaseManager:
     """数据库管理器类"""
     
-    def __init__(self, default_url: Optional[str] = None):
-        """初始化数据库管理器"""
+    def __init__(self, default_url: Optional[Union[str, Dict[str, Any]]] = None,
+                 auto_create_tables: bool = False):
+        """
+        初始化数据库管理器
+        
+        引擎和会话工厂在首次使用某个数据库时才创建，配置数据库不会建立连接。
+        
+        Args:
+            default_url: 默认数据库的URL或配置字典，见add_database
+            auto_create_tables: 是否在首次使用某个数据库时创建表，见ensure_tables
+        """
         # 存储多个数据库配置
         self.databases: Dict[str, dict] = {}
+        # 已创建的引擎和会话工厂
         self.engines: Dict[str, Any] = {}
         self.sessions: Dict[str, Any] = {}
+        self.routers: Dict[str, ReplicaRouter] = {}
+        # 每个引擎（主库和副本）的查询统计，副本的键为"<名称>/replica<序号>"
+        self.query_stats: Dict[str, QueryStats] = {}
+        self.auto_create_tables = auto_create_tables
+        # 本进程中已创建过表的数据库
+        self.tables_ready: set = set()
+        self._lock = threading.RLock()
         
         # 添加默认数据库配置
         if default_url is None:
             default_url = os.getenv("DATABASE_URL", "sqlite:///./app.db")
         self.add_database("default", default_url)
     
-    def add_database(self, name: str, database_url: str):
+    def add_database(self, name: str, database_url: Union[str, Dict[str, Any]], **engine_options):
         """
         添加数据库配置
         
         Args:
             name: 数据库名称
-            database_url: 数据库URL
+            database_url: 数据库URL，或包含url和引擎参数的配置字典，例如
+                {"url": "sqlite:///./app.db", "pool_pre_ping": True,
+                 "sqlite_pragmas": {"cache_size": -64000}}。
+                字典中还可以包含replicas（副本URL或配置的列表）、
+                replica_strategy（round_robin或least_loaded）和
+                read_your_writes（写入后读操作仍使用主库的秒数），见add_replica
+            **engine_options: 引擎参数（pool_size、max_overflow、pool_timeout、
+                pool_recycle、pool_pre_ping、echo、slow_query_ms、sqlite_pragmas），
+                优先于配置字典和环境变量；slow_query_ms为慢查询日志阈值（毫秒），
+                默认为DEFAULT_SLOW_QUERY_MS，为None时不记录慢查询，见stats
+        """
+        config = {"url": database_url} if isinstance(database_url, str) else dict(database_url)
+        config.update(engine_options)
+        replicas = config.pop("replicas", None) or []
+        router = ReplicaRouter(
+            strategy=config.pop("replica_strategy", "round_robin"),
+            read_your_writes=config.pop("read_your_writes", DEFAULT_READ_YOUR_WRITES),
+            on_engine=lambda engine, index, options: self._instrument(f"{name}/replica{index}", engine, options),
+        )
+        url, options = normalize_config(name, config)
+        with self._lock:
+            self.databases[name] = {
+                "url": url,
+                "options": options,
+                "replicas": [],
+            }
+            # 重新配置时丢弃旧的引擎，下次使用时按新配置创建
+            self.engines.pop(name, None)
+            self.sessions.pop(name, None)
+            self.tables_ready.discard(name)
+            self.routers[name] = router
+            for key in [key for key in self.query_stats if key == name or key.startswith(f"{name}/")]:
+                del self.query_stats[key]
+        for replica in replicas:
+            self.add_replica(name, replica)
+    
+    def add_replica(self, name: str, replica_url: Union[str, Dict[str, Any]], **engine_options):
         """
-        self.databases[name] = {
-            "url": database_url
-        }
-        # 创建引擎和会话工厂
-        engine = create_engine(database_url, echo=False)
-        session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        为已配置的数据库添加只读副本
+        
+        with_db_session和get_db提供的会话中，查询按副本选择策略路由到副本；
+        transactional提供的会话、写出和本线程写入后的读己之写窗口内的查询使用主库。
+        副本的表结构和数据由数据库自身的复制机制维护，create_tables只作用于主库。
         
-        self.engines[name] = engine
-        self.sessions[name] = session_factory
+        Args:
+            name: 主库名称
+            replica_url: 副本URL或配置字典，引擎参数含义与add_database相同
+            **engine_options: 副本的引擎参数
+        """
+        if name not in self.databases:
+            raise ValueError(f"Database '{name}' not configured")
+        config = {"url": replica_url} if isinstance(replica_url, str) else dict(replica_url)
+        config.update(engine_options)
+        url, options = normalize_config(name, config)
+        self.routers[name].add_config(url, options)
+        self.databases[name]["replicas"].append(url)
     
     def get_current_db_name(self) -> str:
         """
@@ -83,6 +149,58 @@ class DatabaseManager:
             raise ValueError(f"Database '{name}' not configured")
         _thread_locals.db_name = name
     
+    def _engine(self, name: str):
+        """返回数据库引擎，首次调用时创建引擎和会话工厂"""
+        engine = self.engines.get(name)
+        if engine is not None:
+            return engine
+        with self._lock:
+            if name not in self.engines:
+                if name not in self.databases:
+                    raise ValueError(f"Database '{name}' not configured")
+                config = self.databases[name]
+                engine = build_engine(config["url"], config["options"])
+                stats = self._instrument(name, engine, config["options"])
+                self.sessions[name] = sessionmaker(autocommit=False, autoflush=False, bind=engine,
+                                                   class_=RoutingSession, router=self.routers[name],
+                                                   query_stats=stats)
+                self.engines[name] = engine
+            return self.engines[name]
+    
+    def _instrument(self, key: str, engine, options: Dict[str, Any]) -> QueryStats:
+        """在引擎上注册查询统计"""
+        stats = QueryStats(key, options.get("slow_query_ms", DEFAULT_SLOW_QUERY_MS))
+        self.query_stats[key] = stats
+        return instrument(engine, stats)
+    
+    def stats(self, db_name: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        获取查询统计
+        
+        每个已创建的引擎（主库和副本）分别统计：按归一化SQL（参数值替换为?）汇总的
+        执行次数、总耗时、平均/p50/p95/p99/最大耗时（毫秒，按总耗时降序），
+        慢查询条数，以及会话数和每个会话执行的语句数。
+        
+        Args:
+            db_name: 数据库名称，为None时返回所有数据库的统计
+            
+        Returns:
+            {统计名称: 统计结果}，统计名称为数据库名称或"<名称>/replica<序号>"
+        """
+        return {key: stats.snapshot() for key, stats in list(self.query_stats.items())
+                if db_name is None or key == db_name or key.startswith(f"{db_name}/")}
+    
+    def reset_stats(self, db_name: Optional[str] = None):
+        """
+        清空查询统计
+        
+        Args:
+            db_name: 数据库名称，为None时清空所有数据库的统计
+        """
+        for key, stats in list(self.query_stats.items()):
+            if db_name is None or key == db_name or key.startswith(f"{db_name}/"):
+                stats.reset()
+    
     def get_engine(self, name: Optional[str] = None):
         """
         获取数据库引擎
@@ -95,7 +213,10 @@ class DatabaseManager:
         """
         if name is None:
             name = self.get_current_db_name()
-        return self.engines[name]
+        engine = self._engine(name)
+        if self.auto_create_tables:
+            self.ensure_tables(name)
+        return engine
     
     def get_session_factory(self, name: Optional[str] = None):
         """
@@ -109,21 +230,53 @@ class DatabaseManager:
         """
         if name is None:
             name = self.get_current_db_name()
+        self.get_engine(name)
         return self.sessions[name]
     
-    def create_tables(self, db_name: Optional[str] = None):
+    def create_tables(self, db_name: Optional[str] = None) -> List[str]:
         """
         创建所有表
         
+        数据库中记录了每张表的结构指纹（schema_fingerprints表），所有表的指纹
+        与当前模型一致时只读取一行记录，不执行create_all；结构发生变化的表会记录警告日志。
+        
         Args:
             db_name: 数据库名称，如果为None则使用当前线程的数据库
+            
+        Returns:
+            List[str]: 结构与记录的指纹不一致、需要迁移的表名
         """
         # 注意：在独立模块中，需要确保模型已被导入
         # 在实际使用中，应在调用此方法前导入所有模型
         if db_name is None:
             db_name = self.get_current_db_name()
-        engine = self.get_engine(db_name)
-        Base.metadata.create_all(bind=engine)
+        with self._lock:
+            drifted = sync_schema(self._engine(db_name), Base.metadata, db_name)
+            self.tables_ready.add(db_name)
+        return drifted
+    
+    def stamp_schema(self, db_name: Optional[str] = None):
+        """
+        将当前模型的表结构指纹记录到数据库中，在完成表结构迁移后调用
+        
+        Args:
+            db_name: 数据库名称，如果为None则使用当前线程的数据库
+        """
+        if db_name is None:
+            db_name = self.get_current_db_name()
+        stamp_schema(self._engine(db_name), Base.metadata)
+    
+    def ensure_tables(self, db_name: Optional[str] = None):
+        """
+        创建表，每个数据库在本进程中只执行一次
+        
+        Args:
+            db_name: 数据库名称，如果为None则使用当前线程的数据库
+        """
+        if db_name is None:
+            db_name = self.get_current_db_name()
+        if db_name not in self.tables_ready:
+            self.create_tables(db_name)
     
     def drop_tables(self, db_name: Optional[str] = None):
         """
@@ -134,34 +287,40 @@ class DatabaseManager:
         """
         if db_name is None:
             db_name = self.get_current_db_name()
-        engine = self.get_engine(db_name)
-        Base.metadata.drop_all(bind=engine)
+        with self._lock:
+            engine = self._engine(db_name)
+            Base.metadata.drop_all(bind=engine)
+            clear_schema(engine)
+            self.tables_ready.discard(db_name)
     
-    def get_session(self, db_name: Optional[str] = None) -> Session:
+    def get_session(self, db_name: Optional[str] = None, use_primary: bool = False) -> Session:
         """
         获取数据库会话
         
         Args:
             db_name: 数据库名称，如果为None则使用当前线程的数据库
+            use_primary: 是否所有语句都使用主库，为False时查询可路由到只读副本
             
         Returns:
             Session: 数据库会话对象
         """
         session_factory = self.get_session_factory(db_name)
-        return session_factory()
+        return session_factory(use_primary=use_primary)
     
     @contextmanager
-    def get_db_session(self, db_name: Optional[str] = None) -> Generator[Session, None, None]:
+    def get_db_session(self, db_name: Optional[str] = None,
+                       use_primary: bool = False) -> Generator[Session, None, None]:
         """
         获取数据库会话上下文管理器
         
         Args:
             db_name: 数据库名称，如果为None则使用当前线程的数据库
+            use_primary: 是否所有语句都使用主库，为False时查询可路由到只读副本
             
         Yields:
             Session: 数据库会话对象
         """
-        db = self.get_session(db_name)
+        db = self.get_session(db_name, use_primary=use_primary)
         try:
             yield db
         except Exception:
@@ -169,21 +328,28 @@ class DatabaseManager:
             raise
         finally:
             db.close()
+    
+    def dispose(self):
+        """关闭所有已创建的引擎（包括副本）的连接池"""
+        for name, engine in list(self.engines.items()):
+            engine.dispose()
+            self.routers[name].dispose()
 
 # 创建全局数据库管理器实例
 db_manager = DatabaseManager()
 
-def get_db(db_name: Optional[str] = None) -> Generator[Session, None, None]:
+def get_db(db_name: Optional[str] = None, use_primary: bool = False) -> Generator[Session, None, None]:
     """
     获取数据库会话依赖
     
     Args:
         db_name: 数据库名称，如果为None则使用当前线程的数据库
+        use_primary: 是否所有语句都使用主库，为False时查询可路由到只读副本
         
     Yields:
         Session: 数据库会话对象
     """
-    db = db_manager.get_session(db_name)
+    db = db_manager.get_session(db_name, use_primary=use_primary)
     try:
         yield db
     except Exception:
@@ -192,13 +358,15 @@ def get_db(db_name: Optional[str] = None) -> Generator[Session, None, None]:
     finally:
         db.close()
 
-def initialize_databases(config: Optional[Dict[str, str]] = None, default_url: Optional[str] = None):
+def initialize_databases(config: Optional[Dict[str, Union[str, Dict[str, Any]]]] = None,
+                         default_url: Optional[str] = None, create_tables: bool = True):
     """
     初始化数据库配置
     
     Args:
-        config: 数据库配置字典，格式为 {name: database_url}
+        config: 数据库配置字典，格式为 {name: database_url} 或 {name: {"url": ..., 引擎参数...}}
         default_url: 默认数据库URL
+        create_tables: 是否立即创建表；为False时只登记配置，由auto_create_tables在首次使用时创建
     """
     # 如果提供了默认URL，则重新初始化db_manager
     if default_url is not None:
@@ -210,9 +378,12 @@ def initialize_databases(config: Optional[Dict[str, str]] = None, default_url: O
         for name, url in config.items():
             db_manager.add_database(name, url)
     
+    if not create_tables:
+        return
+    
     # 创建所有已配置数据库的表
     for db_name in db_manager.databases:
         try:
-            db_manager.create_tables(db_name)
+            db_manager.ensure_tables(db_name)
         except Exception as e:
             logger.warning(f"警告: 无法为数据库 '{db_name}' 创建表: {e}")
\ No newline at end of file
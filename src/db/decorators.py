@@ -37,7 +37,8 @@ def transactional(db_name: Optional[str] = None):
             db_gen = None
             # 如果没有找到数据库会话，创建一个新的
             if db_session is None:
-                db_gen = get_db(db_name)
+                # 事务会话的所有语句都使用主库
+                db_gen = get_db(db_name, use_primary=True)
                 db_session = next(db_gen)
                 # 将数据库会话添加到参数中
                 args = (db_session,) + args
@@ -0,0 +1,257 @@
+# src/db/engine.py
+"""
+数据库引擎配置
+解析每个数据库的连接池参数和SQLite PRAGMA设置，并据此创建引擎
+"""
+
+import os
+import re
+from typing import Any, Dict, Optional, Tuple, Union
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+
+# 可配置的引擎参数及其类型
+ENGINE_OPTIONS = {
+    'pool_size': int,
+    'max_overflow': int,
+    'pool_timeout': float,
+    'pool_recycle': int,
+    'pool_pre_ping': bool,
+    'echo': bool,
+    # 慢查询日志阈值（毫秒），见instrumentation模块
+    'slow_query_ms': float,
+}
+
+# 可配置的SQLite PRAGMA及其类型
+SQLITE_PRAGMAS = {
+    'journal_mode': str,
+    'synchronous': str,
+    'cache_size': int,
+    'mmap_size': int,
+    'busy_timeout': int,
+    'temp_store': str,
+    'foreign_keys': str,
+}
+
+# 文件型SQLite数据库默认使用的PRAGMA：
+# WAL模式下读写互不阻塞，synchronous=NORMAL在WAL下仍能保证一致性，
+# busy_timeout使并发写入者等待锁而不是立即报"database is locked"
+DEFAULT_SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+}
+
+# 内存数据库使用单连接池，不支持溢出和等待超时参数；
+# 异步驱动下内存数据库使用StaticPool，也不支持pool_size
+_SINGLETON_POOL_UNSUPPORTED = ('max_overflow', 'pool_timeout')
+_STATIC_POOL_UNSUPPORTED = ('pool_size', 'max_overflow', 'pool_timeout')
+
+# 各数据库默认使用的异步驱动
+ASYNC_DRIVERS = {
+    'sqlite': 'aiosqlite',
+    'postgresql': 'asyncpg',
+    'mysql': 'aiomysql',
+}
+
+# 支持asyncio的驱动，URL中已指定这些驱动时保持不变
+ASYNC_CAPABLE_DRIVERS = frozenset({'aiosqlite', 'asyncpg', 'psycopg', 'psycopg_async', 'aiomysql', 'asyncmy',
+                                   'aioodbc', 'oracledb_async'})
+
+_PRAGMA_VALUE = re.compile(r'^-?[A-Za-z0-9_]+$')
+
+
+def _parse_bool(value: str) -> bool:
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def _convert(value: str, type_):
+    return _parse_bool(value) if type_ is bool else type_(value)
+
+
+def options_from_env(name: str, environ: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """
+    从环境变量读取数据库的引擎参数
+
+    依次查找DB_<名称>_<参数>和DB_<参数>，例如DB_DEFAULT_POOL_SIZE、DB_POOL_SIZE；
+    SQLite PRAGMA使用SQLITE_前缀，例如DB_DEFAULT_SQLITE_JOURNAL_MODE。
+
+    Args:
+        name: 数据库名称
+        environ: 环境变量字典，默认为os.environ
+
+    Returns:
+        引擎参数字典，PRAGMA放在sqlite_pragmas键下
+    """
+    environ = os.environ if environ is None else environ
+    prefixes = (f"DB_{name.upper()}_", "DB_")
+
+    def lookup(key: str) -> Optional[str]:
+        for prefix in prefixes:
+            value = environ.get(prefix + key)
+            if value is not None and value != '':
+                return value
+        return None
+
+    options: Dict[str, Any] = {}
+    for option, type_ in ENGINE_OPTIONS.items():
+        value = lookup(option.upper())
+        if value is not None:
+            options[option] = _convert(value, type_)
+    pragmas = {}
+    for pragma, type_ in SQLITE_PRAGMAS.items():
+        value = lookup(f"SQLITE_{pragma.upper()}")
+        if value is not None:
+            pragmas[pragma] = _convert(value, type_)
+    if pragmas:
+        options['sqlite_pragmas'] = pragmas
+    return options
+
+
+def normalize_config(name: str, config: Union[str, Dict[str, Any]],
+                     environ: Optional[Dict[str, str]] = None) -> Tuple[str, Dict[str, Any]]:
+    """
+    将数据库配置整理为(URL, 引擎参数)
+
+    配置可以是URL字符串，也可以是包含url和引擎参数的字典，例如
+    {"url": "sqlite:///./app.db", "pool_pre_ping": True, "sqlite_pragmas": {"cache_size": -64000}}。
+    字典中的参数优先于环境变量；sqlite_pragmas按键合并。
+
+    Args:
+        name: 数据库名称
+        config: 数据库配置
+        environ: 环境变量字典，默认为os.environ
+
+    Returns:
+        (数据库URL, 引擎参数)
+    """
+    if isinstance(config, str):
+        url, explicit = config, {}
+    else:
+        explicit = dict(config)
+        url = explicit.pop('url')
+    options = options_from_env(name, environ)
+    pragmas = options.pop('sqlite_pragmas', {})
+    if 'sqlite_pragmas' in explicit:
+        explicit_pragmas = explicit.pop('sqlite_pragmas')
+        # 显式指定None或空字典时关闭所有PRAGMA（包括默认值）
+        pragmas = None if not explicit_pragmas else {**pragmas, **explicit_pragmas}
+    unknown = set(explicit) - set(ENGINE_OPTIONS)
+    if unknown:
+        raise ValueError(f"数据库 '{name}' 的配置包含未知参数: {', '.join(sorted(unknown))}")
+    options.update(explicit)
+    if pragmas is not None:
+        options['sqlite_pragmas'] = pragmas
+    return url, options
+
+
+def _is_memory_sqlite(url) -> bool:
+    return url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
+
+
+def _pragma_listener(pragmas: Dict[str, Any]):
+    """创建在每个新连接上执行PRAGMA的监听函数"""
+    statements = []
+    for pragma, value in pragmas.items():
+        if pragma not in SQLITE_PRAGMAS:
+            raise ValueError(f"不支持的SQLite PRAGMA: {pragma}")
+        if not _PRAGMA_VALUE.match(str(value)):
+            raise ValueError(f"无效的PRAGMA取值: {pragma}={value}")
+        statements.append(f"PRAGMA {pragma}={value}")
+
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for statement in statements:
+                cursor.execute(statement)
+        finally:
+            cursor.close()
+    return set_pragmas
+
+
+def _engine_arguments(url, options: Optional[Dict[str, Any]], unsupported_in_memory: Tuple[str, ...]):
+    """整理create_engine参数，返回(参数字典, 需要执行的PRAGMA)"""
+    options = dict(options or {})
+    memory = _is_memory_sqlite(url)
+    pragmas = options.pop('sqlite_pragmas', None if memory else {})
+    options.pop('slow_query_ms', None)
+    kwargs = {'echo': False}
+    kwargs.update(options)
+    if memory:
+        for option in unsupported_in_memory:
+            kwargs.pop(option, None)
+    if url.get_backend_name() != 'sqlite' or pragmas is None:
+        return kwargs, {}
+    if not memory:
+        pragmas = {**DEFAULT_SQLITE_PRAGMAS, **pragmas}
+    return kwargs, pragmas
+
+
+def build_engine(database_url: str, options: Optional[Dict[str, Any]] = None):
+    """
+    按引擎参数创建数据库引擎
+
+    文件型SQLite数据库在未配置sqlite_pragmas时使用DEFAULT_SQLITE_PRAGMAS，
+    PRAGMA在每个新连接建立时执行。
+
+    Args:
+        database_url: 数据库URL
+        options: 引擎参数，见normalize_config
+
+    Returns:
+        数据库引擎
+    """
+    kwargs, pragmas = _engine_arguments(make_url(database_url), options, _SINGLETON_POOL_UNSUPPORTED)
+    engine = create_engine(database_url, **kwargs)
+    if pragmas:
+        event.listen(engine, 'connect', _pragma_listener(pragmas))
+    return engine
+
+
+def to_async_url(database_url: str) -> str:
+    """
+    将同步驱动的URL转换为对应的异步驱动URL
+
+    sqlite -> sqlite+aiosqlite，postgresql -> postgresql+asyncpg，
+    mysql -> mysql+aiomysql。已指定异步驱动（见ASYNC_CAPABLE_DRIVERS）的URL保持不变，
+    指定了同步驱动的URL（如postgresql+psycopg2、mysql+pymysql）替换为对应的异步驱动
+
+    Args:
+        database_url: 数据库URL
+
+    Returns:
+        str: 异步驱动的数据库URL
+
+    Raises:
+        ValueError: 数据库没有可用的异步驱动
+    """
+    url = make_url(database_url)
+    if '+' in url.drivername and url.get_driver_name() in ASYNC_CAPABLE_DRIVERS:
+        return database_url
+    backend = url.get_backend_name()
+    driver = ASYNC_DRIVERS.get(backend)
+    if driver is None:
+        raise ValueError(f"没有可用的异步驱动: {url.drivername}")
+    return url.set(drivername=f"{backend}+{driver}").render_as_string(hide_password=False)
+
+
+def build_async_engine(database_url: str, options: Optional[Dict[str, Any]] = None):
+    """
+    按引擎参数创建异步数据库引擎，参数含义与build_engine相同
+
+    Args:
+        database_url: 数据库URL，未指定驱动时按to_async_url选择异步驱动
+        options: 引擎参数，见normalize_config
+
+    Returns:
+        AsyncEngine: 异步数据库引擎
+    """
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    database_url = to_async_url(database_url)
+    kwargs, pragmas = _engine_arguments(make_url(database_url), options, _STATIC_POOL_UNSUPPORTED)
+    engine = create_async_engine(database_url, **kwargs)
+    if pragmas:
+        event.listen(engine.sync_engine, 'connect', _pragma_listener(pragmas))
+    return engine
@@ -12,6 +12,7 @@ class User(BaseModel):
     """用户模型"""
     
     __tablename__ = 'users'
+    __shard_key__ = 'id'  # 分片时按id分布，见sharding.ShardSet
     
     name = Column(String(50), index=True)
     age = Column(Integer)
@@ -22,17 +23,6 @@ class User(BaseModel):
     
     def __repr__(self):
         return f"<User(id={self.id}, name='{self.name}', email='{self.email}')>"
-    
-    def to_dict(self):
-        """转换为字典"""
-        return {
-            'id': self.id,
-            'name': self.name,
-            'age': self.age,
-            'email': self.email,
-            'created_at': self.created_at.isoformat() if self.created_at is not None else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at is not None else None
-        }
 
 class Product(BaseModel):
     """产品模型"""
@@ -48,22 +38,12 @@ class Product(BaseModel):
     
     def __repr__(self):
         return f"<Product(id={self.id}, name='{self.name}', price={self.price})>"
-    
-    def to_dict(self):
-        """转换为字典"""
-        return {
-            'id': self.id,
-            'name': self.name,
-            'price': self.price,
-            'description': self.description,
-            'created_at': self.created_at.isoformat() if self.created_at is not None else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at is not None else None
-        }
 
 class Order(BaseModel):
     """订单模型"""
     
     __tablename__ = 'orders'
+    __shard_key__ = 'user_id'  # 订单与所属用户位于同一分片
     
     user_id = Column(Integer, ForeignKey('users.id'))
     product_id = Column(Integer, ForeignKey('products.id'))
@@ -76,15 +56,3 @@ class Order(BaseModel):
     
     def __repr__(self):
         return f"<Order(id={self.id}, user_id={self.user_id}, product_id={self.product_id}, quantity={self.quantity})>"
-    
-    def to_dict(self):
-        """转换为字典"""
-        return {
-            'id': self.id,
-            'user_id': self.user_id,
-            'product_id': self.product_id,
-            'quantity': self.quantity,
-            'total_price': self.total_price,
-            'created_at': self.created_at.isoformat() if self.created_at is not None else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at is not None else None
-        }
\ No newline at end of file
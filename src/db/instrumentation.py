@@ -0,0 +1,257 @@
+# src/db/instrumentation.py
+"""
+查询统计
+在引擎上监听每条SQL的执行，按归一化后的SQL汇总次数、总耗时和分位数耗时，
+记录超过阈值的慢查询（参数脱敏），并统计每个会话执行的语句数
+"""
+
+import functools
+import re
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+from loguru import logger
+from sqlalchemy import event
+
+# 默认的慢查询阈值（毫秒）
+DEFAULT_SLOW_QUERY_MS = 500.0
+
+# 每条归一化SQL保留的最近耗时样本数，用于计算分位数
+SAMPLE_SIZE = 1000
+
+PERCENTILES = (50, 95, 99)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|\$\d+|(?<![:\w]):\w+")
+_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_PARAM_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_ROW_LIST = re.compile(r"\(\?\)(?:\s*,\s*\(\?\))+")
+_WHITESPACE = re.compile(r"\s+")
+
+# 连接上记录执行开始时间和当前会话计数器的键
+_START_TIMES = 'query_start_times'
+_SESSION_COUNTER = 'session_statement_counter'
+
+
+@functools.lru_cache(maxsize=1024)
+def normalize_sql(statement: str) -> str:
+    """
+    归一化SQL，使只有参数值或IN列表长度不同的语句归为一类
+
+    SQLAlchemy缓存编译结果，同一语句的SQL文本相同，归一化结果按文本缓存
+
+    字符串和数字字面量、各驱动的参数占位符统一替换为?，
+    IN列表和多行VALUES折叠为一项，空白压缩为一个空格
+
+    Args:
+        statement: SQL语句
+
+    Returns:
+        str: 归一化后的SQL
+    """
+    sql = _STRING.sub('?', statement)
+    sql = _PLACEHOLDER.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _WHITESPACE.sub(' ', sql).strip()
+    sql = _PARAM_LIST.sub('(?)', sql)
+    return _ROW_LIST.sub('(?)', sql)
+
+
+def redact_parameters(parameters: Any, executemany: bool = False) -> str:
+    """
+    参数脱敏，只保留参数名和类型
+
+    Args:
+        parameters: 绑定参数
+        executemany: 是否为批量执行
+
+    Returns:
+        str: 脱敏后的参数描述
+    """
+    if executemany:
+        return f"<{len(parameters)}组参数>"
+    if isinstance(parameters, dict):
+        return '{' + ', '.join(f"{key}: <{type(value).__name__}>" for key, value in parameters.items()) + '}'
+    if isinstance(parameters, (list, tuple)):
+        return '[' + ', '.join(f"<{type(value).__name__}>" for value in parameters) + ']'
+    return '<' + type(parameters).__name__ + '>'
+
+
+def _percentile(ordered: List[float], percent: float) -> float:
+    """最近秩法计算分位数"""
+    rank = max(int(round(percent / 100 * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+class _StatementStats:
+    __slots__ = ('count', 'total', 'max', 'samples')
+
+    def __init__(self, sample_size: int):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples: Deque[float] = deque(maxlen=sample_size)
+
+
+class QueryStats:
+    """一个引擎的查询统计"""
+
+    def __init__(self, name: str, slow_query_ms: Optional[float] = DEFAULT_SLOW_QUERY_MS,
+                 sample_size: int = SAMPLE_SIZE):
+        """
+        Args:
+            name: 统计名称（数据库名称），用于日志
+            slow_query_ms: 慢查询阈值（毫秒），为None时不记录慢查询
+            sample_size: 每条归一化SQL保留的耗时样本数
+        """
+        self.name = name
+        self.slow_query_ms = slow_query_ms
+        self.sample_size = sample_size
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """清空统计"""
+        with self._lock:
+            self._statements: Dict[str, _StatementStats] = {}
+            self.slow_queries = 0
+            self.sessions = 0
+            self.session_statements = 0
+            self.max_session_statements = 0
+
+    def record(self, statement: str, seconds: float):
+        """记录一条语句的耗时"""
+        key = normalize_sql(statement)
+        with self._lock:
+            stats = self._statements.get(key)
+            if stats is None:
+                stats = self._statements[key] = _StatementStats(self.sample_size)
+            stats.count += 1
+            stats.total += seconds
+            stats.max = max(stats.max, seconds)
+            stats.samples.append(seconds)
+
+    def record_slow(self, statement: str, parameters: Any, executemany: bool, seconds: float):
+        """超过阈值时记录慢查询日志"""
+        if self.slow_query_ms is None or seconds * 1000 < self.slow_query_ms:
+            return
+        with self._lock:
+            self.slow_queries += 1
+        logger.warning(f"慢查询 [{self.name}] {seconds * 1000:.1f}ms: {_WHITESPACE.sub(' ', statement).strip()} "
+                       f"参数: {redact_parameters(parameters, executemany)}")
+
+    def record_session(self, statements: int):
+        """记录一个会话执行的语句数"""
+        with self._lock:
+            self.sessions += 1
+            self.session_statements += statements
+            self.max_session_statements = max(self.max_session_statements, statements)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        导出统计结果
+
+        Returns:
+            包含statements（按总耗时降序，耗时单位为毫秒）、slow_queries和sessions的字典
+        """
+        with self._lock:
+            items = [(sql, stats.count, stats.total, stats.max, sorted(stats.samples))
+                     for sql, stats in self._statements.items()]
+            sessions = {
+                'count': self.sessions,
+                'statements': self.session_statements,
+                'mean_statements': self.session_statements / self.sessions if self.sessions else 0.0,
+                'max_statements': self.max_session_statements,
+            }
+            slow_queries = self.slow_queries
+        statements = []
+        for sql, count, total, maximum, samples in sorted(items, key=lambda item: item[2], reverse=True):
+            entry = {
+                'sql': sql,
+                'count': count,
+                'total_ms': total * 1000,
+                'mean_ms': total * 1000 / count,
+                'max_ms': maximum * 1000,
+            }
+            for percent in PERCENTILES:
+                entry[f'p{percent}_ms'] = _percentile(samples, percent) * 1000
+            statements.append(entry)
+        return {'statements': statements, 'slow_queries': slow_queries, 'sessions': sessions}
+
+
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault(_START_TIMES, []).append(time.perf_counter())
+
+
+def _clear_session(dbapi_connection, connection_record):
+    connection_record.info.pop(_SESSION_COUNTER, None)
+
+
+def instrument(engine, stats: QueryStats) -> QueryStats:
+    """
+    在引擎上注册查询统计
+
+    Args:
+        engine: 数据库引擎
+        stats: 统计对象
+
+    Returns:
+        QueryStats: 传入的统计对象
+    """
+    def after_execute(conn, cursor, statement, parameters, context, executemany):
+        seconds = time.perf_counter() - conn.info[_START_TIMES].pop()
+        stats.record(statement, seconds)
+        stats.record_slow(statement, parameters, executemany, seconds)
+        counter = conn.info.get(_SESSION_COUNTER)
+        if counter is not None:
+            counter['statements'] = counter.get('statements', 0) + 1
+
+    def handle_error(exception_context):
+        starts = exception_context.connection.info.get(_START_TIMES) if exception_context.connection else None
+        if starts:
+            starts.pop()
+
+    event.listen(engine, 'before_cursor_execute', _before_execute)
+    event.listen(engine, 'after_cursor_execute', after_execute)
+    event.listen(engine, 'handle_error', handle_error)
+    # 连接归还连接池时解除与会话的关联
+    event.listen(engine, 'checkin', _clear_session)
+    return stats
+
+
+def track_session(session, connection):
+    """
+    将会话的计数器关联到它开始使用的连接上，连接归还连接池时解除关联
+
+    Args:
+        session: 数据库会话，语句数累计在session.info['statements']中
+        connection: 会话开始事务的连接
+    """
+    session.info.setdefault('statements', 0)
+    connection.info[_SESSION_COUNTER] = session.info
+
+
+def format_stats(stats: Dict[str, Dict[str, Any]], limit: Optional[int] = 20) -> str:
+    """
+    将DatabaseManager.stats()的结果格式化为文本
+
+    Args:
+        stats: {统计名称: QueryStats.snapshot()}
+        limit: 每个数据库最多显示的语句数（按总耗时），为None时全部显示
+
+    Returns:
+        str: 格式化后的文本
+    """
+    lines = []
+    for name, snapshot in stats.items():
+        sessions = snapshot['sessions']
+        lines.append(f"[{name}] 语句 {sum(entry['count'] for entry in snapshot['statements'])} 条，"
+                     f"慢查询 {snapshot['slow_queries']} 条，会话 {sessions['count']} 个，"
+                     f"每会话平均 {sessions['mean_statements']:.1f} 条、最多 {sessions['max_statements']} 条")
+        for entry in snapshot['statements'][:limit]:
+            lines.append(f"  {entry['count']:>8} 次  总计 {entry['total_ms']:10.1f}ms  "
+                         f"p50 {entry['p50_ms']:8.2f}ms  p95 {entry['p95_ms']:8.2f}ms  "
+                         f"p99 {entry['p99_ms']:8.2f}ms  最大 {entry['max_ms']:8.2f}ms  {entry['sql']}")
+    return '\n'.join(lines)
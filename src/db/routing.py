@@ -0,0 +1,161 @@
+# src/db/routing.py
+"""
+读写分离
+在主库之外注册只读副本，查询按策略路由到副本，写入和事务始终使用主库
+"""
+
+import itertools
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.dml import UpdateBase
+
+from .engine import build_engine
+from .instrumentation import QueryStats, track_session
+
+# 副本选择策略
+REPLICA_STRATEGIES = ('round_robin', 'least_loaded')
+
+# 数据库配置中属于读写分离、而不是引擎参数的键
+ROUTING_OPTIONS = ('replicas', 'replica_strategy', 'read_your_writes')
+
+# 默认的读己之写窗口（秒）：本线程写入后的这段时间内读操作仍使用主库
+DEFAULT_READ_YOUR_WRITES = 1.0
+
+
+class ReplicaRouter:
+    """管理一个主库的只读副本并选择读操作使用的副本"""
+
+    def __init__(self, strategy: str = 'round_robin', read_your_writes: float = DEFAULT_READ_YOUR_WRITES,
+                 on_engine: Optional[Callable[[Any, int, Dict[str, Any]], None]] = None):
+        """
+        Args:
+            strategy: 副本选择策略，round_robin轮询，least_loaded选择已签出连接最少的副本
+            read_your_writes: 本线程写入后读操作仍使用主库的秒数，0表示不启用
+            on_engine: 副本引擎创建后的回调，参数为(引擎, 副本序号, 引擎参数)
+        """
+        if strategy not in REPLICA_STRATEGIES:
+            raise ValueError(f"不支持的副本选择策略: {strategy}")
+        self.strategy = strategy
+        self.read_your_writes = read_your_writes
+        self.on_engine = on_engine
+        self._replicas: List[Any] = []
+        self._pending: List[Tuple[str, Dict[str, Any]]] = []
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def add(self, engine):
+        """添加副本引擎"""
+        self._replicas.append(engine)
+
+    def add_config(self, url: str, options: Dict[str, Any]):
+        """添加副本配置，引擎在首次使用副本时创建"""
+        with self._lock:
+            self._pending.append((url, options))
+
+    @property
+    def replicas(self) -> List[Any]:
+        """副本引擎列表"""
+        if self._pending:
+            with self._lock:
+                while self._pending:
+                    url, options = self._pending.pop(0)
+                    engine = build_engine(url, options)
+                    if self.on_engine is not None:
+                        self.on_engine(engine, len(self._replicas), options)
+                    self._replicas.append(engine)
+        return self._replicas
+
+    def dispose(self):
+        """关闭已创建的副本引擎的连接池"""
+        for engine in self._replicas:
+            engine.dispose()
+
+    def choose(self):
+        """
+        按策略选择一个副本
+
+        Returns:
+            副本引擎
+        """
+        replicas = self.replicas
+        with self._lock:
+            start = next(self._counter) % len(replicas)
+        ordered = replicas[start:] + replicas[:start]
+        if self.strategy == 'least_loaded':
+            # 从轮询位置开始比较，负载相同时仍能分散到各副本
+            return min(ordered, key=lambda engine: engine.pool.checkedout())
+        return ordered[0]
+
+    def mark_write(self):
+        """记录本线程的写入时间，写入时和提交时各记录一次"""
+        self._local.last_write = time.monotonic()
+
+    def in_write_window(self) -> bool:
+        """本线程是否处于读己之写窗口内"""
+        last_write = getattr(self._local, 'last_write', None)
+        return last_write is not None and time.monotonic() - last_write < self.read_your_writes
+
+
+class RoutingSession(Session):
+    """
+    按语句类型选择连接的会话
+
+    SELECT在满足以下条件时路由到副本：会话不是主库会话、本会话尚未写入、
+    本线程不在读己之写窗口内、且不是SELECT ... FOR UPDATE。
+    写出（flush）、INSERT/UPDATE/DELETE和其他语句使用主库。
+    读己之写窗口从写入会话提交时起算，写入到提交之间的耗时不占用窗口。
+    """
+
+    def __init__(self, *args, router: Optional[ReplicaRouter] = None, use_primary: bool = False,
+                 query_stats: Optional[QueryStats] = None, **kwargs):
+        """
+        Args:
+            router: 副本路由器，为None或没有副本时全部使用主库
+            use_primary: 是否所有语句都使用主库（事务会话）
+            query_stats: 查询统计，会话关闭时记录本会话执行的语句数
+        """
+        super().__init__(*args, **kwargs)
+        self.router = router
+        self.use_primary = use_primary
+        self.query_stats = query_stats
+        self.wrote = False
+
+    def close(self):
+        statements = self.info.pop('statements', None)
+        if statements is not None and self.query_stats is not None:
+            self.query_stats.record_session(statements)
+        super().close()
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        primary = super().get_bind(mapper=mapper, clause=clause, **kwargs)
+        router = self.router
+        if router is None or not router.replicas:
+            return primary
+        if self._flushing or isinstance(clause, UpdateBase):
+            self.wrote = True
+            router.mark_write()
+            return primary
+        if (not isinstance(clause, Select) or clause._for_update_arg is not None
+                or self.use_primary or self.wrote or router.in_write_window()):
+            return primary
+        return router.choose()
+
+
+@event.listens_for(RoutingSession, 'after_begin')
+def _track_statements(session, transaction, connection):
+    # 主库和副本的连接都关联到同一个会话计数器
+    if session.query_stats is not None:
+        track_session(session, connection)
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _refresh_write_window(session):
+    # 写入在提交后才对副本可见，从提交时重新开始读己之写窗口
+    if session.wrote and session.router is not None:
+        session.router.mark_write()
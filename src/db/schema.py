@@ -0,0 +1,150 @@
+# src/db/schema.py
+"""
+表结构指纹
+根据模型元数据计算每张表的指纹并记录在数据库中，结构未变化时跳过create_all，
+结构变化时报告需要迁移的表
+"""
+
+import hashlib
+import json
+from datetime import datetime
+from typing import Dict, List
+
+from loguru import logger
+from sqlalchemy import Column, DateTime, MetaData, String, Table, Text, delete, inspect, select, update
+from sqlalchemy.exc import IntegrityError, OperationalError, ProgrammingError
+
+# 指纹表不属于业务模型，使用独立的MetaData，自身不参与指纹计算
+_metadata = MetaData()
+
+fingerprints = Table(
+    'schema_fingerprints', _metadata,
+    Column('name', String(100), primary_key=True),
+    Column('fingerprint', String(64), nullable=False),
+    Column('tables', Text, nullable=False),
+    Column('updated_at', DateTime, nullable=False),
+)
+
+# 业务模型元数据在指纹表中的记录名
+METADATA_NAME = 'base'
+
+
+def _describe_table(table: Table) -> dict:
+    """与数据库方言无关的表结构描述"""
+    return {
+        'columns': [
+            [column.name, repr(column.type), column.nullable, column.primary_key, bool(column.unique),
+             sorted(fk.target_fullname for fk in column.foreign_keys)]
+            for column in table.columns
+        ],
+        'indexes': sorted(
+            [index.name or '', [column.name for column in index.columns], bool(index.unique)]
+            for index in table.indexes
+        ),
+    }
+
+
+def table_fingerprints(metadata: MetaData) -> Dict[str, str]:
+    """
+    计算元数据中每张表的指纹
+
+    Args:
+        metadata: 模型元数据
+
+    Returns:
+        {表名: SHA-256指纹}
+    """
+    return {
+        name: hashlib.sha256(json.dumps(_describe_table(table), sort_keys=True).encode('utf-8')).hexdigest()
+        for name, table in metadata.tables.items()
+    }
+
+
+def metadata_fingerprint(tables: Dict[str, str]) -> str:
+    """根据各表指纹计算整体指纹"""
+    return hashlib.sha256(json.dumps(tables, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def read_fingerprints(conn) -> Dict[str, str]:
+    """
+    读取数据库中记录的表指纹
+
+    Returns:
+        {表名: 指纹}，尚未记录时为空字典
+    """
+    try:
+        row = conn.execute(select(fingerprints.c.tables).where(fingerprints.c.name == METADATA_NAME)).first()
+    except (OperationalError, ProgrammingError):
+        # 指纹表不存在
+        conn.rollback()
+        return {}
+    return json.loads(row.tables) if row is not None else {}
+
+
+def _write_fingerprints(conn, tables: Dict[str, str]):
+    values = {'fingerprint': metadata_fingerprint(tables), 'tables': json.dumps(tables, sort_keys=True),
+              'updated_at': datetime.utcnow()}
+    result = conn.execute(update(fingerprints).where(fingerprints.c.name == METADATA_NAME).values(**values))
+    if result.rowcount == 0:
+        try:
+            with conn.begin_nested():
+                conn.execute(fingerprints.insert().values(name=METADATA_NAME, **values))
+        except IntegrityError:
+            # 其他进程同时写入了记录
+            conn.execute(update(fingerprints).where(fingerprints.c.name == METADATA_NAME).values(**values))
+
+
+def sync_schema(engine, metadata: MetaData, db_name: str = 'default') -> List[str]:
+    """
+    按指纹创建缺失的表
+
+    所有表的指纹与记录一致时只读取一行，不执行create_all；
+    否则执行create_all并记录新增表的指纹。已有表的结构发生变化时create_all不会修改它，
+    这些表作为漂移报告，指纹保持不变，迁移完成后调用stamp_schema更新。
+    只导入了部分模型的进程不会删除其他表的记录。
+
+    Args:
+        engine: 数据库引擎
+        metadata: 模型元数据
+        db_name: 数据库名称，用于日志
+
+    Returns:
+        结构与记录不一致的表名列表
+    """
+    current = table_fingerprints(metadata)
+    with engine.connect() as conn:
+        stored = read_fingerprints(conn)
+    if all(stored.get(name) == fingerprint for name, fingerprint in current.items()):
+        return []
+
+    drifted = sorted(name for name, fingerprint in current.items()
+                     if name in stored and stored[name] != fingerprint)
+    metadata.create_all(bind=engine)
+    _metadata.create_all(bind=engine)
+    added = {name: fingerprint for name, fingerprint in current.items() if name not in stored}
+    with engine.begin() as conn:
+        _write_fingerprints(conn, {**read_fingerprints(conn), **added})
+    if drifted:
+        logger.warning(f"数据库 '{db_name}' 中以下表的结构与模型定义不一致，需要迁移: {', '.join(drifted)}")
+    return drifted
+
+
+def stamp_schema(engine, metadata: MetaData):
+    """
+    将当前模型的表指纹记录到数据库中，用于完成迁移之后
+
+    Args:
+        engine: 数据库引擎
+        metadata: 模型元数据
+    """
+    _metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        _write_fingerprints(conn, {**read_fingerprints(conn), **table_fingerprints(metadata)})
+
+
+def clear_schema(engine):
+    """删除数据库中记录的表指纹"""
+    if not inspect(engine).has_table(fingerprints.name):
+        return
+    with engine.begin() as conn:
+        conn.execute(delete(fingerprints).where(fingerprints.c.name == METADATA_NAME))
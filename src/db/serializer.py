@@ -0,0 +1,317 @@
+# src/db/serializer.py
+"""
+模型序列化
+按模型的映射列编译一次取值函数，把一批ORM实例或Core查询结果行
+转换为字典列表、pandas DataFrame或Arrow表
+"""
+
+from datetime import date, datetime, time
+from decimal import Decimal
+from functools import lru_cache
+from operator import attrgetter, itemgetter
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+from sqlalchemy import Table, inspect
+
+# Python类型对应的DataFrame列类型，整数列包含NULL时使用可空的Int64；
+# 字符串列使用string，全部为NULL时列类型也不会变化，分批写出时各批的表结构一致
+_PANDAS_DTYPES = {
+    int: 'int64',
+    float: 'float64',
+    bool: 'bool',
+    str: 'string',
+    datetime: 'datetime64[us]',
+}
+
+
+def _python_type(column) -> Optional[type]:
+    try:
+        return column.type.python_type
+    except NotImplementedError:
+        return None
+
+
+def _pandas_dtype(python_type: Optional[type], nullable: bool):
+    """可为NULL的列对应的DataFrame列类型"""
+    if nullable and python_type is int:
+        return 'Int64'
+    if nullable and python_type is bool:
+        return 'boolean'
+    return _PANDAS_DTYPES.get(python_type, object)
+
+
+def _arrow_type(pa, column_type, python_type: Optional[type]):
+    """
+    列类型对应的Arrow类型
+
+    Numeric在声明了精度时使用decimal128，否则使用float64；
+    没有对应Arrow类型的列（包括无法确定Python类型的列）以字符串写出
+    """
+    if python_type is Decimal:
+        precision = getattr(column_type, 'precision', None)
+        if precision:
+            return pa.decimal128(precision, getattr(column_type, 'scale', None) or 0)
+        return pa.float64()
+    arrow_type = {
+        int: pa.int64(),
+        float: pa.float64(),
+        str: pa.string(),
+        bool: pa.bool_(),
+        datetime: pa.timestamp('us'),
+        date: pa.date32(),
+        time: pa.time64('us'),
+        bytes: pa.binary(),
+    }.get(python_type)
+    return pa.string() if arrow_type is None else arrow_type
+
+
+def _arrow_converter(pa, arrow_type, python_type: Optional[type]) -> Optional[Callable[[Any], Any]]:
+    """pyarrow不能直接转换的值（Decimal转float64、其他类型转字符串）的转换函数"""
+    if python_type is Decimal and pa.types.is_floating(arrow_type):
+        return float
+    if pa.types.is_string(arrow_type) and python_type is not str:
+        return str
+    return None
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        return pyarrow
+    except ImportError:
+        raise ImportError("转换为Arrow表需要安装pyarrow: pip install pyarrow")
+
+
+def _isoformat(value):
+    return value.isoformat() if value is not None else None
+
+
+def _isoformat_column(column: Sequence) -> List[Optional[str]]:
+    """
+    转换一列日期时间
+
+    批量写入的记录通常共用同一个时间戳，重复值较多时每个不同的值只格式化一次
+    """
+    distinct = set(column)
+    if len(distinct) * 2 > len(column):
+        return [*map(_isoformat, column)]
+    formatted = {value: _isoformat(value) for value in distinct}
+    return [*map(formatted.__getitem__, column)]
+
+
+def _tuple_getter(getter_factory: Callable, keys: Sequence) -> Callable[[Any], Tuple]:
+    """返回取出多个值的函数，只有一个字段时也返回元组"""
+    if len(keys) == 1:
+        single = getter_factory(keys[0])
+        return lambda row: (single(row),)
+    return getter_factory(*keys)
+
+
+class ModelSerializer:
+    """
+    一个模型（及字段子集）的序列化器
+
+    通过serializer_for获取，同一模型和字段组合只编译一次。
+    也可以用Table代替模型类，此时只能序列化Core结果行。
+    """
+
+    def __init__(self, model, fields: Optional[Sequence[str]] = None):
+        """
+        Args:
+            model: ORM模型类或Table
+            fields: 输出的字段（映射列的属性名），为None时输出所有列
+        """
+        # 主键列在前，其余按表中的列顺序
+        self.mapped = not isinstance(model, Table)
+        if self.mapped:
+            pairs = [(attr.key, attr.columns[0]) for attr in inspect(model).column_attrs]
+            name = model.__name__
+        else:
+            pairs = [(column.name, column) for column in model.columns]
+            name = model.name
+        columns = dict(sorted(pairs, key=lambda pair: not pair[1].primary_key))
+        if fields is None:
+            fields = list(columns)
+        unknown = [field for field in fields if field not in columns]
+        if unknown:
+            raise ValueError(f"{name}没有字段: {', '.join(unknown)}")
+        self.model = model
+        self.fields: Tuple[str, ...] = tuple(fields)
+        self.python_types = [_python_type(columns[field]) for field in self.fields]
+        self._column_types = [columns[field].type for field in self.fields]
+        self._nullable = [bool(columns[field].nullable) for field in self.fields]
+        self._iso_indexes = [index for index, type_ in enumerate(self.python_types)
+                             if type_ in (datetime, date)]
+        self._instance_getter = _tuple_getter(attrgetter, self.fields)
+        # 已加载的列值保存在实例的__dict__中，直接读取可以跳过ORM属性描述符
+        self._state_getter = _tuple_getter(itemgetter, self.fields)
+
+    def _core_getter(self, keys: Sequence[str]) -> Optional[Callable[[Any], Tuple]]:
+        """按结果集的列名编译取值函数，结果列与fields完全一致时返回None"""
+        positions = {key: index for index, key in enumerate(keys)}
+        missing = [field for field in self.fields if field not in positions]
+        if missing:
+            raise ValueError(f"查询结果中没有字段: {', '.join(missing)}")
+        indexes = [positions[field] for field in self.fields]
+        if indexes == list(range(len(keys))):
+            return None
+        return _tuple_getter(itemgetter, indexes)
+
+    def values(self, rows) -> List[Tuple]:
+        """
+        取出每行的字段值
+
+        Args:
+            rows: ORM实例序列、Core结果行序列或Core查询结果（Result）
+
+        Returns:
+            按fields顺序排列的值元组（或Core结果行）列表
+        """
+        if hasattr(rows, 'keys') and hasattr(rows, 'fetchall'):
+            getter = self._core_getter(list(rows.keys()))
+            rows = rows.fetchall()
+            return rows if getter is None else [*map(getter, rows)]
+        rows = rows if isinstance(rows, list) else list(rows)
+        if not rows:
+            return []
+        first = rows[0]
+        if self.mapped and isinstance(first, self.model):
+            state_getter = self._state_getter
+            try:
+                return [state_getter(instance.__dict__) for instance in rows]
+            except KeyError:
+                # 有过期或未加载的列，经由属性访问触发加载
+                return [*map(self._instance_getter, rows)]
+        if hasattr(first, '_fields'):
+            # Row本身支持按位置取值，列一致时不再复制
+            getter = self._core_getter(first._fields)
+            return rows if getter is None else [*map(getter, rows)]
+        raise TypeError(f"无法序列化的行类型: {type(first).__name__}")
+
+    def _columns(self, values: List[Tuple]) -> List[List[Any]]:
+        """将按行排列的值转置为按列排列"""
+        return [[*map(itemgetter(index), values)] for index in range(len(self.fields))]
+
+    def to_dict(self, instance) -> Dict[str, Any]:
+        """
+        序列化单个ORM实例，日期时间转换为ISO格式字符串
+
+        Args:
+            instance: ORM实例
+
+        Returns:
+            {字段名: 值}
+        """
+        values = self._instance_getter(instance)
+        if self._iso_indexes:
+            values = list(values)
+            for index in self._iso_indexes:
+                values[index] = _isoformat(values[index])
+        return dict(zip(self.fields, values))
+
+    def to_dicts(self, rows, iso_datetimes: bool = True) -> List[Dict[str, Any]]:
+        """
+        序列化为字典列表
+
+        Args:
+            rows: ORM实例序列、Core结果行序列或Core查询结果
+            iso_datetimes: 是否将日期时间转换为ISO格式字符串
+
+        Returns:
+            字典列表
+        """
+        values = self.values(rows)
+        fields = self.fields
+        if not iso_datetimes or not self._iso_indexes or not values:
+            return [dict(zip(fields, row)) for row in values]
+        # 按列转换日期时间，再按行组装字典
+        columns = self._columns(values)
+        for index in self._iso_indexes:
+            columns[index] = _isoformat_column(columns[index])
+        return [dict(zip(fields, row)) for row in zip(*columns)]
+
+    def to_dataframe(self, rows) -> pd.DataFrame:
+        """
+        序列化为DataFrame
+
+        整数列包含NULL时使用可空的Int64，日期时间列为datetime64[us]，
+        可以直接交给data_processor流水线处理
+
+        Args:
+            rows: ORM实例序列、Core结果行序列或Core查询结果
+
+        Returns:
+            pd.DataFrame: 列顺序与fields一致
+        """
+        columns = self._columns(self.values(rows))
+        data = {}
+        for field, python_type, column in zip(self.fields, self.python_types, columns):
+            dtype = _PANDAS_DTYPES.get(python_type)
+            if dtype is None:
+                data[field] = pd.array(column) if column else pd.array([], dtype=object)
+            elif python_type is int and None in column:
+                data[field] = pd.array(column, dtype='Int64')
+            elif python_type is bool and None in column:
+                data[field] = pd.array(column, dtype='boolean')
+            else:
+                data[field] = pd.Series(column, dtype=dtype).array
+        return pd.DataFrame(data, columns=list(self.fields))
+
+    def arrow_schema(self):
+        """
+        Arrow表结构，只由列类型决定，与数据无关，分批写出时各批的表结构一致
+
+        Returns:
+            pyarrow.Schema
+        """
+        pa = _require_pyarrow()
+        schema = pa.schema([(field, _arrow_type(pa, column_type, python_type))
+                            for field, column_type, python_type
+                            in zip(self.fields, self._column_types, self.python_types)])
+        # 附带pandas元数据，读回时可为NULL的整数、布尔列使用Int64、boolean
+        template = pd.DataFrame({
+            field: pd.Series([], dtype=_pandas_dtype(python_type, nullable))
+            for field, python_type, nullable in zip(self.fields, self.python_types, self._nullable)
+        }, columns=list(self.fields))
+        return schema.with_metadata(pa.Schema.from_pandas(template, preserve_index=False).metadata)
+
+    def to_arrow(self, rows):
+        """
+        序列化为Arrow表，需要安装pyarrow
+
+        Args:
+            rows: ORM实例序列、Core结果行序列或Core查询结果
+
+        Returns:
+            pyarrow.Table: 表结构为arrow_schema()
+        """
+        pa = _require_pyarrow()
+        schema = self.arrow_schema()
+        columns = self._columns(self.values(rows))
+        arrays = []
+        for column, field, python_type in zip(columns, schema, self.python_types):
+            convert = _arrow_converter(pa, field.type, python_type)
+            if convert is not None:
+                column = [None if value is None else convert(value) for value in column]
+            arrays.append(pa.array(column, type=field.type))
+        return pa.Table.from_arrays(arrays, schema=schema)
+
+
+@lru_cache(maxsize=None)
+def _compiled(model, fields: Optional[Tuple[str, ...]]) -> ModelSerializer:
+    return ModelSerializer(model, fields)
+
+
+def serializer_for(model, fields: Optional[Sequence[str]] = None) -> ModelSerializer:
+    """
+    获取模型的序列化器，同一模型和字段组合只编译一次
+
+    Args:
+        model: ORM模型类或Table
+        fields: 输出的字段，为None时输出所有映射列
+
+    Returns:
+        ModelSerializer: 序列化器
+    """
+    return _compiled(model, tuple(fields) if fields is not None else None)
@@ -0,0 +1,295 @@
+# src/db/sharding.py
+"""
+分片
+按模型声明的分片键将记录哈希分布到DatabaseManager中配置的多个数据库，
+单条记录操作路由到一个分片，查询通过线程池并发访问所有分片并归并结果
+"""
+
+import heapq
+import itertools
+import os
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from loguru import logger
+from sqlalchemy import select
+
+from .database import Base, DatabaseManager
+
+# 模型未声明__shard_key__时使用的分片键
+DEFAULT_SHARD_KEY = 'id'
+
+# 指定IdGenerator节点号的环境变量
+NODE_ID_ENV = 'SHARD_NODE_ID'
+
+
+class IdGenerator:
+    """
+    跨分片唯一的64位ID生成器
+
+    结构为 毫秒时间戳(41位) | 节点号(10位) | 毫秒内序号(12位)，
+    与Snowflake相同，ID随时间递增。PostgreSQL等数据库上分片表的id列需要使用BigInteger。
+    同时写入的每个进程必须使用不同的节点号，否则可能生成重复的ID。
+    """
+
+    EPOCH_MS = 1704067200000  # 2024-01-01 UTC
+
+    def __init__(self, node: Optional[int] = None):
+        """
+        Args:
+            node: 节点号（0~1023），默认取环境变量SHARD_NODE_ID。两者都未指定时取进程号
+                的低10位并记录警告：不同主机上的进程号可能相同，多机部署必须显式指定
+        """
+        if node is None:
+            value = os.getenv(NODE_ID_ENV)
+            if value is None:
+                node = os.getpid() & 0x3FF
+                logger.warning(f"未指定IdGenerator节点号（{NODE_ID_ENV}），使用进程号的低10位 {node}，"
+                               f"多机部署时可能生成重复的ID")
+            else:
+                try:
+                    node = int(value)
+                except ValueError:
+                    raise ValueError(f"{NODE_ID_ENV}必须是整数: {value}")
+        if not 0 <= node <= 0x3FF:
+            raise ValueError(f"节点号必须在0~1023之间: {node}")
+        self.node = node
+        self._lock = threading.Lock()
+        self._last_ms = -1
+        self._sequence = 0
+
+    def next_id(self) -> int:
+        """生成下一个ID"""
+        with self._lock:
+            now = int(time.time() * 1000)
+            if now < self._last_ms:
+                now = self._last_ms
+            if now == self._last_ms:
+                self._sequence = (self._sequence + 1) & 0xFFF
+                if self._sequence == 0:
+                    # 本毫秒序号用尽，等待下一毫秒
+                    while now <= self._last_ms:
+                        now = int(time.time() * 1000)
+            else:
+                self._sequence = 0
+            self._last_ms = now
+            return ((now - self.EPOCH_MS) << 22) | (self.node << 12) | self._sequence
+
+
+def shard_key_of(model) -> str:
+    """模型的分片键字段名"""
+    return getattr(model, '__shard_key__', DEFAULT_SHARD_KEY)
+
+
+def _merge_key(column: str) -> Callable[[Any], Any]:
+    """与SQLite排序一致的归并键：NULL视为最小值，相同值按id排序"""
+    def key(instance):
+        value = getattr(instance, column)
+        return (value is not None, value if value is not None else 0, instance.id)
+    return key
+
+
+class ShardSet:
+    """
+    一组分片数据库
+
+    模型通过类属性__shard_key__声明分片键（默认为id），例如：
+
+        class User(BaseModel):
+            __tablename__ = 'users'
+            __shard_key__ = 'email'
+
+    每个操作在各自的会话中执行并提交。
+    """
+
+    def __init__(self, manager: DatabaseManager, shards: Sequence[str], max_workers: Optional[int] = None,
+                 id_generator: Optional[IdGenerator] = None):
+        """
+        Args:
+            manager: 数据库管理器，所有分片必须已在其中配置
+            shards: 分片数据库名称，顺序决定哈希映射，之后不能改变
+            max_workers: 并发查询的线程数，默认为分片数
+            id_generator: 新记录的ID生成器，默认为IdGenerator()（节点号取自SHARD_NODE_ID）
+        """
+        if not shards:
+            raise ValueError("至少需要一个分片")
+        for name in shards:
+            if name not in manager.databases:
+                raise ValueError(f"Database '{name}' not configured")
+        self.manager = manager
+        self.shards = list(shards)
+        self.id_generator = id_generator or IdGenerator()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers or len(self.shards),
+                                            thread_name_prefix='shard')
+
+    def close(self):
+        """关闭查询线程池"""
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def shard_for(self, value: Any) -> str:
+        """
+        计算分片键取值所在的分片
+
+        使用CRC32而不是hash()，保证不同进程之间映射一致
+        """
+        return self.shards[zlib.crc32(str(value).encode('utf-8')) % len(self.shards)]
+
+    def create_tables(self):
+        """在所有分片上创建表"""
+        for name in self.shards:
+            self.manager.create_tables(name)
+
+    def _run(self, shard: str, operation: Callable, commit: bool = False):
+        with self.manager.get_db_session(shard, use_primary=commit) as db:
+            result = operation(db)
+            if commit:
+                db.flush()
+                if isinstance(result, Base):
+                    # 提交前移出会话，避免提交使属性过期后无法在会话外访问
+                    db.expunge(result)
+                db.commit()
+            return result
+
+    def _gather(self, operation: Callable, shards: Optional[Sequence[str]] = None) -> List[Any]:
+        """在多个分片上并发执行只读操作，按分片顺序返回结果"""
+        futures = [self._executor.submit(self._run, shard, operation) for shard in (shards or self.shards)]
+        return [future.result() for future in futures]
+
+    def _target_shards(self, model, id: Any, shard_key: Any) -> List[str]:
+        if shard_key_of(model) == 'id':
+            return [self.shard_for(id)]
+        if shard_key is not None:
+            return [self.shard_for(shard_key)]
+        return self.shards
+
+    def create(self, model, **kwargs):
+        """
+        在分片键对应的分片上创建记录
+
+        未指定id时由ID生成器分配跨分片唯一的id
+
+        Returns:
+            创建的模型实例（已脱离会话）
+        """
+        kwargs.setdefault('id', self.id_generator.next_id())
+        key = shard_key_of(model)
+        if kwargs.get(key) is None:
+            raise ValueError(f"创建{model.__name__}时必须提供分片键: {key}")
+        return self._run(self.shard_for(kwargs[key]), lambda db: model.create(db, **kwargs), commit=True)
+
+    def get_by_id(self, model, id: Any, shard_key: Any = None):
+        """
+        根据ID获取记录
+
+        分片键为id或提供了shard_key时只访问一个分片，否则并发查询所有分片
+
+        Args:
+            model: 模型类
+            id: 记录ID
+            shard_key: 记录的分片键取值（分片键不是id时用于定位分片）
+
+        Returns:
+            模型实例或None
+        """
+        shards = self._target_shards(model, id, shard_key)
+        if len(shards) == 1:
+            return self._run(shards[0], lambda db: model.get_by_id(db, id))
+        found = [instance for instance in self._gather(lambda db: model.get_by_id(db, id), shards)
+                 if instance is not None]
+        return found[0] if found else None
+
+    def update(self, model, id: Any, shard_key: Any = None, **kwargs):
+        """
+        更新记录，不能修改分片键
+
+        Returns:
+            更新后的模型实例或None
+        """
+        if shard_key_of(model) in kwargs:
+            raise ValueError("不能修改分片键，请删除后重新创建")
+        for shard in self._target_shards(model, id, shard_key):
+            instance = self._run(shard, lambda db: model.update(db, id, **kwargs), commit=True)
+            if instance is not None:
+                return instance
+        return None
+
+    def delete(self, model, id: Any, shard_key: Any = None) -> bool:
+        """
+        删除记录
+
+        Returns:
+            bool: 是否成功删除
+        """
+        for shard in self._target_shards(model, id, shard_key):
+            if self._run(shard, lambda db: model.delete(db, id), commit=True):
+                return True
+        return False
+
+    def _scatter(self, model, conditions: Dict[str, Any], order_by: str, descending: bool,
+                 skip: int, limit: Optional[int]) -> List[Any]:
+        column = getattr(model, order_by)
+        ordering = [column.desc() if descending else column.asc()]
+        if order_by != 'id':
+            ordering.append(model.id.desc() if descending else model.id.asc())
+        query = select(model).order_by(*ordering)
+        for key, value in conditions.items():
+            if not hasattr(model, key):
+                raise ValueError(f"{model.__name__}没有字段: {key}")
+            query = query.where(getattr(model, key) == value)
+        if limit is not None:
+            # 每个分片最多需要skip+limit行才能得到正确的全局结果
+            query = query.limit(skip + limit)
+
+        shard_key = shard_key_of(model)
+        shards = [self.shard_for(conditions[shard_key])] if shard_key in conditions else self.shards
+        results = self._gather(lambda db: db.execute(query).scalars().all(), shards)
+
+        merged = heapq.merge(*results, key=_merge_key(order_by), reverse=descending)
+        stop = skip + limit if limit is not None else None
+        return list(itertools.islice(merged, skip, stop))
+
+    def get_all(self, model, skip: int = 0, limit: Optional[int] = 100, order_by: str = 'id',
+                descending: bool = False) -> List[Any]:
+        """
+        并发查询所有分片并按排序列归并
+
+        Args:
+            model: 模型类
+            skip: 跳过的记录数
+            limit: 返回的记录数，为None时返回全部
+            order_by: 排序列，相同值按id排序
+            descending: 是否降序
+
+        Returns:
+            模型实例列表（已脱离会话）
+        """
+        return self._scatter(model, {}, order_by, descending, skip, limit)
+
+    def filter(self, model, order_by: str = 'id', descending: bool = False, skip: int = 0,
+               limit: Optional[int] = None, **kwargs) -> List[Any]:
+        """
+        根据条件过滤记录
+
+        条件中包含分片键时只查询一个分片，否则并发查询所有分片并归并
+
+        Args:
+            model: 模型类
+            order_by: 排序列
+            descending: 是否降序
+            skip: 跳过的记录数
+            limit: 返回的记录数，为None时返回全部
+            **kwargs: 过滤条件
+
+        Returns:
+            模型实例列表（已脱离会话）
+        """
+        return self._scatter(model, kwargs, order_by, descending, skip, limit)
@@ -0,0 +1,109 @@
+# src/dtypes.py
+"""
+DataFrame列类型规划
+根据Pydantic模型声明的约束为各列选择更紧凑的dtype，降低内存占用
+"""
+
+from typing import Dict, Optional, Sequence, Tuple, Type
+
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel
+
+from src.models import UserData
+from src.validation import compile_rules
+
+# 取值重复度高、适合以category存储的字符串字段
+CATEGORICAL_FIELDS = ('city',)
+
+
+def _pyarrow_string_dtype():
+    """pyarrow可用时返回pyarrow支持的字符串类型，否则返回None"""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return None
+    return pd.StringDtype('pyarrow')
+
+
+def _smallest_int_dtype(low, high) -> Optional[np.dtype]:
+    """能容纳[low, high]区间的最小整数类型"""
+    if low is None or high is None:
+        return None
+    candidates = (np.uint8, np.uint16, np.uint32, np.uint64) if low >= 0 else (np.int8, np.int16, np.int32, np.int64)
+    for candidate in candidates:
+        info = np.iinfo(candidate)
+        if info.min <= low and high <= info.max:
+            return np.dtype(candidate)
+    return None
+
+
+def plan_dtypes(model: Type[BaseModel] = UserData,
+                categorical: Sequence[str] = CATEGORICAL_FIELDS) -> Dict[str, object]:
+    """
+    根据模型约束规划各列的dtype
+
+    整数字段按ge/gt/le/lt边界选择最小的整数类型（如age: 0~150 -> uint8），
+    categorical中的字符串字段使用category，其余字符串字段在pyarrow可用时
+    使用pyarrow字符串类型。
+
+    Args:
+        model: 声明约束的Pydantic模型类
+        categorical: 使用category存储的字段
+
+    Returns:
+        {列名: dtype}
+    """
+    string_dtype = _pyarrow_string_dtype()
+    plan: Dict[str, object] = {}
+    for rule in compile_rules(model):
+        if rule.kind == 'int':
+            low = rule.ge if rule.ge is not None else (rule.gt + 1 if rule.gt is not None else None)
+            high = rule.le if rule.le is not None else (rule.lt - 1 if rule.lt is not None else None)
+            dtype = _smallest_int_dtype(low, high)
+            if dtype is not None:
+                plan[rule.name] = dtype
+        elif rule.name in categorical:
+            plan[rule.name] = 'category'
+        elif string_dtype is not None:
+            plan[rule.name] = string_dtype
+    return plan
+
+
+def parse_dtypes(plan: Dict[str, object]) -> Dict[str, object]:
+    """
+    规划中可以在解析时直接使用的部分
+
+    字符串与category类型对任意文本都成立，可以交给read_csv直接解析；
+    整数类型需要等校验通过后再转换，避免越界或非法值在解析阶段报错。
+    """
+    return {name: dtype for name, dtype in plan.items() if not _is_integer_dtype(dtype)}
+
+
+def _is_integer_dtype(dtype) -> bool:
+    return isinstance(dtype, np.dtype) and np.issubdtype(dtype, np.integer)
+
+
+def frame_memory(df: pd.DataFrame) -> int:
+    """DataFrame占用的内存字节数（包含对象内容）"""
+    return int(df.memory_usage(deep=True).sum())
+
+
+def compact_frame(df: pd.DataFrame, plan: Optional[Dict[str, object]] = None) -> Tuple[pd.DataFrame, int, int]:
+    """
+    按规划转换已校验数据的列类型
+
+    Args:
+        df: 已通过校验的数据
+        plan: dtype规划，默认为plan_dtypes()
+
+    Returns:
+        (转换后的DataFrame, 转换前字节数, 转换后字节数)
+    """
+    plan = plan_dtypes() if plan is None else plan
+    before = frame_memory(df)
+    casts = {name: dtype for name, dtype in plan.items()
+             if name in df.columns and df[name].dtype != dtype}
+    if casts:
+        df = df.astype(casts)
+    return df, before, frame_memory(df)
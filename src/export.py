@@ -0,0 +1,193 @@
+# src/export.py
+"""
+数据导出
+从DatabaseManager管理的数据库中分批流式读取表数据并逐批写入CSV、Parquet、
+Feather或NDJSON文件，内存占用只与批大小有关
+"""
+
+import os
+import re
+import time
+from datetime import date, datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from loguru import logger
+from sqlalchemy import MetaData, Table, select
+
+from src.db import database
+from src.db.database import DatabaseManager
+from src.db.serializer import serializer_for
+from src.ingest import resolve_model
+from src.io_formats import EXPORT_FORMATS, FrameWriter, NdjsonAppendWriter, detect_format, open_writer
+
+# 默认每批读取和写入的行数
+DEFAULT_BATCH_SIZE = 10000
+
+_NDJSON_EXTENSIONS = ('.ndjson', '.jsonl')
+
+_FILTER = re.compile(r'^\s*(\w+)\s*(>=|<=|!=|=|>|<)\s*(.*?)\s*$')
+
+_OPERATORS = {
+    '=': lambda column, value: column.is_(None) if value is None else column == value,
+    '!=': lambda column, value: column.isnot(None) if value is None else column != value,
+    '>': lambda column, value: column > value,
+    '>=': lambda column, value: column >= value,
+    '<': lambda column, value: column < value,
+    '<=': lambda column, value: column <= value,
+}
+
+
+def detect_export_format(path, fmt: Optional[str] = None) -> str:
+    """
+    确定导出格式，.ndjson/.jsonl扩展名识别为ndjson，其余见io_formats.detect_format
+
+    Args:
+        path: 输出文件路径
+        fmt: 显式指定的格式
+
+    Returns:
+        str: EXPORT_FORMATS中的一项
+    """
+    if fmt is not None and fmt.lower() == 'ndjson':
+        return 'ndjson'
+    if fmt is None and os.path.splitext(str(path))[1].lower() in _NDJSON_EXTENSIONS:
+        return 'ndjson'
+    return detect_format(path, fmt)
+
+
+def resolve_table(manager: DatabaseManager, db_name: str, name: str) -> Table:
+    """
+    查找要导出的表：优先使用模型（表名或模型类名），否则从数据库反射表结构
+
+    Args:
+        manager: 数据库管理器
+        db_name: 数据库名称
+        name: 表名或模型类名
+
+    Returns:
+        Table
+    """
+    try:
+        return resolve_model(name).__table__
+    except ValueError:
+        pass
+    try:
+        return Table(name, MetaData(), autoload_with=manager.get_engine(db_name))
+    except Exception:
+        raise ValueError(f"数据库 '{db_name}' 中没有表: {name}")
+
+
+def _coerce(column, raw: str) -> Any:
+    """按列类型转换过滤条件中的值，null表示NULL"""
+    if raw.lower() == 'null':
+        return None
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return raw
+    if python_type is bool:
+        return raw.lower() in ('1', 'true', 'yes', 'on')
+    if python_type in (datetime, date):
+        return python_type.fromisoformat(raw)
+    if python_type in (int, float):
+        return python_type(raw)
+    return raw
+
+
+def parse_filters(expressions: Sequence[str], table: Table) -> List[Any]:
+    """
+    解析过滤条件
+
+    每个条件形如 列名<运算符>值，运算符为 = != > >= < <=，
+    值按列类型转换，null表示NULL，例如 age>=18、name=Alice、email=null
+
+    Args:
+        expressions: 过滤条件
+        table: 导出的表
+
+    Returns:
+        SQL条件列表
+    """
+    clauses = []
+    for expression in expressions:
+        match = _FILTER.match(expression)
+        if match is None:
+            raise ValueError(f"无效的过滤条件: {expression}")
+        name, operator, raw = match.groups()
+        if name not in table.c:
+            raise ValueError(f"表 {table.name} 没有字段: {name}")
+        column = table.c[name]
+        value = _coerce(column, raw)
+        if value is None and operator not in ('=', '!='):
+            raise ValueError(f"null只能用于=或!=: {expression}")
+        clauses.append(_OPERATORS[operator](column, value))
+    return clauses
+
+
+def _open_export_writer(path, fmt: str, schema=None) -> FrameWriter:
+    if fmt == 'ndjson':
+        return NdjsonAppendWriter(path)
+    return open_writer(path, fmt, schema)
+
+
+def export_table(output_path, db_name: str = 'default', table: str = 'users',
+                 where: Optional[Sequence[str]] = None, fields: Optional[Sequence[str]] = None,
+                 output_format: Optional[str] = None, batch_size: int = DEFAULT_BATCH_SIZE,
+                 manager: Optional[DatabaseManager] = None) -> Tuple[int, float]:
+    """
+    分批导出数据库表
+
+    查询以stream_results流式执行，每批结果不经过ORM直接序列化后写出：CSV/NDJSON
+    经由DataFrame，Parquet/Feather直接转换为Arrow表，表结构由列类型决定，
+    与各批数据（如某列在第一批中全为NULL）无关；
+    配置了只读副本时查询在副本上执行。数据先写入同目录下的.tmp文件，
+    完成后替换目标文件，失败时不会留下不完整的输出。
+
+    Args:
+        output_path: 输出文件路径
+        db_name: 数据库名称
+        table: 表名或模型类名
+        where: 过滤条件，见parse_filters
+        fields: 导出的列，为None时导出所有列（主键在前）
+        output_format: 输出格式，为None时按扩展名识别
+        batch_size: 每批读取和写入的行数
+        manager: 数据库管理器，默认使用全局的db_manager
+
+    Returns:
+        (导出的行数, 耗时秒数)
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size必须大于0")
+    manager = manager or database.db_manager
+    fmt = detect_export_format(output_path, output_format)
+    source = resolve_table(manager, db_name, table)
+    serializer = serializer_for(source, fields)
+    query = (select(*[source.c[name] for name in serializer.fields])
+             .where(*parse_filters(where or (), source))
+             .order_by(*source.primary_key.columns))
+
+    if fmt in ('parquet', 'feather'):
+        schema, convert = serializer.arrow_schema(), serializer.to_arrow
+    else:
+        schema, convert = None, serializer.to_dataframe
+
+    temp_path = f"{output_path}.tmp"
+    start = time.perf_counter()
+    rows = 0
+    try:
+        with manager.get_db_session(db_name) as db, _open_export_writer(temp_path, fmt, schema) as writer:
+            result = db.execute(query, execution_options={'stream_results': True, 'yield_per': batch_size})
+            for batch in result.partitions():
+                writer.write(convert(batch))
+                rows += len(batch)
+                elapsed = time.perf_counter() - start
+                logger.info(f"已导出 {rows} 行，{rows / elapsed if elapsed else 0:.0f} 行/秒")
+            if rows == 0:
+                # 没有数据时也写出表头/表结构
+                writer.write(convert([]))
+        os.replace(temp_path, output_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return rows, time.perf_counter() - start
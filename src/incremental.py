@@ -0,0 +1,225 @@
+# src/incremental.py
+"""
+增量处理
+针对只追加写入的CSV输入，在输出文件旁保存水位线，后续运行只处理新追加的行
+"""
+
+import csv
+import hashlib
+import io
+import json
+import os
+from datetime import datetime
+from typing import Optional, Sequence, Tuple
+
+import pandas as pd
+from loguru import logger
+
+from src.data_processor import ON_ERROR_CHOICES, default_reject_path, read_dtypes, run_pipeline
+from src.io_formats import CsvAppendWriter, detect_format
+
+WATERMARK_SUFFIX = '.watermark.json'
+WATERMARK_VERSION = 1
+
+# 计算前缀哈希时每次读取的字节数
+_HASH_BLOCK = 1024 * 1024
+
+
+def watermark_path(output_path) -> str:
+    """水位线文件路径（与输出文件同目录）"""
+    return f"{output_path}{WATERMARK_SUFFIX}"
+
+
+def load_watermark(output_path) -> Optional[dict]:
+    """读取水位线，不存在或无法解析时返回None"""
+    path = watermark_path(output_path)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"水位线文件无法读取，将全量重建: {e}")
+        return None
+    return state if state.get('version') == WATERMARK_VERSION else None
+
+
+def save_watermark(output_path, state: dict):
+    """原子地写入水位线"""
+    path = watermark_path(output_path)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _hash_range(f, start: int, end: int, digest):
+    """将文件[start, end)范围的内容追加到哈希对象"""
+    f.seek(start)
+    remaining = end - start
+    while remaining > 0:
+        block = f.read(min(_HASH_BLOCK, remaining))
+        if not block:
+            break
+        digest.update(block)
+        remaining -= len(block)
+
+
+class _RangeReader(io.RawIOBase):
+    """只读取文件[start, end)范围的只读流，供pandas按块解析"""
+
+    def __init__(self, f, start: int, end: int):
+        self._f = f
+        self._f.seek(start)
+        self._remaining = end - start
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        size = min(len(buffer), self._remaining)
+        if size <= 0:
+            return 0
+        data = self._f.read(size)
+        buffer[:len(data)] = data
+        self._remaining -= len(data)
+        return len(data)
+
+
+def _resolve_start(f, state: Optional[dict], header: bytes, size: int,
+                   columns: Optional[Sequence[str]], digest) -> Tuple[Optional[int], str]:
+    """
+    根据水位线确定本次处理的起始偏移，校验通过时digest已包含已处理前缀
+
+    Returns:
+        (起始偏移, 原因)。起始偏移为None表示需要全量重建
+    """
+    if state is None:
+        return None, "没有水位线"
+    if state.get('columns') != (list(columns) if columns else None):
+        return None, "列投影已变化"
+    if state.get('header_hash') != hashlib.sha256(header).hexdigest():
+        return None, "表头已变化"
+
+    offset = state['byte_offset']
+    if size < offset:
+        return None, "输入文件被截断"
+    _hash_range(f, 0, offset, digest)
+    if digest.copy().hexdigest() != state['prefix_hash']:
+        return None, "已处理部分的内容已变化"
+
+    if not state.get('ends_with_newline', True) and size > offset:
+        # 上次的最后一行没有换行符：新内容必须以换行开头，否则说明最后一行被续写了
+        f.seek(offset)
+        lead = f.read(2)
+        if lead.startswith(b'\r\n'):
+            return offset + 2, "增量"
+        if lead.startswith(b'\n'):
+            return offset + 1, "增量"
+        return None, "最后一行已被修改"
+    return offset, "增量"
+
+
+def process_incremental(input_path, output_path, chunksize: Optional[int] = None,
+                        columns: Optional[Sequence[str]] = None, on_error: str = 'raise',
+                        reject_path: Optional[str] = None, compact: bool = False) -> Tuple[int, bool]:
+    """
+    增量处理只追加写入的CSV文件
+
+    水位线记录已处理的字节偏移、行数、表头哈希和已处理前缀的哈希。
+    前缀未变化时只校验、处理新追加的行并追加到输出文件；
+    前缀、表头或列投影变化时回退为全量重建。
+
+    Args:
+        input_path: 输入CSV文件路径
+        output_path: 输出CSV文件路径
+        chunksize: 分块行数，为None时一次性处理新增部分
+        columns: 只读取的列（列投影）
+        on_error: 'raise'或'quarantine'，见process_file；隔离文件随输出一起追加或重建
+        reject_path: 隔离文件路径，默认为"<输出文件>.rejects.csv"
+        compact: 是否使用紧凑dtype，见process_file
+
+    Returns:
+        (本次写入的行数, 是否进行了全量重建)
+    """
+    if detect_format(input_path) != 'csv' or detect_format(output_path) != 'csv':
+        raise ValueError("增量处理只支持CSV输入和输出")
+    if on_error not in ON_ERROR_CHOICES:
+        raise ValueError(f"不支持的on_error取值: {on_error}")
+
+    columns = list(columns) if columns else None
+    state = load_watermark(output_path)
+    size = os.path.getsize(input_path)
+
+    with open(input_path, 'rb') as f:
+        header = f.readline()
+        digest = hashlib.sha256()
+        start, reason = _resolve_start(f, state, header, size, columns, digest)
+        if start is not None and not os.path.exists(output_path):
+            start, reason = None, "输出文件不存在"
+
+        rebuild = start is None
+        if rebuild:
+            logger.info(f"增量处理回退为全量重建: {reason}")
+            if os.path.exists(watermark_path(output_path)):
+                os.remove(watermark_path(output_path))
+            start, row_count = len(header), 0
+            digest, hashed = hashlib.sha256(), 0
+        else:
+            row_count, hashed = state['row_count'], state['byte_offset']
+
+        names = next(csv.reader([header.decode('utf-8-sig')]))
+        reader = io.BufferedReader(_RangeReader(f, start, size))
+        frames = pd.read_csv(reader, header=None, names=names, usecols=columns,
+                             chunksize=chunksize or None, dtype=read_dtypes(compact, names))
+        if chunksize is None:
+            frames = [frames]
+
+        # 追加失败时截断回原长度，避免输出中出现水位线之外的行
+        original_size = 0 if rebuild else os.path.getsize(output_path)
+        processed_at = datetime.now()
+        writer = CsvAppendWriter(output_path, append=not rebuild)
+        rejects = None
+        if on_error == 'quarantine':
+            reject_path = reject_path or default_reject_path(output_path)
+            if rebuild and os.path.exists(reject_path):
+                os.remove(reject_path)
+            rejects = CsvAppendWriter(reject_path, append=os.path.exists(reject_path))
+            original_reject_size = os.path.getsize(reject_path) if rejects.append else 0
+        seen = 0
+        try:
+            with writer:
+                for frame in frames:
+                    frame.index = pd.RangeIndex(row_count + seen, row_count + seen + len(frame))
+                    seen += len(frame)
+                    writer.write(run_pipeline(frame, processed_at=processed_at, rejects=rejects, compact=compact))
+        except Exception as e:
+            if not rebuild:
+                with open(output_path, 'r+b') as out:
+                    out.truncate(original_size)
+                if rejects is not None and rejects.append:
+                    rejects.close()
+                    with open(reject_path, 'r+b') as out:
+                        out.truncate(original_reject_size)
+            raise Exception(f"加载数据失败: {str(e)}")
+        finally:
+            if rejects is not None:
+                rejects.close()
+        if rejects is not None:
+            logger.info(f"增量处理完成: 有效 {writer.rows} 行, 隔离 {rejects.rows} 行"
+                        + (f", 隔离文件: {reject_path}" if rejects.rows else ""))
+
+        _hash_range(f, hashed, size, digest)
+        f.seek(max(size - 1, 0))
+        ends_with_newline = size == 0 or f.read(1) == b'\n'
+
+    save_watermark(output_path, {
+        'version': WATERMARK_VERSION,
+        'byte_offset': size,
+        'row_count': row_count + seen,
+        'header_hash': hashlib.sha256(header).hexdigest(),
+        'prefix_hash': digest.hexdigest(),
+        'ends_with_newline': ends_with_newline,
+        'columns': columns,
+    })
+    return writer.rows, rebuild
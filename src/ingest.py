@@ -0,0 +1,141 @@
+# src/ingest.py
+"""
+数据入库
+将process-data流水线校验、处理后的数据分块写入DatabaseManager管理的数据库，
+每块一个事务，并在目标库的检查点表中记录进度，失败后可从最后提交的块继续
+"""
+
+import os
+from datetime import datetime
+from typing import Optional, Sequence, Tuple
+
+from loguru import logger
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, select, update
+
+from src.data_processor import read_dtypes, run_pipeline
+from src.db import database
+from src.db.database import Base, DatabaseManager
+from src.io_formats import iter_frames
+
+# 默认每块（每个事务）的行数
+DEFAULT_CHUNKSIZE = 10000
+
+# 检查点表不属于业务模型，使用独立的MetaData，只在入库时创建
+_metadata = MetaData()
+
+checkpoints = Table(
+    'ingest_checkpoints', _metadata,
+    Column('source', String(500), primary_key=True),
+    Column('target', String(100), primary_key=True),
+    Column('rows_done', Integer, nullable=False),
+    Column('chunks_done', Integer, nullable=False),
+    Column('updated_at', DateTime, nullable=False),
+)
+
+
+def resolve_model(table: str):
+    """
+    根据表名或模型类名查找ORM模型
+
+    Args:
+        table: 表名（如users）或模型类名（如User）
+
+    Returns:
+        对应的模型类
+    """
+    # 导入示例模型，使其注册到Base
+    import src.db.example_models  # noqa: F401
+    for mapper in Base.registry.mappers:
+        if table in (getattr(mapper.class_, '__tablename__', None), mapper.class_.__name__):
+            return mapper.class_
+    raise ValueError(f"未找到表对应的模型: {table}")
+
+
+def load_checkpoint(manager: DatabaseManager, db_name: str, source: str, table: str) -> Optional[dict]:
+    """读取检查点，不存在时返回None"""
+    engine = manager.get_engine(db_name)
+    _metadata.create_all(bind=engine)
+    with engine.connect() as conn:
+        row = conn.execute(select(checkpoints).where(
+            checkpoints.c.source == source, checkpoints.c.target == table)).mappings().first()
+    return dict(row) if row is not None else None
+
+
+def _save_checkpoint(db, source: str, table: str, rows_done: int, chunks_done: int, exists: bool):
+    values = {'rows_done': rows_done, 'chunks_done': chunks_done, 'updated_at': datetime.utcnow()}
+    if exists:
+        db.execute(update(checkpoints).where(
+            checkpoints.c.source == source, checkpoints.c.target == table).values(**values))
+    else:
+        db.execute(checkpoints.insert().values(source=source, target=table, **values))
+
+
+def ingest_file(input_path, db_name: str = 'default', table: str = 'users',
+                chunksize: int = DEFAULT_CHUNKSIZE, input_format: Optional[str] = None,
+                columns: Optional[Sequence[str]] = None, restart: bool = False,
+                manager: Optional[DatabaseManager] = None) -> Tuple[int, int]:
+    """
+    将输入文件校验、处理后分块写入数据库表
+
+    每块数据与检查点更新在同一事务中提交。再次运行时跳过检查点中已提交的行，
+    因此失败后重新运行会从最后提交的块之后继续，只追加写入的输入文件也只写入新行。
+    续传假设已提交部分的输入内容未被修改。
+
+    Args:
+        input_path: 输入文件路径
+        db_name: 目标数据库名称
+        table: 目标表名
+        chunksize: 每块（每个事务）的行数
+        input_format: 输入文件格式，为None时按扩展名识别
+        columns: 只读取的列（列投影）
+        restart: 是否忽略检查点从头写入（已写入的数据不会被删除）
+        manager: 数据库管理器，默认使用全局的db_manager
+
+    Returns:
+        (本次写入的行数, 续传时跳过的行数)
+    """
+    manager = manager or database.db_manager
+    model = resolve_model(table)
+    source = os.path.abspath(input_path)
+    manager.ensure_tables(db_name)
+
+    checkpoint = load_checkpoint(manager, db_name, source, table)
+    exists = checkpoint is not None
+    rows_done = checkpoint['rows_done'] if exists and not restart else 0
+    chunks_done = checkpoint['chunks_done'] if exists and not restart else 0
+    resumed_from = rows_done
+    if rows_done:
+        logger.info(f"从检查点继续入库: 已提交 {rows_done} 行（{chunks_done} 块）")
+
+    table_columns = set(model.__table__.c.keys())
+    processed_at = datetime.now()
+    inserted = 0
+    ignored_logged = False
+    for chunk in iter_frames(input_path, chunksize, fmt=input_format, columns=columns, dtype=read_dtypes()):
+        # 索引为整个文件内的行号，跳过已提交的行
+        if len(chunk) and chunk.index[0] < rows_done:
+            chunk = chunk[chunk.index >= rows_done]
+        if chunk.empty:
+            continue
+        end = int(chunk.index[-1]) + 1
+        frame = run_pipeline(chunk, processed_at=processed_at, validated_values=True)
+        keep = [name for name in frame.columns if name in table_columns]
+        if not keep:
+            raise ValueError(f"输入数据与表 {table} 没有相同的列")
+        if not ignored_logged:
+            ignored = [name for name in frame.columns if name not in table_columns]
+            if ignored:
+                logger.info(f"表 {table} 中没有以下列，入库时忽略: {', '.join(ignored)}")
+            ignored_logged = True
+
+        with manager.get_db_session(db_name) as db:
+            model.bulk_create(db, frame[keep], batch_size=max(len(frame), 1))
+            _save_checkpoint(db, source, table, end, chunks_done + 1, exists)
+            db.commit()
+        exists = True
+        rows_done = end
+        chunks_done += 1
+        inserted += len(frame)
+        logger.info(f"已提交第 {chunks_done} 块，累计 {rows_done} 行")
+
+    return inserted, resumed_from
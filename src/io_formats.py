@@ -0,0 +1,349 @@
+# src/io_formats.py
+"""
+数据文件格式读写
+支持CSV以及列式格式Parquet/Feather，按扩展名自动识别格式
+"""
+
+import os
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import pandas as pd
+
+# 支持的文件格式
+FORMATS = ('csv', 'parquet', 'feather')
+
+# 数据库导出支持的格式：另有只写的NDJSON，见NdjsonAppendWriter
+EXPORT_FORMATS = FORMATS + ('ndjson',)
+
+# 扩展名到格式的映射
+EXTENSION_FORMATS = {
+    '.csv': 'csv',
+    '.parquet': 'parquet',
+    '.pq': 'parquet',
+    '.feather': 'feather',
+    '.arrow': 'feather',
+}
+
+
+def _require_pyarrow():
+    """导入pyarrow，未安装时给出明确提示"""
+    try:
+        import pyarrow
+        return pyarrow
+    except ImportError:
+        raise ImportError("读写Parquet/Feather格式需要安装pyarrow: pip install pyarrow")
+
+
+def detect_format(path, fmt: Optional[str] = None) -> str:
+    """
+    确定文件格式
+
+    Args:
+        path: 文件路径
+        fmt: 显式指定的格式，为None时按扩展名识别
+
+    Returns:
+        str: 'csv'、'parquet'或'feather'
+    """
+    if fmt is not None:
+        fmt = fmt.lower()
+        if fmt not in FORMATS:
+            raise ValueError(f"不支持的文件格式: {fmt}")
+        return fmt
+    ext = os.path.splitext(str(path))[1].lower()
+    return EXTENSION_FORMATS.get(ext, 'csv')
+
+
+def _apply_dtype(df: pd.DataFrame, dtype: Optional[Dict[str, object]]) -> pd.DataFrame:
+    """对列式格式读取的数据应用dtype（CSV在解析时直接应用）"""
+    if not dtype:
+        return df
+    casts = {name: value for name, value in dtype.items() if name in df.columns}
+    return df.astype(casts) if casts else df
+
+
+def read_frame(path, fmt: Optional[str] = None, columns: Optional[Sequence[str]] = None,
+               dtype: Optional[Dict[str, object]] = None) -> pd.DataFrame:
+    """
+    读取整个文件
+
+    Args:
+        path: 文件路径
+        fmt: 文件格式，为None时按扩展名识别
+        columns: 只读取的列（列投影），为None时读取全部列
+        dtype: 各列的dtype，见src.dtypes.parse_dtypes
+
+    Returns:
+        DataFrame
+    """
+    fmt = detect_format(path, fmt)
+    columns = list(columns) if columns else None
+    if fmt == 'csv':
+        return pd.read_csv(path, usecols=columns, dtype=dtype)
+    _require_pyarrow()
+    if fmt == 'parquet':
+        return _apply_dtype(pd.read_parquet(path, columns=columns), dtype)
+    return _apply_dtype(pd.read_feather(path, columns=columns), dtype)
+
+
+def iter_frames(path, chunksize: int, fmt: Optional[str] = None,
+                columns: Optional[Sequence[str]] = None,
+                dtype: Optional[Dict[str, object]] = None) -> Iterator[pd.DataFrame]:
+    """
+    分块读取文件，内存占用只与块大小有关
+
+    Args:
+        path: 文件路径
+        chunksize: 每块的行数
+        fmt: 文件格式，为None时按扩展名识别
+        columns: 只读取的列（列投影）
+        dtype: 各列的dtype，见src.dtypes.parse_dtypes
+
+    Yields:
+        数据块，索引延续整个文件的行号；空文件时产出一个只有列名的空块
+    """
+    fmt = detect_format(path, fmt)
+    columns = list(columns) if columns else None
+    if fmt == 'csv':
+        yield from pd.read_csv(path, chunksize=chunksize, usecols=columns, dtype=dtype)
+        return
+
+    pa = _require_pyarrow()
+    if fmt == 'parquet':
+        import pyarrow.parquet as pq
+        parquet_file = pq.ParquetFile(path)
+        batches = parquet_file.iter_batches(batch_size=chunksize, columns=columns)
+        schema = parquet_file.schema_arrow
+    else:
+        reader = pa.ipc.open_file(pa.memory_map(str(path), 'r'))
+        schema = reader.schema
+        batches = _iter_ipc_batches(reader, chunksize, columns)
+
+    offset = 0
+    for batch in batches:
+        chunk = _apply_dtype(batch.to_pandas(), dtype)
+        chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+        offset += len(chunk)
+        yield chunk
+    if offset == 0:
+        empty = schema.empty_table()
+        yield _apply_dtype((empty.select(columns) if columns else empty).to_pandas(), dtype)
+
+
+def _iter_ipc_batches(reader, chunksize: int, columns: Optional[List[str]]):
+    """按chunksize切分Feather(Arrow IPC)文件中的记录批"""
+    for i in range(reader.num_record_batches):
+        batch = reader.get_batch(i)
+        if columns:
+            batch = batch.select(columns)
+        for start in range(0, batch.num_rows, chunksize):
+            yield batch.slice(start, chunksize)
+
+
+def write_frame(df: pd.DataFrame, path, fmt: Optional[str] = None):
+    """
+    写出整个DataFrame
+
+    Args:
+        df: 数据
+        path: 输出文件路径
+        fmt: 文件格式，为None时按扩展名识别
+    """
+    fmt = detect_format(path, fmt)
+    if fmt == 'csv':
+        df.to_csv(path, index=False)
+        return
+    _require_pyarrow()
+    if fmt == 'parquet':
+        df.to_parquet(path, index=False)
+    else:
+        df.reset_index(drop=True).to_feather(path)
+
+
+class FrameWriter:
+    """分块写入器基类，子类实现_write_chunk"""
+
+    def __init__(self, output_path):
+        self.output_path = output_path
+        self.rows = 0
+
+    def write(self, df: pd.DataFrame):
+        """写入一个数据块"""
+        self._write_chunk(df)
+        self.rows += len(df)
+
+    def _write_chunk(self, df: pd.DataFrame):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class CsvAppendWriter(FrameWriter):
+    """追加写入CSV的写入器，只在第一块写入表头"""
+
+    def __init__(self, output_path, append: bool = False):
+        """
+        Args:
+            output_path: 输出文件路径
+            append: 是否追加到已有文件末尾（不再写表头）
+        """
+        super().__init__(output_path)
+        self.append = append
+        self._file = None
+
+    def _write_chunk(self, df):
+        header = self._file is None and not self.append
+        if self._file is None:
+            # 与DataFrame.to_csv(path)一致：utf-8编码，不做换行符转换
+            mode = 'a' if self.append else 'w'
+            self._file = open(self.output_path, mode, encoding='utf-8', newline='')
+        df.to_csv(self._file, header=header, index=False)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class NdjsonAppendWriter(FrameWriter):
+    """逐块写入NDJSON（每行一个JSON对象）的写入器，日期时间为ISO格式"""
+
+    def __init__(self, output_path):
+        super().__init__(output_path)
+        self._file = None
+
+    def _write_chunk(self, df):
+        if self._file is None:
+            self._file = open(self.output_path, 'w', encoding='utf-8', newline='')
+        if len(df):
+            df.to_json(self._file, orient='records', lines=True, date_format='iso', date_unit='us',
+                       force_ascii=False)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class ArrowAppendWriter(FrameWriter):
+    """
+    逐块写入Parquet或Feather文件
+
+    每块可以是DataFrame或pyarrow.Table。未指定schema时表结构取自第一块，
+    其中全为空的字符串列（推断为null类型）按字符串列写出；
+    之后的块按该表结构转换，全为空的列写为对应类型的空值。
+
+    每块的category列带有各自的字典。Feather(Arrow IPC)文件中一个字段只能有一个字典，
+    因此写Feather时把各块的字典合并为一个逐块追加的字典，以增量字典写出。
+    """
+
+    def __init__(self, output_path, fmt: str, schema=None):
+        """
+        Args:
+            output_path: 输出文件路径
+            fmt: 'parquet'或'feather'
+            schema: 文件的pyarrow表结构，为None时由第一块推断
+        """
+        super().__init__(output_path)
+        self.fmt = fmt
+        self._pa = _require_pyarrow()
+        self._writer = None
+        self._schema = schema
+        # Feather中各字典列已写出的字典值：(值列表, {值: 位置})
+        self._dictionaries: Dict[str, tuple] = {}
+
+    def _first_schema(self, table):
+        pa = self._pa
+        fields = []
+        for field in table.schema:
+            if pa.types.is_null(field.type):
+                field = field.with_type(pa.large_string())
+            elif self.fmt == 'feather' and pa.types.is_dictionary(field.type):
+                # 合并后的字典可能超出第一块的索引类型（pandas按类别数选择int8等）
+                field = field.with_type(pa.dictionary(pa.int32(), field.type.value_type, field.type.ordered))
+            fields.append(field)
+        return pa.schema(fields, metadata=table.schema.metadata)
+
+    def _unify_dictionaries(self, table):
+        """将各字典列转换为共用的累积字典，新出现的值追加在末尾"""
+        pa = self._pa
+        import pyarrow.compute as pc
+        columns = []
+        for field, column in zip(self._schema, table.columns):
+            if pa.types.is_dictionary(field.type):
+                values, positions = self._dictionaries.setdefault(field.name, ([], {}))
+                for chunk in column.chunks:
+                    for value in chunk.dictionary.to_pylist():
+                        if value not in positions:
+                            positions[value] = len(values)
+                            values.append(value)
+                dictionary = pa.array(values, type=field.type.value_type)
+                indices = pc.index_in(column.cast(field.type.value_type), value_set=dictionary)
+                column = pa.DictionaryArray.from_arrays(indices.cast(field.type.index_type), dictionary)
+            columns.append(column)
+        return pa.Table.from_arrays(columns, schema=self._schema)
+
+    def _to_table(self, df):
+        pa = self._pa
+        if isinstance(df, pa.Table):
+            # 已经是Arrow表（如ModelSerializer.to_arrow的结果）
+            if self._schema is None:
+                self._schema = df.schema
+            return df if df.schema.equals(self._schema) else df.cast(self._schema)
+        if self._schema is None:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            self._schema = self._first_schema(table)
+            return table.cast(self._schema)
+        try:
+            return pa.Table.from_pandas(df, schema=self._schema, preserve_index=False)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # 某列在本块中全为空时pandas推断的类型与表结构不同（如float64），按表结构写出空值
+            arrays = [pa.nulls(len(df), field.type) if df[field.name].isna().all()
+                      else pa.Array.from_pandas(df[field.name], type=field.type)
+                      for field in self._schema]
+            return pa.Table.from_arrays(arrays, schema=self._schema)
+
+    def _write_chunk(self, df):
+        pa = self._pa
+        table = self._to_table(df)
+        if self.fmt == 'feather' and any(pa.types.is_dictionary(field.type) for field in self._schema):
+            table = self._unify_dictionaries(table)
+        if self._writer is None:
+            if self.fmt == 'parquet':
+                import pyarrow.parquet as pq
+                self._writer = pq.ParquetWriter(self.output_path, self._schema)
+            else:
+                compression = 'lz4' if pa.Codec.is_available('lz4') else None
+                options = pa.ipc.IpcWriteOptions(compression=compression, emit_dictionary_deltas=True)
+                self._writer = pa.ipc.new_file(self.output_path, self._schema, options=options)
+        self._writer.write_table(table)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+def open_writer(path, fmt: Optional[str] = None, schema=None) -> FrameWriter:
+    """
+    根据格式创建分块写入器
+
+    Args:
+        path: 输出文件路径
+        fmt: 文件格式，为None时按扩展名识别
+        schema: Parquet/Feather文件的pyarrow表结构，为None时由第一块推断，见ArrowAppendWriter
+
+    Returns:
+        FrameWriter
+    """
+    fmt = detect_format(path, fmt)
+    if fmt == 'csv':
+        return CsvAppendWriter(path)
+    return ArrowAppendWriter(path, fmt, schema)
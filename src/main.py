@@ -1,7 +1,9 @@
 #!/usr/bin/env python3
 import sys
 import os
+import json
 import logging
+from datetime import datetime
 from pathlib import Path
 import click
 
@@ -14,20 +16,60 @@ sys.path.insert(0, str(PROJECT_ROOT))
 
 from src.config.settings import settings
 from src.config.logging_config import setup_logger
-from src.data_processor import load_data, process_data
+from src.data_processor import ON_ERROR_CHOICES, process_file
+from src.io_formats import EXPORT_FORMATS, FORMATS, detect_format
+from src.incremental import process_incremental
+from src.result_cache import ResultCache, run_cached
+from src.benchmark import DEFAULT_SIZES, compare_results, load_results, run_benchmark, save_results
 
 @click.group()
-def cli():
+@click.option('--db-stats', is_flag=True, default=False,
+              help='命令结束后输出本次执行的SQL统计（按归一化SQL汇总的次数、耗时分位数和每会话语句数）')
+@click.pass_context
+def cli(ctx, db_stats):
     """项目命令行接口"""
     setup_logger()
     logging.info(f"Application started: {settings.APP_NAME}")
     logging.info(f"Environment: {settings.APP_ENV}")
+    if db_stats:
+        ctx.call_on_close(_echo_db_stats)
+
+def _echo_db_stats():
+    """输出本次执行的SQL统计（数据库模块只在需要时导入，不拖慢其他命令的启动）"""
+    from src.db import database
+    from src.db.instrumentation import format_stats
+    click.echo(format_stats(database.db_manager.stats()), err=True)
 
 @cli.command(name='process-data')
 @click.option('--input', default=settings.DATA_FILE_PATH, help='输入数据文件路径')
 @click.option('--output', default='data/output.csv', help='输出文件路径')
-def process_data_cmd(input, output):
+@click.option('--chunksize', type=click.IntRange(min=1), default=None,
+              help='流式处理的分块行数，指定后内存占用与文件大小无关')
+@click.option('--workers', type=click.IntRange(min=1), default=1,
+              help='并行处理的工作进程数，按字节范围切分输入文件')
+@click.option('--input-format', type=click.Choice(FORMATS), default=None,
+              help='输入文件格式，默认按扩展名识别')
+@click.option('--output-format', type=click.Choice(FORMATS), default=None,
+              help='输出文件格式，默认按扩展名识别')
+@click.option('--columns', default=None, help='只读取的列，逗号分隔')
+@click.option('--incremental', is_flag=True, default=False,
+              help='增量模式：只处理输入文件中新追加的行并追加到输出（仅CSV）')
+@click.option('--cache', 'use_cache', is_flag=True, default=False,
+              help='启用结果缓存：输入内容、代码版本和参数相同时直接复用上次的输出')
+@click.option('--on-error', type=click.Choice(ON_ERROR_CHOICES), default='raise',
+              help='校验失败时的处理方式：raise立即失败；quarantine将无效行写入隔离文件并继续')
+@click.option('--reject-file', default=None, help='隔离文件路径，默认为"<输出文件>.rejects.csv"')
+@click.option('--compact-dtypes', is_flag=True, default=False,
+              help='使用根据UserData约束规划的紧凑列类型以降低内存占用')
+def process_data_cmd(input, output, chunksize, workers, input_format, output_format, columns, incremental, use_cache,
+                     on_error, reject_file, compact_dtypes):
     """处理数据并保存到输出文件"""
+    # 选项组合错误在处理开始前报告，以click的用法错误（状态码2）退出
+    if incremental and (workers > 1 or use_cache or input_format not in (None, 'csv')
+                        or output_format not in (None, 'csv')):
+        raise click.UsageError("--incremental 只支持单进程、不使用缓存的CSV输入和输出")
+    if use_cache and on_error != 'raise':
+        raise click.UsageError("--cache 不能与 --on-error=quarantine 同时使用")
     try:
         # 确保输入文件存在
         if not Path(input).exists():
@@ -35,9 +77,39 @@ def process_data_cmd(input, output):
             click.echo(f"错误: 输入文件不存在: {input}", err=True)
             sys.exit(1)
             
-        df = load_data(input)
-        processed_df = process_data(df)
-        processed_df.to_csv(output, index=False)
+        columns = [c.strip() for c in columns.split(',')] if columns else None
+        if incremental:
+            rows, rebuilt = process_incremental(input, output, chunksize=chunksize, columns=columns,
+                                                on_error=on_error, reject_path=reject_file,
+                                                compact=compact_dtypes)
+            mode = "全量重建" if rebuilt else "增量追加"
+            logging.info(f"{mode}完成，本次写入 {rows} 行")
+        else:
+            def run():
+                return process_file(
+                    input, output,
+                    chunksize=chunksize,
+                    workers=workers,
+                    input_format=input_format,
+                    output_format=output_format,
+                    columns=columns,
+                    on_error=on_error,
+                    reject_path=reject_file,
+                    compact=compact_dtypes,
+                )
+            
+            if use_cache:
+                params = {
+                    'input_format': detect_format(input, input_format),
+                    'output_format': detect_format(output, output_format),
+                    'columns': columns,
+                    'compact': compact_dtypes,
+                }
+                rows, hit = run_cached(ResultCache(), input, output, params, run)
+                if hit:
+                    click.echo("命中结果缓存")
+            else:
+                run()
         click.echo(f"数据处理完成，已保存至: {output}")
         logging.info(f"数据处理完成，输出: {output}")
     except Exception as e:
@@ -45,5 +117,135 @@ def process_data_cmd(input, output):
         click.echo(f"数据处理出错: {str(e)}", err=True)
         sys.exit(1)
 
+@cli.command(name='ingest-db')
+@click.option('--input', default=settings.DATA_FILE_PATH, help='输入数据文件路径')
+@click.option('--db', 'db_name', default='default', help='目标数据库名称')
+@click.option('--table', default='users', help='目标表名')
+@click.option('--chunksize', type=click.IntRange(min=1), default=None,
+              help='每块的行数，每块在一个事务中提交，默认10000')
+@click.option('--input-format', type=click.Choice(FORMATS), default=None,
+              help='输入文件格式，默认按扩展名识别')
+@click.option('--columns', default=None, help='只读取的列，逗号分隔')
+@click.option('--restart', is_flag=True, default=False, help='忽略检查点，从头开始写入')
+def ingest_db_cmd(input, db_name, table, chunksize, input_format, columns, restart):
+    """校验、处理数据并分块写入数据库，失败后重新运行可从最后提交的块继续"""
+    from src.ingest import DEFAULT_CHUNKSIZE, ingest_file
+    try:
+        if not Path(input).exists():
+            click.echo(f"错误: 输入文件不存在: {input}", err=True)
+            sys.exit(1)
+        columns = [c.strip() for c in columns.split(',')] if columns else None
+        rows, resumed_from = ingest_file(input, db_name=db_name, table=table,
+                                         chunksize=chunksize or DEFAULT_CHUNKSIZE, input_format=input_format,
+                                         columns=columns, restart=restart)
+        if resumed_from:
+            click.echo(f"从第 {resumed_from + 1} 行继续")
+        click.echo(f"入库完成，写入 {rows} 行到 {db_name}.{table}")
+        logging.info(f"入库完成: {input} -> {db_name}.{table}，{rows} 行")
+    except Exception as e:
+        logging.error(f"入库出错: {str(e)}", exc_info=True)
+        click.echo(f"入库出错: {str(e)}", err=True)
+        sys.exit(1)
+
+@cli.command(name='export-db')
+@click.option('--db', 'db_name', default='default', help='数据库名称')
+@click.option('--table', default='users', help='表名或模型类名')
+@click.option('--output', required=True, help='输出文件路径')
+@click.option('--output-format', type=click.Choice(EXPORT_FORMATS), default=None,
+              help='输出文件格式，默认按扩展名识别（.ndjson/.jsonl为ndjson）')
+@click.option('--where', multiple=True, help='过滤条件，如 age>=18，可重复指定')
+@click.option('--fields', default=None, help='只导出的列，逗号分隔')
+@click.option('--batch-size', type=click.IntRange(min=1), default=None,
+              help='每批读取和写入的行数，默认10000')
+def export_db_cmd(db_name, table, output, output_format, where, fields, batch_size):
+    """分批流式导出数据库表，内存占用与表大小无关"""
+    from src.export import DEFAULT_BATCH_SIZE, export_table
+    try:
+        fields = [f.strip() for f in fields.split(',')] if fields else None
+        rows, seconds = export_table(output, db_name=db_name, table=table, where=where, fields=fields,
+                                     output_format=output_format, batch_size=batch_size or DEFAULT_BATCH_SIZE)
+        rate = rows / seconds if seconds else 0
+        click.echo(f"导出完成，写入 {rows} 行到 {output}，耗时 {seconds:.2f} 秒（{rate:.0f} 行/秒）")
+        logging.info(f"导出完成: {db_name}.{table} -> {output}，{rows} 行")
+    except Exception as e:
+        logging.error(f"导出出错: {str(e)}", exc_info=True)
+        click.echo(f"导出出错: {str(e)}", err=True)
+        sys.exit(1)
+
+@cli.group()
+def cache():
+    """结果缓存管理"""
+    pass
+
+@cache.command(name='info')
+def cache_info():
+    """显示缓存目录、条目数和占用空间"""
+    result_cache = ResultCache()
+    entries = result_cache.entries()
+    total = sum(entry['size'] for entry in entries)
+    click.echo(f"缓存目录: {result_cache.cache_dir}")
+    click.echo(f"条目数: {len(entries)}")
+    click.echo(f"占用空间: {total} / {result_cache.max_bytes} 字节")
+
+@cache.command(name='list')
+def cache_list():
+    """按最近使用时间列出缓存条目"""
+    for entry in ResultCache().entries():
+        last_used = datetime.fromtimestamp(entry['last_used']).strftime('%Y-%m-%d %H:%M:%S')
+        click.echo(f"{entry['key'][:12]}  {entry['size']:>12}  {entry['rows']:>10} 行  {last_used}  {json.dumps(entry['params'], ensure_ascii=False)}")
+
+@cache.command(name='purge')
+@click.option('--yes', is_flag=True, default=False, help='不提示确认直接清空')
+def cache_purge(yes):
+    """清空结果缓存"""
+    if not yes:
+        click.confirm("确认清空结果缓存?", abort=True)
+    count = ResultCache().purge()
+    click.echo(f"已清空结果缓存，删除 {count} 个条目")
+
+@cli.group()
+def benchmark():
+    """数据处理流水线基准测试"""
+    pass
+
+@benchmark.command(name='run')
+@click.option('--sizes', default=','.join(str(size) for size in DEFAULT_SIZES),
+              help='逗号分隔的数据集行数，支持1e5写法')
+@click.option('--seed', type=int, default=42, help='生成合成数据集的随机种子')
+@click.option('--workdir', default='.cache/benchmark', help='存放合成数据集的目录')
+@click.option('--output', default='benchmark.json', help='结果JSON文件路径')
+def benchmark_run(sizes, seed, workdir, output):
+    """分阶段计时解析、校验与处理、写出以及端到端的process_file，并记录峰值内存"""
+    try:
+        size_list = [int(float(size)) for size in sizes.split(',') if size.strip()]
+    except ValueError:
+        raise click.BadParameter(f"无效的数据集行数: {sizes}", param_hint='--sizes')
+    results = run_benchmark(size_list, seed=seed, workdir=workdir)
+    save_results(results, output)
+    click.echo(f"{'行数':>10}  {'解析':>8}  {'校验处理':>8}  {'写出':>8}  {'总计':>8}  {'端到端':>8}  "
+               f"{'峰值内存MB':>10}")
+    for result in results['results']:
+        click.echo(f"{result['rows']:>10}  {result['parse_s']:>8.3f}  {result['pipeline_s']:>8.3f}  "
+                   f"{result['write_s']:>8.3f}  {result['total_s']:>8.3f}  {result['process_file_s']:>8.3f}  "
+                   f"{result['peak_rss_mb'] or '-':>10}")
+    click.echo(f"结果已保存到 {output}")
+
+@benchmark.command(name='compare')
+@click.argument('baseline', type=click.Path(exists=True, dir_okay=False))
+@click.argument('current', type=click.Path(exists=True, dir_okay=False))
+@click.option('--threshold', type=float, default=0.1, help='允许的相对增幅，超出视为性能回退')
+def benchmark_compare(baseline, current, threshold):
+    """与基线结果比较，存在性能回退时以状态码1退出"""
+    comparisons = compare_results(load_results(baseline), load_results(current), threshold=threshold)
+    regressions = [item for item in comparisons if item['regression']]
+    for item in comparisons:
+        flag = '回退' if item['regression'] else ''
+        click.echo(f"{item['rows']:>10}  {item['metric']:<12}  {item['baseline']:>10}  {item['current']:>10}  "
+                   f"{item['change']:>+8.1%}  {flag}")
+    if regressions:
+        click.echo(f"发现 {len(regressions)} 项性能回退（阈值 {threshold:.0%}）", err=True)
+        sys.exit(1)
+    click.echo("未发现性能回退")
+
 if __name__ == "__main__":
     cli()
\ No newline at end of file
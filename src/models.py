@@ -3,6 +3,12 @@ from pydantic import BaseModel, Field, field_validator
 from typing import Optional
 from datetime import datetime
 
+# 非空字符串字段的错误提示，模型校验器与列式校验引擎(src/validation.py)共用
+NON_EMPTY_FIELD_MESSAGES = {
+    'name': '姓名不能为空',
+    'city': '城市不能为空',
+}
+
 class UserData(BaseModel):
     """用户数据模型"""
     name: str = Field(..., description="用户姓名")
@@ -13,13 +19,13 @@ class UserData(BaseModel):
     @field_validator('name')
     def name_must_not_be_empty(cls, v):
         if not v or not v.strip():
-            raise ValueError('姓名不能为空')
+            raise ValueError(NON_EMPTY_FIELD_MESSAGES['name'])
         return v.strip()
     
     @field_validator('city')
     def city_must_not_be_empty(cls, v):
         if not v or not v.strip():
-            raise ValueError('城市不能为空')
+            raise ValueError(NON_EMPTY_FIELD_MESSAGES['city'])
         return v.strip()
 
 class ProcessedUserData(UserData):
@@ -0,0 +1,263 @@
+# src/result_cache.py
+"""
+process-data结果缓存
+以输入文件内容哈希、流水线代码版本和相关参数为键缓存输出文件，
+命中时直接生成输出而不再执行加载、校验和处理
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+import types
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from src.config.settings import settings
+
+# 流水线的入口模块；它直接或间接导入的src.*模块都参与代码版本计算，任一源码变化都会使旧缓存失效
+PIPELINE_ROOTS = ('src.data_processor',)
+
+_HASH_BLOCK = 1024 * 1024
+_META_FILE = 'meta.json'
+_OUTPUT_FILE = 'output'
+
+
+def file_digest(path) -> str:
+    """计算文件内容的SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(_HASH_BLOCK), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def pipeline_modules() -> List[str]:
+    """
+    流水线依赖的项目模块
+
+    从PIPELINE_ROOTS出发，收集模块命名空间中引用的src.*模块（import的模块，
+    以及from ... import导入的函数、类所属的模块），直到没有新的模块
+
+    Returns:
+        按名称排序的模块名列表
+    """
+    import importlib
+    seen = set()
+    pending = list(PIPELINE_ROOTS)
+    while pending:
+        name = pending.pop()
+        if name in seen:
+            continue
+        seen.add(name)
+        for value in vars(importlib.import_module(name)).values():
+            owner = value.__name__ if isinstance(value, types.ModuleType) else getattr(value, '__module__', None)
+            if isinstance(owner, str) and owner.startswith('src.') and owner not in seen:
+                pending.append(owner)
+    return sorted(seen)
+
+
+@lru_cache(maxsize=1)
+def pipeline_code_version() -> str:
+    """流水线代码版本：pipeline_modules中各模块源码的哈希"""
+    import importlib
+    digest = hashlib.sha256()
+    for name in pipeline_modules():
+        module = importlib.import_module(name)
+        with open(module.__file__, 'rb') as f:
+            digest.update(name.encode('utf-8'))
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+class ResultCache:
+    """基于内容寻址的结果缓存，超出容量时按最近使用时间淘汰"""
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: Optional[int] = None,
+                 hardlink: Optional[bool] = None):
+        """
+        Args:
+            cache_dir: 缓存目录，默认取settings.CACHE_DIR
+            max_bytes: 容量上限，默认取settings.CACHE_MAX_BYTES
+            hardlink: 命中时是否以硬链接生成输出，默认取settings.CACHE_HARDLINK。
+                硬链接与缓存条目共享同一文件（inode），原地修改输出（如以追加或读写方式打开）
+                会同时修改缓存条目，因此命中时校验条目内容的SHA-256，不一致时删除条目并重新处理
+        """
+        self.cache_dir = cache_dir or settings.CACHE_DIR
+        self.max_bytes = settings.CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        self.hardlink = settings.CACHE_HARDLINK if hardlink is None else hardlink
+
+    def make_key(self, input_path, params: Dict) -> str:
+        """
+        计算缓存键
+
+        Args:
+            input_path: 输入文件路径
+            params: 影响输出内容的参数（输出格式、列投影等）
+
+        Returns:
+            str: 缓存键
+        """
+        payload = json.dumps({
+            'input': file_digest(input_path),
+            'code': pipeline_code_version(),
+            'params': params,
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def _read_meta(self, entry_dir: str) -> Optional[dict]:
+        try:
+            with open(os.path.join(entry_dir, _META_FILE), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def lookup(self, key: str) -> Optional[dict]:
+        """查找缓存条目，返回元数据；条目不完整或已损坏（大小或内容哈希不符）时删除并返回None"""
+        entry_dir = self._entry_dir(key)
+        meta = self._read_meta(entry_dir)
+        if meta is None:
+            return None
+        data_path = os.path.join(entry_dir, _OUTPUT_FILE)
+        if (not os.path.exists(data_path) or os.path.getsize(data_path) != meta.get('size')
+                or file_digest(data_path) != meta.get('digest')):
+            logger.warning(f"缓存条目已损坏，删除: {key}")
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            return None
+        return meta
+
+    def materialize(self, key: str, output_path) -> Optional[dict]:
+        """
+        命中时将缓存的输出生成到output_path
+
+        Returns:
+            命中时返回条目元数据，未命中返回None
+        """
+        meta = self.lookup(key)
+        if meta is None:
+            return None
+        data_path = os.path.join(self._entry_dir(key), _OUTPUT_FILE)
+        # 先删除已有输出，避免通过旧的硬链接写入其他文件
+        if os.path.lexists(output_path):
+            os.remove(output_path)
+        linked = False
+        if self.hardlink:
+            try:
+                os.link(data_path, output_path)
+                linked = True
+            except OSError:
+                pass
+        if not linked:
+            shutil.copyfile(data_path, output_path)
+        # 以修改时间记录最近使用时间，供LRU淘汰使用
+        os.utime(os.path.join(self._entry_dir(key), _META_FILE))
+        return meta
+
+    def store(self, key: str, output_path, rows: int, params: Dict):
+        """将输出文件存入缓存，并在超出容量时淘汰最久未使用的条目"""
+        entry_dir = self._entry_dir(key)
+        os.makedirs(entry_dir, exist_ok=True)
+        tmp_path = os.path.join(entry_dir, f"{_OUTPUT_FILE}.{os.getpid()}.tmp")
+        shutil.copyfile(output_path, tmp_path)
+        os.replace(tmp_path, os.path.join(entry_dir, _OUTPUT_FILE))
+
+        meta = {
+            'key': key,
+            'size': os.path.getsize(output_path),
+            'digest': file_digest(output_path),
+            'rows': rows,
+            'params': params,
+            'code': pipeline_code_version(),
+            'created_at': time.time(),
+        }
+        # 元数据最后写入，作为条目完整的标志
+        meta_tmp = os.path.join(entry_dir, f"{_META_FILE}.{os.getpid()}.tmp")
+        with open(meta_tmp, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(meta_tmp, os.path.join(entry_dir, _META_FILE))
+        self.evict()
+
+    def entries(self) -> List[dict]:
+        """列出所有完整的缓存条目，按最近使用时间从新到旧排序"""
+        result = []
+        if not os.path.isdir(self.cache_dir):
+            return result
+        for prefix in os.listdir(self.cache_dir):
+            prefix_dir = os.path.join(self.cache_dir, prefix)
+            if not os.path.isdir(prefix_dir):
+                continue
+            for key in os.listdir(prefix_dir):
+                entry_dir = os.path.join(prefix_dir, key)
+                meta = self._read_meta(entry_dir)
+                if meta is None:
+                    continue
+                meta['last_used'] = os.path.getmtime(os.path.join(entry_dir, _META_FILE))
+                result.append(meta)
+        result.sort(key=lambda m: m['last_used'], reverse=True)
+        return result
+
+    def total_bytes(self) -> int:
+        """缓存占用的总字节数"""
+        return sum(entry['size'] for entry in self.entries())
+
+    def evict(self) -> int:
+        """
+        按LRU淘汰条目直到总大小不超过容量上限
+
+        Returns:
+            int: 淘汰的条目数
+        """
+        entries = self.entries()
+        total = sum(entry['size'] for entry in entries)
+        evicted = 0
+        while entries and total > self.max_bytes:
+            entry = entries.pop()
+            shutil.rmtree(self._entry_dir(entry['key']), ignore_errors=True)
+            total -= entry['size']
+            evicted += 1
+        if evicted:
+            logger.info(f"结果缓存淘汰 {evicted} 个条目")
+        return evicted
+
+    def purge(self) -> int:
+        """
+        清空缓存
+
+        Returns:
+            int: 删除的条目数
+        """
+        count = len(self.entries())
+        if os.path.isdir(self.cache_dir):
+            shutil.rmtree(self.cache_dir)
+        return count
+
+
+def run_cached(cache: ResultCache, input_path, output_path, params: Dict,
+               run: Callable[[], int]) -> Tuple[int, bool]:
+    """
+    带缓存地执行一次处理
+
+    Args:
+        cache: 结果缓存
+        input_path: 输入文件路径
+        output_path: 输出文件路径
+        params: 影响输出内容的参数
+        run: 未命中时执行的处理函数，返回写入的行数
+
+    Returns:
+        (行数, 是否命中缓存)
+    """
+    key = cache.make_key(input_path, params)
+    meta = cache.materialize(key, output_path)
+    if meta is not None:
+        logger.info(f"命中结果缓存: {key[:12]}")
+        return meta['rows'], True
+    rows = run()
+    cache.store(key, output_path, rows, params)
+    return rows, False
@@ -0,0 +1,208 @@
+# src/validation.py
+"""
+列式数据校验引擎
+根据Pydantic模型声明的约束，对整列执行pandas/NumPy向量化校验，
+替代逐行构造模型对象的方式
+"""
+
+from functools import lru_cache
+from typing import List, NamedTuple, Optional, Tuple, Type
+
+import annotated_types
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel
+
+from src.models import UserData, NON_EMPTY_FIELD_MESSAGES
+
+# 与Pydantic内置错误保持一致的提示信息
+MISSING_MESSAGE = "Field required"
+INT_PARSING_MESSAGE = "Input should be a valid integer, unable to parse string as an integer"
+INT_FROM_FLOAT_MESSAGE = "Input should be a valid integer, got a number with a fractional part"
+GE_MESSAGE = "Input should be greater than or equal to {}"
+GT_MESSAGE = "Input should be greater than {}"
+LE_MESSAGE = "Input should be less than or equal to {}"
+LT_MESSAGE = "Input should be less than {}"
+
+
+class FieldRule(NamedTuple):
+    """单个字段的列式校验规则"""
+    name: str
+    kind: str  # 'int' 或 'str'
+    required: bool
+    ge: Optional[float] = None
+    gt: Optional[float] = None
+    le: Optional[float] = None
+    lt: Optional[float] = None
+    empty_message: Optional[str] = None
+
+
+@lru_cache(maxsize=None)
+def compile_rules(model: Type[BaseModel] = UserData) -> Tuple[FieldRule, ...]:
+    """
+    从模型字段声明中提取校验规则（每个模型只编译一次）
+
+    Args:
+        model: Pydantic模型类
+
+    Returns:
+        按字段声明顺序排列的校验规则
+    """
+    rules: List[FieldRule] = []
+    for name, field in model.model_fields.items():
+        if field.annotation is int:
+            kind = 'int'
+        elif field.annotation is str:
+            kind = 'str'
+        else:
+            # 非必填的附加字段（如processed）不参与列式校验
+            continue
+
+        bounds = {}
+        for meta in field.metadata:
+            if isinstance(meta, annotated_types.Ge):
+                bounds['ge'] = meta.ge
+            elif isinstance(meta, annotated_types.Gt):
+                bounds['gt'] = meta.gt
+            elif isinstance(meta, annotated_types.Le):
+                bounds['le'] = meta.le
+            elif isinstance(meta, annotated_types.Lt):
+                bounds['lt'] = meta.lt
+
+        rules.append(FieldRule(
+            name=name,
+            kind=kind,
+            required=field.is_required(),
+            empty_message=NON_EMPTY_FIELD_MESSAGES.get(name),
+            **bounds
+        ))
+    return tuple(rules)
+
+
+def _append_errors(errors: np.ndarray, mask: np.ndarray, message: str):
+    """将错误信息追加到命中掩码的行上"""
+    idx = np.flatnonzero(mask)
+    if len(idx) == 0:
+        return
+    existing = errors[idx]
+    has_prev = pd.notna(existing)
+    if has_prev.any():
+        errors[idx[has_prev]] = existing[has_prev] + f"; {message}"
+    errors[idx[~has_prev]] = message
+
+
+def _validate_int(rule: FieldRule, column: pd.Series, errors: np.ndarray) -> pd.Series:
+    """校验整数列，返回转换后的列"""
+    missing = column.isna().to_numpy()
+    numeric = pd.to_numeric(column, errors='coerce')
+    values = numeric.to_numpy(dtype='float64', na_value=np.nan)
+
+    unparsable = np.isnan(values) & ~missing
+    fractional = ~np.isnan(values) & (values != np.floor(values))
+    checked = ~(missing | unparsable | fractional)
+
+    if rule.required:
+        _append_errors(errors, missing, f"{rule.name}: {MISSING_MESSAGE}")
+    _append_errors(errors, unparsable, f"{rule.name}: {INT_PARSING_MESSAGE}")
+    _append_errors(errors, fractional, f"{rule.name}: {INT_FROM_FLOAT_MESSAGE}")
+
+    # 范围约束互斥地逐项检查，同一字段只报告第一条不满足的约束
+    for bound, op, template in (
+        (rule.ge, np.less, GE_MESSAGE),
+        (rule.gt, np.less_equal, GT_MESSAGE),
+        (rule.le, np.greater, LE_MESSAGE),
+        (rule.lt, np.greater_equal, LT_MESSAGE),
+    ):
+        if bound is None:
+            continue
+        with np.errstate(invalid='ignore'):
+            violated = checked & op(values, bound)
+        _append_errors(errors, violated, f"{rule.name}: {template.format(bound)}")
+        checked &= ~violated
+
+    if not np.isnan(values).any():
+        return pd.Series(values.astype('int64'), index=column.index, name=column.name)
+    return numeric
+
+
+def _validate_str(rule: FieldRule, column: pd.Series, errors: np.ndarray) -> pd.Series:
+    """校验字符串列，返回去除首尾空白后的列"""
+    missing = column.isna().to_numpy()
+    stripped = column.astype('string').str.strip()
+
+    if rule.required:
+        _append_errors(errors, missing, f"{rule.name}: {MISSING_MESSAGE}")
+    if rule.empty_message:
+        empty = (stripped == '').fillna(False).to_numpy(dtype=bool)
+        _append_errors(errors, empty, f"{rule.name}: Value error, {rule.empty_message}")
+
+    return stripped.astype(object).where(~missing, column)
+
+
+def validate_frame(df: pd.DataFrame, model: Type[BaseModel] = UserData) -> Tuple[pd.DataFrame, pd.Series]:
+    """
+    对整个DataFrame执行列式校验
+
+    Args:
+        df: 待校验的数据
+        model: 声明约束的Pydantic模型类
+
+    Returns:
+        (清洗后的DataFrame, 每行的错误信息)。错误信息与Pydantic校验器的提示一致，
+        多个字段出错时以"; "连接，校验通过的行为None
+    """
+    errors = np.full(len(df), None, dtype=object)
+    cleaned = df.copy()
+
+    for rule in compile_rules(model):
+        if rule.name not in df.columns:
+            if rule.required:
+                _append_errors(errors, np.ones(len(df), dtype=bool), f"{rule.name}: {MISSING_MESSAGE}")
+            continue
+        column = df[rule.name]
+        if rule.kind == 'int':
+            cleaned[rule.name] = _validate_int(rule, column, errors)
+        else:
+            cleaned[rule.name] = _validate_str(rule, column, errors)
+
+    return cleaned, pd.Series(errors, index=df.index, name='error', dtype=object)
+
+
+def first_error(errors: pd.Series) -> Optional[str]:
+    """
+    获取第一条校验错误的描述
+
+    Args:
+        errors: validate_frame返回的错误信息
+
+    Returns:
+        形如"第N行: ..."的描述，无错误时返回None。N为从1开始的数据行号，
+        取自行索引，因此分块读取时仍对应整个文件中的位置
+    """
+    invalid = np.flatnonzero(errors.notna().to_numpy())
+    if len(invalid) == 0:
+        return None
+    position = int(invalid[0])
+    label = errors.index[position]
+    row = int(label) if isinstance(label, (int, np.integer)) else position
+    return f"第{row + 1}行: {errors.iloc[position]}"
+
+
+def reject_frame(df: pd.DataFrame, errors: pd.Series) -> pd.DataFrame:
+    """
+    提取校验失败的行，用于写入隔离文件
+
+    Args:
+        df: 原始数据
+        errors: validate_frame返回的错误信息
+
+    Returns:
+        包含row(从1开始的数据行号)、原始各列和error列的DataFrame
+    """
+    invalid = errors.notna().to_numpy()
+    rejects = df[invalid].copy()
+    index = rejects.index
+    rows = index.to_numpy() + 1 if pd.api.types.is_integer_dtype(index) else np.flatnonzero(invalid) + 1
+    rejects.insert(0, 'row', rows)
+    rejects['error'] = errors[invalid].to_numpy()
+    return rejects
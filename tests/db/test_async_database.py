@@ -0,0 +1,120 @@
+# tests/db/test_async_database.py
+"""
+异步数据库功能测试
+"""
+
+import unittest
+import tempfile
+import os
+import importlib.util
+import subprocess
+import sys
+from sqlalchemy import select
+from src.db import async_database
+from src.db.async_database import AsyncDatabaseManager
+from src.db.async_decorators import async_transactional, async_with_db_session
+from src.db.example_models import User
+
+HAS_AIOSQLITE = importlib.util.find_spec('aiosqlite') is not None
+
+@unittest.skipUnless(HAS_AIOSQLITE, "需要安装aiosqlite")
+class TestAsyncDatabase(unittest.IsolatedAsyncioTestCase):
+    """异步数据库功能测试"""
+    
+    async def asyncSetUp(self):
+        """测试前准备"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.manager = AsyncDatabaseManager(f"sqlite:///{os.path.join(self.tmp_dir.name, 'default.db')}")
+        self.manager.add_database("analytics", f"sqlite:///{os.path.join(self.tmp_dir.name, 'analytics.db')}")
+        await self.manager.create_tables("default")
+        await self.manager.create_tables("analytics")
+        # 让装饰器使用测试用的管理器
+        self.previous = async_database.async_db_manager
+        async_database.async_db_manager = self.manager
+    
+    async def asyncTearDown(self):
+        """测试后清理"""
+        async_database.async_db_manager = self.previous
+        await self.manager.dispose()
+    
+    async def test_async_crud(self):
+        """测试异步CRUD"""
+        async with self.manager.get_db_session() as db:
+            user = await User.acreate(db, name="Alice", email="alice@example.com", age=25)
+            await User.abulk_create(db, [{'name': 'Bob', 'email': 'bob@example.com', 'age': 30}])
+            await db.commit()
+            fetched = await User.aget_by_id(db, user.id)
+            self.assertEqual(fetched.name, "Alice")
+            updated = await User.aupdate(db, user.id, age=26)
+            self.assertEqual(updated.age, 26)
+            self.assertEqual(len(await User.afilter(db, name="Bob")), 1)
+            self.assertTrue(await User.adelete(db, user.id))
+            await db.commit()
+            self.assertEqual([u.name for u in await User.aget_all(db)], ["Bob"])
+    
+    async def test_url_uses_async_driver(self):
+        """测试同步URL自动使用异步驱动"""
+        self.assertEqual(self.manager.get_engine().url.drivername, "sqlite+aiosqlite")
+    
+    async def test_shared_config_with_replicas(self):
+        """测试与同步管理器共用的含副本配置：忽略读写分离参数，使用主库"""
+        url = f"sqlite:///{os.path.join(self.tmp_dir.name, 'default.db')}"
+        self.manager.add_database("routed", {
+            "url": url,
+            "replicas": [f"sqlite:///{os.path.join(self.tmp_dir.name, 'replica.db')}"],
+            "replica_strategy": "least_loaded",
+            "read_your_writes": 2.0,
+            "pool_pre_ping": True,
+        })
+        async with self.manager.get_db_session("routed") as db:
+            await User.acreate(db, name="Alice", email="alice@example.com", age=25)
+            await db.commit()
+        async with self.manager.get_db_session() as db:
+            self.assertEqual([u.name for u in await User.aget_all(db)], ["Alice"])
+        self.assertFalse(os.path.exists(os.path.join(self.tmp_dir.name, 'replica.db')))
+    
+    async def test_decorators_switch_database(self):
+        """测试装饰器按名称切换数据库并提交事务"""
+        @async_transactional("analytics")
+        async def create_user(db, name):
+            return (await User.acreate(db, name=name, email=f"{name}@example.com")).id
+        
+        @async_with_db_session("analytics")
+        async def count_users(db):
+            return len((await db.execute(select(User))).scalars().all())
+        
+        @async_with_db_session("default")
+        async def count_default_users(db):
+            return len((await db.execute(select(User))).scalars().all())
+        
+        self.assertIsNotNone(await create_user("carol"))
+        self.assertEqual(await count_users(), 1)
+        self.assertEqual(await count_default_users(), 0)
+    
+    async def test_transactional_rollback(self):
+        """测试异常时回滚"""
+        @async_transactional()
+        async def failing(db):
+            await User.acreate(db, name="Dave", email="dave@example.com")
+            raise RuntimeError("boom")
+        
+        with self.assertRaises(RuntimeError):
+            await failing()
+        async with self.manager.get_db_session() as db:
+            self.assertEqual(await User.aget_all(db), [])
+
+class TestLazyAsyncImport(unittest.TestCase):
+    """异步接口延迟导入测试"""
+    
+    def test_async_stack_loaded_on_first_use(self):
+        """测试导入src.db时不导入sqlalchemy.ext.asyncio，首次访问异步接口时才导入"""
+        code = ("import sys, src.db\n"
+                "print('sqlalchemy.ext.asyncio' in sys.modules)\n"
+                "from src.db import AsyncDatabaseManager\n"
+                "print('sqlalchemy.ext.asyncio' in sys.modules, AsyncDatabaseManager.__name__)")
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout.split(), ['False', 'True', 'AsyncDatabaseManager'])
+
+if __name__ == '__main__':
+    unittest.main()
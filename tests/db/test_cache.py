@@ -0,0 +1,124 @@
+# tests/db/test_cache.py
+"""
+标识缓存测试
+"""
+
+import unittest
+import tempfile
+import os
+import time
+from sqlalchemy import event
+from src.db import DatabaseManager, IdentityCache
+from src.db.example_models import Product
+
+class TestIdentityCache(unittest.TestCase):
+    """get_by_id缓存测试"""
+    
+    def setUp(self):
+        """测试前准备"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.db_manager = DatabaseManager(f"sqlite:///{os.path.join(self.tmp_dir.name, 'test.db')}")
+        self.addCleanup(lambda: self.db_manager.get_engine().dispose())
+        self.db_manager.create_tables()
+        self.cache = Product.enable_cache(maxsize=2, ttl=60)
+        self.addCleanup(Product.disable_cache)
+        with self.db_manager.get_db_session() as db:
+            self.ids = [Product.create(db, name=f"p{i}", price=100 * i).id for i in range(3)]
+            db.commit()
+        self.statements = []
+        event.listen(self.db_manager.get_engine(), 'before_cursor_execute', self._count)
+    
+    def _count(self, conn, cursor, statement, *args):
+        self.statements.append(statement)
+    
+    def _lookup(self, id):
+        with self.db_manager.get_db_session() as db:
+            product = Product.get_by_id(db, id)
+            return product.name if product is not None else None
+    
+    def test_hit_across_sessions(self):
+        """测试跨会话命中时不访问数据库"""
+        self.assertEqual(self._lookup(self.ids[0]), 'p0')
+        queries = len(self.statements)
+        with self.db_manager.get_db_session() as db:
+            product = Product.get_by_id(db, self.ids[0])
+            self.assertIn(product, db)
+            self.assertEqual((product.name, product.price), ('p0', 0))
+        self.assertEqual(len(self.statements), queries)
+        stats = Product.cache_stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+    
+    def test_missing_row_not_cached(self):
+        """测试不存在的记录不被缓存"""
+        self.assertIsNone(self._lookup(999))
+        self.assertEqual(Product.cache_stats()['size'], 0)
+    
+    def test_update_and_commit_invalidate(self):
+        """测试update和提交使缓存失效"""
+        self._lookup(self.ids[0])
+        with self.db_manager.get_db_session() as db:
+            Product.update(db, self.ids[0], name='renamed')
+            db.commit()
+        self.assertEqual(self._lookup(self.ids[0]), 'renamed')
+        
+        self._lookup(self.ids[1])
+        with self.db_manager.get_db_session() as db:
+            product = Product.get_by_id(db, self.ids[1])
+            product.name = 'changed'
+            db.commit()
+        self.assertEqual(self._lookup(self.ids[1]), 'changed')
+    
+    def test_delete_and_bulk_update_invalidate(self):
+        """测试delete和批量更新使缓存失效"""
+        self._lookup(self.ids[0])
+        self._lookup(self.ids[1])
+        with self.db_manager.get_db_session() as db:
+            Product.delete(db, self.ids[0])
+            Product.bulk_update(db, [{'id': self.ids[1], 'name': 'bulk'}])
+            db.commit()
+        self.assertIsNone(self._lookup(self.ids[0]))
+        self.assertEqual(self._lookup(self.ids[1]), 'bulk')
+    
+    def test_read_before_commit_not_left_stale(self):
+        """测试批量写入提交前其他会话读入的旧值在提交后失效"""
+        for write in (lambda db: Product.bulk_update(db, [{'id': self.ids[0], 'name': 'bulk'}]),
+                      lambda db: Product.update_many(db, [self.ids[0]], name='many'),
+                      lambda db: Product.upsert(db, [{'id': self.ids[0], 'name': 'upserted', 'price': 1}],
+                                                conflict_columns=['id'])):
+            with self.db_manager.get_db_session() as db:
+                write(db)
+                # 写入尚未提交，其他会话读到旧值并放入缓存
+                stale = self._lookup(self.ids[0])
+                db.commit()
+            self.assertNotEqual(self._lookup(self.ids[0]), stale)
+
+    def test_rolled_back_write_not_cached(self):
+        """测试同一事务中写入后读取的未提交值在回滚后不会留在缓存中"""
+        with self.db_manager.get_db_session() as db:
+            Product.bulk_update(db, [{'id': self.ids[0], 'name': 'UNCOMMITTED'}])
+            self.assertEqual(Product.get_by_id(db, self.ids[0]).name, 'UNCOMMITTED')
+            db.rollback()
+        self.assertEqual(self._lookup(self.ids[0]), 'p0')
+        
+        # 绕过CRUD的写入语句不会被登记，回滚时使本事务中放入缓存的键失效
+        with self.db_manager.get_db_session() as db:
+            db.execute(Product.__table__.update().where(Product.id == self.ids[1]).values(name='raw'))
+            self.assertEqual(Product.get_by_id(db, self.ids[1]).name, 'raw')
+            db.rollback()
+        self.assertEqual(self._lookup(self.ids[1]), 'p1')
+    
+    def test_lru_and_ttl(self):
+        """测试LRU容量和TTL淘汰"""
+        for id in self.ids:
+            self._lookup(id)
+        self.assertEqual(Product.cache_stats()['size'], 2)
+        self.assertEqual(Product.cache_stats()['evictions'], 1)
+        
+        cache = IdentityCache(maxsize=10, ttl=0.01)
+        cache.put('k', {'id': 1})
+        time.sleep(0.02)
+        self.assertIsNone(cache.get('k'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,301 @@
+# tests/db/test_crud.py
+"""
+CRUD批量操作测试
+"""
+
+import unittest
+import base64
+import tempfile
+import os
+import pandas as pd
+from sqlalchemy import Column, Integer, String, event
+from sqlalchemy.orm import declarative_base
+from src.db import DatabaseManager
+from src.db.crud import CRUDMixin
+from src.db.example_models import User, Order, Product
+
+# 有两个独立唯一列、有名为load的列的模型，使用独立的Base，不影响示例模型的建表
+_OtherBase = declarative_base()
+
+class Account(CRUDMixin, _OtherBase):
+    __tablename__ = 'accounts'
+    
+    id = Column(Integer, primary_key=True)
+    email = Column(String(100), unique=True)
+    username = Column(String(50), unique=True)
+
+class Truck(CRUDMixin, _OtherBase):
+    __tablename__ = 'trucks'
+    
+    id = Column(Integer, primary_key=True)
+    load = Column(Integer)
+
+class TestBulkCRUD(unittest.TestCase):
+    """批量操作测试"""
+    
+    def setUp(self):
+        """测试前准备"""
+        self.temp_db = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+        self.temp_db.close()
+        self.db_manager = DatabaseManager(f"sqlite:///{self.temp_db.name}")
+        self.db_manager.create_tables()
+    
+    def tearDown(self):
+        """测试后清理"""
+        self.db_manager.get_engine().dispose()
+        if os.path.exists(self.temp_db.name):
+            try:
+                os.unlink(self.temp_db.name)
+            except PermissionError:
+                pass
+    
+    def test_bulk_create_dicts(self):
+        """测试批量创建并返回ID"""
+        records = [{'name': f"user{i}", 'age': 20 + i, 'email': f"user{i}@example.com"} for i in range(25)]
+        with self.db_manager.get_db_session() as db:
+            ids = User.bulk_create(db, records, batch_size=10, return_ids=True)
+            db.commit()
+            self.assertEqual(len(ids), 25)
+            for record_id, record in zip(ids, records):
+                user = User.get_by_id(db, record_id)
+                self.assertEqual(user.email, record['email'])
+                self.assertIsNotNone(user.created_at)
+                self.assertEqual(user.created_at, user.updated_at)
+        # 调用方传入的字典不被修改
+        self.assertNotIn('created_at', records[0])
+    
+    def test_bulk_create_dataframe(self):
+        """测试从DataFrame批量创建，缺失值写入NULL并保留列默认值"""
+        df = pd.DataFrame({'user_id': [1, 2, 3], 'product_id': [1, 1, 2], 'total_price': [100, None, 300]})
+        with self.db_manager.get_db_session() as db:
+            self.assertEqual(Order.bulk_create(db, df, batch_size=2), 3)
+            db.commit()
+            orders = db.query(Order).order_by(Order.id).all()
+            self.assertEqual([o.total_price for o in orders], [100, None, 300])
+            self.assertEqual([o.quantity for o in orders], [1, 1, 1])
+    
+    def test_bulk_update(self):
+        """测试按主键批量更新并刷新已加载的实例"""
+        with self.db_manager.get_db_session() as db:
+            ids = User.bulk_create(db, [{'name': f"user{i}", 'age': 20, 'email': f"user{i}@example.com"}
+                                        for i in range(5)], return_ids=True)
+            user = User.get_by_id(db, ids[0])
+            created_at = user.created_at
+            self.assertEqual(User.bulk_update(db, [{'id': id, 'age': 30 + n} for n, id in enumerate(ids)],
+                                              batch_size=2), 5)
+            self.assertEqual(user.age, 30)
+            self.assertEqual(user.created_at, created_at)
+            self.assertGreater(user.updated_at, created_at)
+            with self.assertRaises(ValueError):
+                User.bulk_update(db, [{'age': 1}])
+    
+    def test_update_many(self):
+        """测试将多条记录更新为相同的值"""
+        with self.db_manager.get_db_session() as db:
+            ids = User.bulk_create(db, [{'name': f"user{i}", 'age': 20, 'email': f"user{i}@example.com"}
+                                        for i in range(5)], return_ids=True)
+            self.assertEqual(User.update_many(db, ids[:3], batch_size=2, age=40), 3)
+            self.assertEqual(sorted(user.age for user in User.get_all(db)), [20, 20, 40, 40, 40])
+    
+    def test_upsert_by_email(self):
+        """测试按唯一列插入或更新"""
+        with self.db_manager.get_db_session() as db:
+            existing = User.create(db, name="Alice", email="alice@example.com", age=25)
+            created_at = existing.created_at
+            count = User.upsert(db, [
+                {'name': 'Alice Smith', 'email': 'alice@example.com', 'age': 26},
+                {'name': 'Bob', 'email': 'bob@example.com', 'age': 30},
+            ])
+            db.commit()
+            self.assertEqual(count, 2)
+            users = {user.email: user for user in User.get_all(db)}
+            self.assertEqual(len(users), 2)
+            alice = users['alice@example.com']
+            self.assertEqual(alice.id, existing.id)
+            self.assertEqual((alice.name, alice.age), ('Alice Smith', 26))
+            self.assertEqual(alice.created_at, created_at)
+            self.assertGreater(alice.updated_at, created_at)
+    
+    def test_upsert_multiple_unique_columns(self):
+        """测试有多个唯一列时必须指定conflict_columns"""
+        _OtherBase.metadata.create_all(bind=self.db_manager.get_engine())
+        with self.db_manager.get_db_session() as db:
+            Account.create(db, email="a@example.com", username="alice")
+            with self.assertRaises(ValueError) as ctx:
+                Account.upsert(db, [{'email': 'a@example.com', 'username': 'alice2'}])
+            self.assertIn("conflict_columns", str(ctx.exception))
+            Account.upsert(db, [{'email': 'a@example.com', 'username': 'alice2'}], conflict_columns=['email'])
+            db.commit()
+            self.assertEqual([(a.email, a.username) for a in Account.get_all(db)], [('a@example.com', 'alice2')])
+    
+    def _create_users(self, db, count):
+        return User.bulk_create(db, [{'name': f"user{i % 3}", 'age': i, 'email': f"user{i}@example.com"}
+                                     for i in range(count)], return_ids=True)
+    
+    def test_get_page_by_id(self):
+        """测试按id键集分页遍历全部记录"""
+        with self.db_manager.get_db_session() as db:
+            ids = self._create_users(db, 7)
+            seen, cursor, pages = [], None, 0
+            while True:
+                users, cursor = User.get_page(db, limit=3, cursor=cursor)
+                seen.extend(user.id for user in users)
+                pages += 1
+                if cursor is None:
+                    break
+            self.assertEqual(seen, ids)
+            self.assertEqual(pages, 3)
+    
+    def test_get_page_by_indexed_column(self):
+        """测试按非唯一索引列降序分页，相同值按id排序"""
+        with self.db_manager.get_db_session() as db:
+            self._create_users(db, 7)
+            expected = [(u.name, u.id) for u in
+                        db.query(User).order_by(User.name.desc(), User.id.desc())]
+            seen, cursor = [], None
+            while True:
+                users, cursor = User.get_page(db, limit=2, cursor=cursor, order_by='name', descending=True)
+                seen.extend((user.name, user.id) for user in users)
+                if cursor is None:
+                    break
+            self.assertEqual(seen, expected)
+    
+    def test_get_page_invalid_arguments(self):
+        """测试游标与排序方式不一致或排序列无索引时报错"""
+        with self.db_manager.get_db_session() as db:
+            self._create_users(db, 3)
+            _, cursor = User.get_page(db, limit=1)
+            with self.assertRaises(ValueError):
+                User.get_page(db, limit=1, cursor=cursor, order_by='name')
+            with self.assertRaises(ValueError):
+                User.get_page(db, limit=1, cursor='not-a-cursor')
+            # 能解码但结构不对的游标
+            for payload in (b'[1]', b'{"o":"id","d":false}', b'{"o":"id","d":false,"k":[1,2]}'):
+                forged = base64.urlsafe_b64encode(payload).decode('ascii')
+                with self.assertRaises(ValueError) as ctx:
+                    User.get_page(db, limit=1, cursor=forged)
+                self.assertIn("无效的分页游标", str(ctx.exception))
+            with self.assertRaises(ValueError):
+                User.get_page(db, order_by='age')
+    
+    def test_iter_all_streams_and_expunges(self):
+        """测试流式遍历并将遍历过的实例移出会话"""
+        with self.db_manager.get_db_session() as db:
+            ids = self._create_users(db, 10)
+            db.commit()
+            kept = User.get_by_id(db, ids[0])
+            seen = [user.id for user in User.iter_all(db, batch_size=3)]
+            self.assertEqual(seen, ids)
+            self.assertIn(kept, db)
+            self.assertEqual(len(db.identity_map), 1)
+    
+    def test_bulk_create_unknown_field(self):
+        """测试未知字段报错"""
+        with self.db_manager.get_db_session() as db:
+            with self.assertRaises(ValueError):
+                User.bulk_create(db, [{'name': 'Alice', 'nickname': 'A'}])
+            # 未知字段只出现在后面的记录中
+            with self.assertRaises(ValueError) as ctx:
+                User.bulk_create(db, [{'name': 'a', 'email': 'a@x'},
+                                      {'name': 'b', 'email': 'b@x', 'nickname': 'B'}])
+            self.assertIn('nickname', str(ctx.exception))
+            # 字段集合与第一条不同
+            with self.assertRaises(ValueError):
+                User.bulk_create(db, [{'name': 'a', 'email': 'a@x'},
+                                      {'name': 'b', 'email': 'b@x', 'age': 30}])
+            self.assertEqual(User.get_all(db), [])
+            # 只有自动填充的时间戳字段不同时允许
+            self.assertEqual(User.bulk_create(db, [{'name': 'a', 'email': 'a@x'},
+                                                   {'name': 'b', 'email': 'b@x', 'created_at': None}]), 2)
+
+class TestEagerLoading(unittest.TestCase):
+    """关联关系预加载测试"""
+    
+    def setUp(self):
+        """测试前准备：3个用户，每人2个订单"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.db_manager = DatabaseManager(f"sqlite:///{os.path.join(self.tmp_dir.name, 'eager.db')}")
+        self.addCleanup(self.db_manager.dispose)
+        self.db_manager.create_tables()
+        with self.db_manager.get_db_session() as db:
+            product = Product.create(db, name="Laptop", price=100000)
+            for i in range(3):
+                user = User.create(db, name=f"user{i}", email=f"user{i}@example.com", age=20 + i)
+                for quantity in (1, 2):
+                    Order.create(db, user_id=user.id, product_id=product.id, quantity=quantity,
+                                 total_price=quantity * product.price)
+            db.commit()
+        self.statements = []
+        event.listen(self.db_manager.get_engine(), 'before_cursor_execute', self._record)
+    
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+    
+    def test_get_all_selectin(self):
+        """测试selectin预加载后访问关联关系不再查询"""
+        with self.db_manager.get_db_session() as db:
+            users = User.get_all(db, load=['orders'])
+            self.assertEqual([len(user.orders) for user in users], [2, 2, 2])
+        self.assertEqual(len(self.statements), 2)
+    
+    def test_filter_joined_and_nested(self):
+        """测试joined预加载和嵌套关联"""
+        with self.db_manager.get_db_session() as db:
+            orders = Order.filter(db, load={'user': 'joined', 'product': 'joined'}, quantity=2)
+            self.assertEqual(sorted(order.user.name for order in orders), ['user0', 'user1', 'user2'])
+            self.assertEqual({order.product.name for order in orders}, {'Laptop'})
+            self.assertEqual(len(self.statements), 1)
+            
+            users = User.filter(db, load=['orders.product'], name='user1')
+            self.assertEqual([order.product.price for order in users[0].orders], [100000, 100000])
+        self.assertEqual(len(self.statements), 4)
+    
+    def test_get_by_id_with_load(self):
+        """测试get_by_id预加载，启用缓存时同样生效"""
+        User.enable_cache()
+        self.addCleanup(User.disable_cache)
+        with self.db_manager.get_db_session() as db:
+            user = User.get_by_id(db, 1, load=['orders'])
+            self.assertEqual(len(user.orders), 2)
+        self.assertEqual(len(self.statements), 2)
+    
+    def test_to_dict_includes_loaded_relations(self):
+        """测试to_dict(relations=True)只包含已加载的关联关系，且不输出反向关联"""
+        with self.db_manager.get_db_session() as db:
+            plain = User.get_by_id(db, 1).to_dict(relations=True)
+            self.assertNotIn('orders', plain)
+            
+            db.expunge_all()
+            user = User.get_by_id(db, 1, load=['orders.product'])
+            # 默认只输出列，与是否加载过关联关系无关
+            self.assertEqual(user.to_dict(), plain)
+            data = user.to_dict(relations=True)
+            statements = len(self.statements)
+            self.assertEqual([order['quantity'] for order in data['orders']], [1, 2])
+            self.assertEqual(data['orders'][0]['product']['name'], 'Laptop')
+            self.assertNotIn('user', data['orders'][0])
+            self.assertNotIn('orders', data['orders'][0]['product'])
+            self.assertEqual(len(self.statements), statements)
+            self.assertEqual(User.get_by_id(db, 1).to_dict(relations=False).keys(), plain.keys())
+    
+    def test_filter_on_load_column(self):
+        """测试模型有名为load的列时load作为过滤条件"""
+        _OtherBase.metadata.create_all(bind=self.db_manager.get_engine())
+        with self.db_manager.get_db_session() as db:
+            Truck.bulk_create(db, [{'load': 5}, {'load': 7}, {'load': None}])
+            self.assertEqual([truck.load for truck in Truck.filter(db, load=7)], [7])
+            self.assertEqual(len(Truck.filter(db)), 3)
+            self.assertEqual(len(Truck.filter(db, load=None)), 1)
+    
+    def test_invalid_load(self):
+        """测试无效的关联关系和加载策略"""
+        with self.db_manager.get_db_session() as db:
+            with self.assertRaises(ValueError):
+                User.get_all(db, load=['missing'])
+            with self.assertRaises(ValueError):
+                User.get_all(db, load={'orders': 'lazy'})
+
+
+if __name__ == '__main__':
+    unittest.main()
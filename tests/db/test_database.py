@@ -7,8 +7,12 @@
 import unittest
 import tempfile
 import os
+import subprocess
+import sys
+from unittest import mock
 from sqlalchemy.orm import Session
 from src.db import DatabaseManager, transactional, with_db_session
+from src.db import database as database_module
 from src.db.example_models import User, Product
 
 class TestDatabase(unittest.TestCase):
@@ -135,5 +139,52 @@ class TestDatabase(unittest.TestCase):
             self.assertEqual(len(users), 1)
             self.assertEqual(users[0].age, 25)
 
+class TestLazyInitialization(unittest.TestCase):
+    """引擎和表的延迟创建测试"""
+    
+    def setUp(self):
+        """测试前准备"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.db_path = os.path.join(self.tmp_dir.name, 'lazy.db')
+    
+    def test_engine_created_on_first_use(self):
+        """测试配置数据库不创建引擎，首次使用时创建"""
+        db_manager = DatabaseManager(f"sqlite:///{self.db_path}")
+        self.addCleanup(db_manager.dispose)
+        self.assertEqual(db_manager.engines, {})
+        self.assertFalse(os.path.exists(self.db_path))
+        
+        engine = db_manager.get_engine()
+        self.assertIs(db_manager.get_engine(), engine)
+        self.assertIn('default', db_manager.sessions)
+        with self.assertRaises(ValueError):
+            db_manager.get_engine('missing')
+    
+    def test_auto_create_tables_once(self):
+        """测试首次使用时创建表，之后不再执行create_all"""
+        db_manager = DatabaseManager(f"sqlite:///{self.db_path}", auto_create_tables=True)
+        self.addCleanup(db_manager.dispose)
+        with mock.patch('src.db.database.Base.metadata.create_all',
+                        wraps=database_module.Base.metadata.create_all) as create_all:
+            with db_manager.get_db_session() as db:
+                User.create(db, name="Alice", email="alice@example.com", age=25)
+                db.commit()
+            with db_manager.get_db_session() as db:
+                self.assertEqual(len(User.get_all(db)), 1)
+        self.assertEqual(create_all.call_count, 1)
+        self.assertIn('default', db_manager.tables_ready)
+        
+        db_manager.drop_tables()
+        self.assertNotIn('default', db_manager.tables_ready)
+    
+    def test_import_has_no_side_effects(self):
+        """测试导入src.db不创建数据库文件"""
+        root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        env = dict(os.environ, PYTHONPATH=root)
+        code = "import src.db; assert src.db.db_manager.engines == {}"
+        subprocess.run([sys.executable, '-c', code], cwd=self.tmp_dir.name, env=env, check=True)
+        self.assertEqual(os.listdir(self.tmp_dir.name), [])
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
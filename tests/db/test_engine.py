@@ -0,0 +1,121 @@
+# tests/db/test_engine.py
+"""
+数据库引擎配置测试
+"""
+
+import unittest
+import tempfile
+import os
+import threading
+from sqlalchemy import text
+from src.db import DatabaseManager
+from src.db.engine import build_engine, normalize_config, options_from_env, to_async_url
+from src.db.example_models import User
+
+class TestEngineOptions(unittest.TestCase):
+    """引擎参数与PRAGMA测试"""
+    
+    def setUp(self):
+        """测试前准备"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.db_url = f"sqlite:///{os.path.join(self.tmp_dir.name, 'test.db')}"
+    
+    def _pragma(self, engine, name):
+        with engine.connect() as conn:
+            return conn.execute(text(f"PRAGMA {name}")).scalar()
+    
+    def test_to_async_url(self):
+        """测试同步驱动替换为异步驱动，已是异步驱动的URL保持不变"""
+        cases = {
+            'sqlite:///./app.db': 'sqlite+aiosqlite:///./app.db',
+            'sqlite+pysqlite:///./app.db': 'sqlite+aiosqlite:///./app.db',
+            'postgresql://u:p@host/db': 'postgresql+asyncpg://u:p@host/db',
+            'postgresql+psycopg2://u:p@host/db': 'postgresql+asyncpg://u:p@host/db',
+            'mysql+pymysql://u:p@host/db': 'mysql+aiomysql://u:p@host/db',
+            'postgresql+psycopg://u:p@host/db': 'postgresql+psycopg://u:p@host/db',
+            'mysql+asyncmy://u:p@host/db': 'mysql+asyncmy://u:p@host/db',
+        }
+        for url, expected in cases.items():
+            self.assertEqual(to_async_url(url), expected)
+        with self.assertRaises(ValueError):
+            to_async_url('mssql+pyodbc://u:p@host/db')
+    
+    def test_options_from_env(self):
+        """测试数据库专属环境变量优先于通用环境变量"""
+        environ = {
+            'DB_POOL_SIZE': '5',
+            'DB_ANALYTICS_POOL_SIZE': '20',
+            'DB_POOL_PRE_PING': 'true',
+            'DB_ANALYTICS_SQLITE_CACHE_SIZE': '-64000',
+        }
+        self.assertEqual(options_from_env('analytics', environ), {
+            'pool_size': 20, 'pool_pre_ping': True, 'sqlite_pragmas': {'cache_size': -64000},
+        })
+        self.assertEqual(options_from_env('default', environ), {'pool_size': 5, 'pool_pre_ping': True})
+    
+    def test_config_overrides_env(self):
+        """测试配置字典优先于环境变量"""
+        environ = {'DB_POOL_SIZE': '5', 'DB_SQLITE_SYNCHRONOUS': 'FULL', 'DB_SQLITE_CACHE_SIZE': '-1000'}
+        url, options = normalize_config('default', {
+            'url': self.db_url, 'pool_size': 10, 'sqlite_pragmas': {'synchronous': 'OFF'},
+        }, environ)
+        self.assertEqual(url, self.db_url)
+        self.assertEqual(options, {
+            'pool_size': 10, 'sqlite_pragmas': {'synchronous': 'OFF', 'cache_size': -1000},
+        })
+        with self.assertRaises(ValueError):
+            normalize_config('default', {'url': self.db_url, 'pool_sise': 10}, {})
+    
+    def test_default_sqlite_pragmas(self):
+        """测试文件型SQLite默认启用WAL和busy_timeout"""
+        engine = build_engine(self.db_url, {'sqlite_pragmas': {'cache_size': -2000}})
+        self.addCleanup(engine.dispose)
+        self.assertEqual(self._pragma(engine, 'journal_mode'), 'wal')
+        self.assertEqual(self._pragma(engine, 'busy_timeout'), 5000)
+        self.assertEqual(self._pragma(engine, 'cache_size'), -2000)
+    
+    def test_disable_pragmas(self):
+        """测试显式关闭PRAGMA"""
+        engine = build_engine(self.db_url, {'sqlite_pragmas': None})
+        self.addCleanup(engine.dispose)
+        self.assertEqual(self._pragma(engine, 'journal_mode'), 'delete')
+    
+    def test_invalid_pragma_value(self):
+        """测试拒绝非法的PRAGMA取值"""
+        with self.assertRaises(ValueError):
+            build_engine(self.db_url, {'sqlite_pragmas': {'journal_mode': 'WAL; DROP TABLE users'}})
+    
+    def test_memory_database_pool_options(self):
+        """测试内存数据库忽略不支持的连接池参数"""
+        engine = build_engine("sqlite://", {'max_overflow': 5, 'pool_timeout': 1})
+        self.addCleanup(engine.dispose)
+        self.assertEqual(self._pragma(engine, 'journal_mode'), 'memory')
+    
+    def test_concurrent_writers(self):
+        """测试多个线程并发写入不出现database is locked"""
+        manager = DatabaseManager({'url': self.db_url, 'pool_size': 4})
+        self.addCleanup(manager.get_engine().dispose)
+        manager.create_tables()
+        errors = []
+        
+        def writer(n):
+            try:
+                for i in range(20):
+                    with manager.get_db_session() as db:
+                        User.create(db, name=f"w{n}", email=f"w{n}-{i}@example.com", age=n)
+                        db.commit()
+            except Exception as e:
+                errors.append(e)
+        
+        threads = [threading.Thread(target=writer, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        with manager.get_db_session() as db:
+            self.assertEqual(db.query(User).count(), 80)
+
+if __name__ == '__main__':
+    unittest.main()
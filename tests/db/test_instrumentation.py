@@ -0,0 +1,150 @@
+# tests/db/test_instrumentation.py
+"""
+查询统计测试
+"""
+
+import unittest
+import tempfile
+import os
+from unittest import mock
+from click.testing import CliRunner
+from loguru import logger
+from sqlalchemy import text
+from src.db import DatabaseManager
+from src.db.engine import build_engine
+from src.db.example_models import User
+from src.db.instrumentation import normalize_sql, redact_parameters
+from src.db.models import Base
+from src.main import cli
+
+class TestNormalizeSql(unittest.TestCase):
+    """SQL归一化测试"""
+
+    def test_literals_and_placeholders(self):
+        """测试字面量和各驱动占位符替换为?"""
+        expected = "SELECT * FROM users WHERE id = ? AND name = ?"
+        for statement in ("SELECT * FROM users WHERE id = 1 AND name = 'O''Brien'",
+                          "SELECT *\n  FROM users WHERE id = ? AND name = ?",
+                          "SELECT * FROM users WHERE id = %(id_1)s AND name = %s",
+                          "SELECT * FROM users WHERE id = $1 AND name = :name"):
+            self.assertEqual(normalize_sql(statement), expected)
+        self.assertEqual(normalize_sql("SELECT col1 FROM t2 WHERE x::text = ?"),
+                         "SELECT col1 FROM t2 WHERE x::text = ?")
+
+    def test_in_lists_and_rows(self):
+        """测试IN列表和多行VALUES折叠"""
+        self.assertEqual(normalize_sql("SELECT * FROM users WHERE id IN (1, 2, 3)"),
+                         normalize_sql("SELECT * FROM users WHERE id IN (?)"))
+        self.assertEqual(normalize_sql("INSERT INTO t (a, b) VALUES (?, ?), (?, ?), (?, ?)"),
+                         "INSERT INTO t (a, b) VALUES (?)")
+
+    def test_redact_parameters(self):
+        """测试参数脱敏只保留类型"""
+        self.assertEqual(redact_parameters({'email': 'secret@example.com', 'age': 3}),
+                         "{email: <str>, age: <int>}")
+        self.assertEqual(redact_parameters(('secret', None)), "[<str>, <NoneType>]")
+        self.assertEqual(redact_parameters([('a',), ('b',)], executemany=True), "<2组参数>")
+
+class TestQueryStats(unittest.TestCase):
+    """DatabaseManager查询统计测试"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.db_url = f"sqlite:///{os.path.join(self.tmp_dir.name, 'test.db')}"
+        self.db_manager = DatabaseManager(self.db_url)
+        self.addCleanup(self.db_manager.dispose)
+        self.db_manager.create_tables()
+        self.db_manager.reset_stats()
+
+    def test_statements_grouped_by_normalized_sql(self):
+        """测试只有参数不同的语句归为一类并计算分位数"""
+        with self.db_manager.get_db_session() as db:
+            for i in range(5):
+                User.create(db, name=f"user{i}", email=f"user{i}@example.com")
+            for i in range(5):
+                User.filter(db, name=f"user{i}")
+        stats = self.db_manager.stats()
+        self.assertEqual(list(stats), ['default'])
+        statements = {entry['sql']: entry for entry in stats['default']['statements']}
+        inserts = [entry for sql, entry in statements.items() if sql.startswith('INSERT INTO users')]
+        selects = [entry for sql, entry in statements.items() if sql.startswith('SELECT users.')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(inserts[0]['count'], 5)
+        self.assertEqual(len(selects), 1)
+        self.assertEqual(selects[0]['count'], 5)
+        entry = selects[0]
+        self.assertLessEqual(entry['p50_ms'], entry['p95_ms'])
+        self.assertLessEqual(entry['p99_ms'], entry['max_ms'])
+        self.assertAlmostEqual(entry['mean_ms'] * entry['count'], entry['total_ms'])
+        totals = [entry['total_ms'] for entry in stats['default']['statements']]
+        self.assertEqual(totals, sorted(totals, reverse=True))
+
+    def test_statements_per_session(self):
+        """测试每个会话执行的语句数"""
+        for count in (1, 3):
+            with self.db_manager.get_db_session() as db:
+                for _ in range(count):
+                    db.execute(text("SELECT 1"))
+        with self.db_manager.get_db_session():
+            pass
+        sessions = self.db_manager.stats('default')['default']['sessions']
+        self.assertEqual(sessions['count'], 2)
+        self.assertEqual(sessions['statements'], 4)
+        self.assertEqual(sessions['max_statements'], 3)
+        self.assertEqual(sessions['mean_statements'], 2)
+
+        # 会话之外直接使用引擎执行的语句不计入会话
+        with self.db_manager.get_engine().connect() as conn:
+            conn.execute(text("SELECT 2"))
+        self.assertEqual(self.db_manager.stats()['default']['sessions']['statements'], 4)
+
+    def test_slow_query_logged_with_redacted_parameters(self):
+        """测试超过阈值的语句记录警告日志且不包含参数值"""
+        self.db_manager.add_database('slow', self.db_url, slow_query_ms=0)
+        self.addCleanup(self.db_manager.dispose)
+        messages = []
+        handler = logger.add(messages.append, level='WARNING', format='{message}')
+        try:
+            with self.db_manager.get_db_session('slow') as db:
+                db.execute(text("SELECT * FROM users WHERE email = :email"), {'email': 'secret@example.com'})
+        finally:
+            logger.remove(handler)
+        self.assertEqual(len(messages), 1)
+        self.assertIn("慢查询 [slow]", messages[0])
+        # SQLite驱动使用位置参数
+        self.assertIn("参数: [<str>]", messages[0])
+        self.assertNotIn("secret", messages[0])
+        self.assertEqual(self.db_manager.stats('slow')['slow']['slow_queries'], 1)
+        # 默认阈值下不记录
+        self.assertEqual(self.db_manager.stats('default')['default']['slow_queries'], 0)
+
+    def test_replica_stats(self):
+        """测试副本引擎单独统计"""
+        replica_url = f"sqlite:///{os.path.join(self.tmp_dir.name, 'replica.db')}"
+        engine = build_engine(replica_url)
+        Base.metadata.create_all(bind=engine)
+        engine.dispose()
+        self.db_manager.add_database('routed', {'url': self.db_url, 'replicas': [replica_url]})
+        with self.db_manager.get_db_session('routed') as db:
+            User.get_all(db)
+        stats = self.db_manager.stats('routed')
+        self.assertEqual(set(stats), {'routed', 'routed/replica0'})
+        self.assertEqual(stats['routed/replica0']['statements'][0]['count'], 1)
+        self.assertEqual(stats['routed']['sessions']['statements'], 1)
+        self.assertNotIn('routed/replica0', self.db_manager.stats('default'))
+
+        self.db_manager.reset_stats('routed')
+        self.assertEqual(self.db_manager.stats('routed/replica0')['routed/replica0']['statements'], [])
+
+    def test_db_stats_option(self):
+        """测试--db-stats在命令结束后输出统计"""
+        output = os.path.join(self.tmp_dir.name, 'users.csv')
+        with mock.patch('src.db.database.db_manager', self.db_manager):
+            result = CliRunner().invoke(cli, ['--db-stats', 'export-db', '--output', output])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("[default]", result.output)
+        self.assertIn("SELECT users.", result.output)
+
+if __name__ == '__main__':
+    unittest.main()
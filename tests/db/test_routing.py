@@ -0,0 +1,103 @@
+# tests/db/test_routing.py
+"""
+读写分离测试
+以多个本地SQLite文件作为主库和副本
+"""
+
+import unittest
+import tempfile
+import os
+import time
+from src.db import DatabaseManager, transactional, with_db_session
+from src.db import database
+from src.db.engine import build_engine
+from src.db.example_models import User
+from src.db.models import Base
+
+class TestReplicaRouting(unittest.TestCase):
+    """副本路由测试"""
+    
+    def setUp(self):
+        """测试前准备：主库和两个副本各自包含可区分的数据"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        urls = {name: f"sqlite:///{os.path.join(self.tmp_dir.name, name + '.db')}"
+                for name in ('primary', 'replica1', 'replica2')}
+        for name, url in urls.items():
+            engine = build_engine(url)
+            Base.metadata.create_all(bind=engine)
+            with engine.begin() as conn:
+                conn.execute(User.__table__.insert(), {'name': name, 'email': f"{name}@example.com"})
+            engine.dispose()
+        self.db_manager = DatabaseManager({
+            'url': urls['primary'],
+            'replicas': [urls['replica1'], urls['replica2']],
+            'read_your_writes': 0.2,
+        })
+        self.addCleanup(self._dispose)
+    
+    def _dispose(self):
+        self.db_manager.get_engine().dispose()
+        for engine in self.db_manager.routers['default'].replicas:
+            engine.dispose()
+    
+    def _read_name(self, **kwargs):
+        with self.db_manager.get_db_session(**kwargs) as db:
+            return User.get_by_id(db, 1).name
+    
+    def test_reads_round_robin(self):
+        """测试读操作轮询分配到各副本"""
+        names = [self._read_name() for _ in range(4)]
+        self.assertEqual(sorted(names), ['replica1', 'replica1', 'replica2', 'replica2'])
+        self.assertNotEqual(names[0], names[1])
+    
+    def test_writes_go_to_primary_and_read_your_writes(self):
+        """测试写入使用主库，写入后的窗口内读操作也使用主库"""
+        with self.db_manager.get_db_session() as db:
+            user = User.create(db, name='new', email='new@example.com')
+            self.assertEqual(User.get_by_id(db, user.id).name, 'new')
+            db.commit()
+        self.assertEqual(self._read_name(), 'primary')
+        time.sleep(0.25)
+        self.assertIn(self._read_name(), ('replica1', 'replica2'))
+    
+    def test_write_window_starts_at_commit(self):
+        """测试读己之写窗口从提交时起算，写入后较晚提交时提交后的读取仍使用主库"""
+        with self.db_manager.get_db_session() as db:
+            User.create(db, name='late', email='late@example.com')
+            time.sleep(0.3)
+            db.commit()
+        self.assertEqual(self._read_name(), 'primary')
+    
+    def test_primary_session(self):
+        """测试事务会话始终使用主库"""
+        self.assertEqual(self._read_name(use_primary=True), 'primary')
+        previous = database.db_manager
+        database.db_manager = self.db_manager
+        try:
+            @transactional()
+            def read_in_transaction(db):
+                return User.get_by_id(db, 1).name
+            
+            @with_db_session()
+            def read_in_session(db):
+                return User.get_by_id(db, 1).name
+            
+            self.assertEqual(read_in_transaction(), 'primary')
+            self.assertIn(read_in_session(), ('replica1', 'replica2'))
+        finally:
+            database.db_manager = previous
+    
+    def test_least_loaded(self):
+        """测试选择已签出连接最少的副本"""
+        router = self.db_manager.routers['default']
+        router.strategy = 'least_loaded'
+        busy = router.replicas[0].connect()
+        try:
+            names = {self._read_name() for _ in range(3)}
+        finally:
+            busy.close()
+        self.assertEqual(names, {'replica2'})
+
+if __name__ == '__main__':
+    unittest.main()
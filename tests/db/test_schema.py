@@ -0,0 +1,115 @@
+# tests/db/test_schema.py
+"""
+表结构指纹测试
+"""
+
+import unittest
+import tempfile
+import os
+from unittest import mock
+from sqlalchemy import Column, Integer, MetaData, String, Table, inspect
+from src.db import DatabaseManager
+from src.db import database
+from src.db.engine import build_engine
+from src.db.example_models import User
+from src.db.schema import read_fingerprints, stamp_schema, sync_schema, table_fingerprints
+
+
+def widgets_metadata(*extra_columns, with_gadgets=False):
+    """构造测试用的元数据"""
+    metadata = MetaData()
+    Table('widgets', metadata, Column('id', Integer, primary_key=True), Column('name', String(50)),
+          *extra_columns)
+    if with_gadgets:
+        Table('gadgets', metadata, Column('id', Integer, primary_key=True))
+    return metadata
+
+
+class TestSchemaFingerprint(unittest.TestCase):
+    """表结构指纹测试"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.engine = build_engine(f"sqlite:///{os.path.join(self.tmp_dir.name, 'schema.db')}")
+        self.addCleanup(self.engine.dispose)
+
+    def _stored(self):
+        with self.engine.connect() as conn:
+            return read_fingerprints(conn)
+
+    def test_fingerprint_is_stable(self):
+        """测试相同结构的指纹相同，结构变化时指纹变化"""
+        self.assertEqual(table_fingerprints(widgets_metadata()), table_fingerprints(widgets_metadata()))
+        self.assertNotEqual(table_fingerprints(widgets_metadata())['widgets'],
+                            table_fingerprints(widgets_metadata(Column('size', Integer)))['widgets'])
+
+    def test_unchanged_schema_skips_create_all(self):
+        """测试结构未变化时不执行create_all"""
+        metadata = widgets_metadata()
+        self.assertEqual(sync_schema(self.engine, metadata), [])
+        self.assertTrue(inspect(self.engine).has_table('widgets'))
+        self.assertEqual(self._stored(), table_fingerprints(metadata))
+
+        with mock.patch.object(MetaData, 'create_all') as create_all:
+            self.assertEqual(sync_schema(self.engine, widgets_metadata()), [])
+        create_all.assert_not_called()
+
+    def test_drift_reported_until_stamped(self):
+        """测试结构变化的表报告为漂移，记录迁移后不再报告"""
+        sync_schema(self.engine, widgets_metadata())
+        changed = widgets_metadata(Column('size', Integer))
+        self.assertEqual(sync_schema(self.engine, changed), ['widgets'])
+        self.assertEqual(sync_schema(self.engine, changed), ['widgets'])
+
+        stamp_schema(self.engine, changed)
+        self.assertEqual(sync_schema(self.engine, changed), [])
+
+    def test_new_and_partial_metadata(self):
+        """测试新增表被创建，只包含部分表的元数据不会删除其他表的记录"""
+        sync_schema(self.engine, widgets_metadata())
+        self.assertEqual(sync_schema(self.engine, widgets_metadata(with_gadgets=True)), [])
+        self.assertTrue(inspect(self.engine).has_table('gadgets'))
+        self.assertEqual(set(self._stored()), {'widgets', 'gadgets'})
+
+        partial = MetaData()
+        Table('gadgets', partial, Column('id', Integer, primary_key=True))
+        with mock.patch.object(MetaData, 'create_all') as create_all:
+            self.assertEqual(sync_schema(self.engine, partial), [])
+        create_all.assert_not_called()
+
+
+class TestManagerCreateTables(unittest.TestCase):
+    """DatabaseManager.create_tables的指纹检查测试"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.db_url = f"sqlite:///{os.path.join(self.tmp_dir.name, 'app.db')}"
+
+    def _manager(self):
+        db_manager = DatabaseManager(self.db_url)
+        self.addCleanup(db_manager.dispose)
+        return db_manager
+
+    def test_second_process_skips_create_all(self):
+        """测试另一个管理器（模拟新进程）启动时只读取指纹"""
+        self.assertEqual(self._manager().create_tables(), [])
+        with mock.patch.object(database.Base.metadata, 'create_all') as create_all:
+            self.assertEqual(self._manager().create_tables(), [])
+        create_all.assert_not_called()
+
+    def test_drop_tables_clears_fingerprint(self):
+        """测试删除表后重新创建"""
+        db_manager = self._manager()
+        db_manager.create_tables()
+        db_manager.drop_tables()
+        db_manager.create_tables()
+        with db_manager.get_db_session() as db:
+            self.assertEqual(User.get_all(db), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
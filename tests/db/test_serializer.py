@@ -0,0 +1,105 @@
+# tests/db/test_serializer.py
+"""
+模型序列化测试
+"""
+
+import unittest
+import tempfile
+import os
+from datetime import datetime
+import pandas as pd
+from sqlalchemy import select
+from src.db import DatabaseManager, serializer_for
+from src.db.example_models import Order, User
+
+try:
+    import pyarrow as pa
+except ImportError:  # pragma: no cover
+    pa = None
+
+
+class TestModelSerializer(unittest.TestCase):
+    """序列化器测试"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.db_manager = DatabaseManager(f"sqlite:///{os.path.join(self.tmp_dir.name, 'serializer.db')}")
+        self.addCleanup(self.db_manager.dispose)
+        self.db_manager.create_tables()
+        with self.db_manager.get_db_session() as db:
+            User.bulk_create(db, [
+                {'name': 'Alice', 'age': 25, 'email': 'alice@example.com'},
+                {'name': 'Bob', 'age': None, 'email': 'bob@example.com'},
+            ])
+            db.commit()
+
+    def test_compiled_once(self):
+        """测试同一模型和字段组合复用同一个序列化器"""
+        self.assertIs(serializer_for(User), serializer_for(User))
+        self.assertIs(serializer_for(User, ['id', 'name']), serializer_for(User, ('id', 'name')))
+        self.assertEqual(serializer_for(User).fields[0], 'id')
+        with self.assertRaises(ValueError):
+            serializer_for(User, ['missing'])
+
+    def test_to_dicts_from_instances(self):
+        """测试ORM实例序列化为字典，与to_dict一致"""
+        with self.db_manager.get_db_session() as db:
+            users = User.get_all(db)
+            records = serializer_for(User).to_dicts(users)
+            self.assertEqual(records, [user.to_dict() for user in users])
+            self.assertIsInstance(records[0]['created_at'], str)
+            self.assertEqual(records[0]['created_at'], users[0].created_at.isoformat())
+
+            raw = serializer_for(User, ['name', 'created_at']).to_dicts(users, iso_datetimes=False)
+            self.assertEqual(raw[1], {'name': 'Bob', 'created_at': users[1].created_at})
+
+    def test_expired_instances(self):
+        """测试提交后过期的实例仍能序列化"""
+        with self.db_manager.get_db_session() as db:
+            users = User.get_all(db)
+            db.commit()
+            self.assertEqual([record['name'] for record in serializer_for(User, ['name']).to_dicts(users)],
+                             ['Alice', 'Bob'])
+
+    def test_core_rows(self):
+        """测试直接序列化Core查询结果，字段顺序与结果列顺序无关"""
+        serializer = serializer_for(User, ['email', 'id'])
+        with self.db_manager.get_db_session() as db:
+            records = serializer.to_dicts(db.execute(select(User.__table__)))
+            self.assertEqual(records, [{'email': 'alice@example.com', 'id': 1}, {'email': 'bob@example.com', 'id': 2}])
+
+            rows = db.execute(select(User.__table__.c.id, User.__table__.c.email)).all()
+            self.assertEqual(serializer.to_dicts(rows), records)
+            with self.assertRaises(ValueError):
+                serializer_for(User, ['name']).to_dicts(rows)
+
+    def test_to_dataframe(self):
+        """测试序列化为DataFrame，可空整数列使用Int64"""
+        with self.db_manager.get_db_session() as db:
+            df = serializer_for(User).to_dataframe(User.get_all(db))
+        self.assertEqual(list(df.columns), list(serializer_for(User).fields))
+        self.assertEqual(str(df['age'].dtype), 'Int64')
+        self.assertTrue(pd.isna(df.loc[1, 'age']))
+        self.assertEqual(str(df['id'].dtype), 'int64')
+        self.assertEqual(str(df['created_at'].dtype), 'datetime64[us]')
+
+        empty = serializer_for(Order, ['id', 'quantity']).to_dataframe([])
+        self.assertEqual(list(empty.columns), ['id', 'quantity'])
+        self.assertEqual(len(empty), 0)
+
+    @unittest.skipIf(pa is None, "需要安装pyarrow")
+    def test_to_arrow(self):
+        """测试序列化为Arrow表"""
+        with self.db_manager.get_db_session() as db:
+            table = serializer_for(User, ['id', 'age', 'created_at']).to_arrow(
+                db.execute(select(User.__table__)))
+        self.assertEqual(table.schema.field('id').type, pa.int64())
+        self.assertEqual(table.schema.field('created_at').type, pa.timestamp('us'))
+        self.assertEqual(table.column('age').to_pylist(), [25, None])
+        self.assertIsInstance(table.column('created_at')[0].as_py(), datetime)
+
+
+if __name__ == '__main__':
+    unittest.main()
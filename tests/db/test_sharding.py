@@ -0,0 +1,150 @@
+# tests/db/test_sharding.py
+"""
+分片测试
+以多个本地SQLite文件作为分片
+"""
+
+import unittest
+import tempfile
+import os
+from unittest import mock
+from loguru import logger
+from src.db import DatabaseManager
+from src.db.example_models import Order, User
+from src.db.sharding import IdGenerator, ShardSet
+
+SHARDS = ('shard0', 'shard1', 'shard2')
+
+
+class TestShardSet(unittest.TestCase):
+    """分片集合测试"""
+
+    def setUp(self):
+        """测试前准备：三个分片数据库"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.db_manager = DatabaseManager(f"sqlite:///{os.path.join(self.tmp_dir.name, 'default.db')}")
+        for name in SHARDS:
+            self.db_manager.add_database(name, f"sqlite:///{os.path.join(self.tmp_dir.name, name + '.db')}")
+        self.addCleanup(self._dispose)
+        self.shards = ShardSet(self.db_manager, SHARDS, id_generator=IdGenerator(node=1))
+        self.addCleanup(self.shards.close)
+        self.shards.create_tables()
+
+    def _dispose(self):
+        for engine in self.db_manager.engines.values():
+            engine.dispose()
+
+    def _count(self, shard):
+        with self.db_manager.get_db_session(shard) as db:
+            return db.query(User).count()
+
+    def _create_users(self, count):
+        return [self.shards.create(User, name=f"user{i}", age=20 + i % 7, email=f"u{i}@example.com")
+                for i in range(count)]
+
+    def test_shard_for_is_stable(self):
+        """测试分片映射稳定且覆盖所有分片"""
+        self.assertEqual(self.shards.shard_for(12345), self.shards.shard_for('12345'))
+        self.assertEqual(set(self.shards.shard_for(i) for i in range(100)), set(SHARDS))
+
+    def test_create_routes_to_single_shard(self):
+        """测试创建记录只写入分片键对应的分片"""
+        users = self._create_users(30)
+        self.assertEqual(len({user.id for user in users}), 30)
+        self.assertEqual(sum(self._count(name) for name in SHARDS), 30)
+        for user in users:
+            with self.db_manager.get_db_session(self.shards.shard_for(user.id)) as db:
+                self.assertEqual(User.get_by_id(db, user.id).email, user.email)
+
+    def test_get_update_delete(self):
+        """测试按ID获取、更新和删除记录"""
+        user = self._create_users(1)[0]
+        self.assertEqual(self.shards.get_by_id(User, user.id).name, 'user0')
+
+        updated = self.shards.update(User, user.id, name='renamed')
+        self.assertEqual(updated.name, 'renamed')
+        self.assertEqual(self.shards.get_by_id(User, user.id).name, 'renamed')
+
+        self.assertTrue(self.shards.delete(User, user.id))
+        self.assertIsNone(self.shards.get_by_id(User, user.id))
+        self.assertFalse(self.shards.delete(User, user.id))
+
+    def test_get_all_merges_sorted(self):
+        """测试跨分片查询按排序列归并并应用分页"""
+        users = self._create_users(20)
+        by_id = sorted(user.id for user in users)
+        self.assertEqual([user.id for user in self.shards.get_all(User, limit=None)], by_id)
+        self.assertEqual([user.id for user in self.shards.get_all(User, skip=5, limit=4)], by_id[5:9])
+
+        expected = sorted(users, key=lambda user: (user.age, user.id), reverse=True)[:7]
+        result = self.shards.get_all(User, limit=7, order_by='age', descending=True)
+        self.assertEqual([user.id for user in result], [user.id for user in expected])
+
+    def test_filter(self):
+        """测试过滤条件在所有分片上执行，包含分片键时只查询一个分片"""
+        users = self._create_users(21)
+        result = self.shards.filter(User, age=20, order_by='name')
+        self.assertEqual([user.name for user in result], ['user0', 'user14', 'user7'])
+
+        self.assertEqual([user.id for user in self.shards.filter(User, id=users[3].id)], [users[3].id])
+        with self.assertRaises(ValueError):
+            self.shards.filter(User, unknown=1)
+
+    def test_non_id_shard_key(self):
+        """测试分片键不是id的模型与所属用户位于同一分片"""
+        user = self._create_users(1)[0]
+        order = self.shards.create(Order, user_id=user.id, product_id=1, quantity=2, total_price=100)
+        self.assertEqual(self.shards.shard_for(order.user_id), self.shards.shard_for(user.id))
+
+        self.assertEqual(self.shards.get_by_id(Order, order.id).quantity, 2)
+        self.assertEqual(self.shards.get_by_id(Order, order.id, shard_key=user.id).quantity, 2)
+        self.assertEqual(len(self.shards.filter(Order, user_id=user.id)), 1)
+        with self.assertRaises(ValueError):
+            self.shards.update(Order, order.id, user_id=user.id + 1)
+        with self.assertRaises(ValueError):
+            self.shards.create(Order, product_id=1)
+
+    def test_unknown_shard(self):
+        """测试使用未配置的数据库作为分片"""
+        with self.assertRaises(ValueError):
+            ShardSet(self.db_manager, ['missing'])
+
+
+class TestIdGenerator(unittest.TestCase):
+    """ID生成器测试"""
+
+    def test_ids_unique_and_increasing(self):
+        """测试生成的ID唯一且递增"""
+        generator = IdGenerator(node=1)
+        ids = [generator.next_id() for _ in range(10000)]
+        self.assertEqual(ids, sorted(set(ids)))
+        self.assertLess(ids[-1], 2 ** 63)
+
+    def test_node_from_environment(self):
+        """测试节点号取自SHARD_NODE_ID，未指定时记录警告"""
+        with mock.patch.dict(os.environ, {'SHARD_NODE_ID': '7'}):
+            self.assertEqual(IdGenerator().node, 7)
+            self.assertEqual(IdGenerator(node=3).node, 3)
+        for value in ('1024', 'host-a'):
+            with mock.patch.dict(os.environ, {'SHARD_NODE_ID': value}):
+                with self.assertRaises(ValueError):
+                    IdGenerator()
+        with self.assertRaises(ValueError):
+            IdGenerator(node=-1)
+
+        messages = []
+        handler = logger.add(messages.append, level='WARNING', format='{message}')
+        try:
+            with mock.patch.dict(os.environ):
+                os.environ.pop('SHARD_NODE_ID', None)
+                generator = IdGenerator()
+        finally:
+            logger.remove(handler)
+        self.assertEqual(generator.node, os.getpid() & 0x3FF)
+        self.assertEqual(len(messages), 1)
+        self.assertIn("SHARD_NODE_ID", messages[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+# tests/test_benchmark.py
+import unittest
+import os
+import tempfile
+import pandas as pd
+from src.benchmark import compare_results, generate_dataset, run_benchmark
+from src.validation import validate_frame
+
+class TestBenchmark(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+
+    def test_generate_dataset_is_valid_and_seeded(self):
+        """测试合成数据集满足模型约束且可复现"""
+        first = os.path.join(self.tmp_dir.name, 'a.csv')
+        second = os.path.join(self.tmp_dir.name, 'b.csv')
+        generate_dataset(first, 500, seed=7)
+        generate_dataset(second, 500, seed=7)
+        with open(first, 'rb') as f1, open(second, 'rb') as f2:
+            self.assertEqual(f1.read(), f2.read())
+        df = pd.read_csv(first)
+        self.assertEqual(len(df), 500)
+        _, errors = validate_frame(df)
+        self.assertFalse(errors.notna().any())
+
+    def test_run_benchmark(self):
+        """测试分阶段计时结果"""
+        results = run_benchmark([100, 1000], workdir=self.tmp_dir.name, isolate=False)
+        self.assertEqual([r['rows'] for r in results['results']], [100, 1000])
+        for result in results['results']:
+            for key in ('parse_s', 'pipeline_s', 'write_s', 'total_s', 'process_file_s'):
+                self.assertGreaterEqual(result[key], 0)
+
+    def test_compare_flags_regressions(self):
+        """测试超出阈值的增幅被标记为回退"""
+        baseline = {'results': [{'rows': 1000, 'parse_s': 1.0, 'write_s': 1.0, 'validate_s': 0.001}]}
+        current = {'results': [{'rows': 1000, 'parse_s': 1.05, 'write_s': 1.5, 'validate_s': 0.005}]}
+        comparisons = {c['metric']: c for c in compare_results(baseline, current, threshold=0.1)}
+        self.assertFalse(comparisons['parse_s']['regression'])
+        self.assertTrue(comparisons['write_s']['regression'])
+        self.assertNotIn('validate_s', comparisons)
+
+if __name__ == '__main__':
+    unittest.main()
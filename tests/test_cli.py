@@ -1,5 +1,9 @@
 # tests/test_cli.py
 import unittest
+import os
+import subprocess
+import sys
+import tempfile
 from click.testing import CliRunner
 from src.main import cli
 
@@ -13,5 +17,24 @@ class TestCLI(unittest.TestCase):
         self.assertEqual(result.exit_code, 0)
         self.assertIn('Usage:', result.output)
 
+    def test_invalid_option_combinations(self):
+        """测试不支持的选项组合以用法错误（状态码2）退出，不记录为处理错误"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            source = os.path.join(tmp_dir, 'input.csv')
+            with open(source, 'w') as f:
+                f.write("name,age,city\nAlice,25,Tokyo\n")
+            output = os.path.join(tmp_dir, 'output.csv')
+            for options in (['--incremental', '--workers', '2'], ['--cache', '--on-error', 'quarantine']):
+                result = self.runner.invoke(cli, ['process-data', '--input', source, '--output', output] + options)
+                self.assertEqual(result.exit_code, 2, result.output)
+                self.assertNotIn('数据处理出错', result.output)
+                self.assertFalse(os.path.exists(output))
+
+    def test_import_does_not_load_database_modules(self):
+        """测试导入CLI时不导入SQLAlchemy，数据库模块只在数据库命令中导入"""
+        code = "import sys, src.main; print(any(name.startswith('sqlalchemy') for name in sys.modules))"
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout.strip(), 'False')
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -3,7 +3,9 @@ import unittest
 import pandas as pd
 import os
 import tempfile
-from src.data_processor import load_data, process_data
+import io
+from src.data_processor import load_data, process_data, process_file, plan_partitions, run_pipeline
+from src.io_formats import CsvAppendWriter
 
 class TestDataProcessor(unittest.TestCase):
     def setUp(self):
@@ -41,6 +43,168 @@ Charlie,35,Tokyo"""
         # 验证结果
         self.assertIn('processed', result.columns)
         self.assertTrue(result['processed'].all())
+    
+    def test_run_pipeline_records(self):
+        """测试融合流水线返回校验后的记录并共用处理时间"""
+        df = pd.read_csv(self.temp_file.name)
+        result, records = run_pipeline(df, return_records=True)
+        self.assertTrue(result['processed'].all())
+        self.assertEqual([r.name for r in records], ['Alice', 'Bob', 'Charlie'])
+        self.assertEqual(records[1].age, 30)
+        self.assertTrue(all(r.processed for r in records))
+        self.assertEqual(len({r.processed_at for r in records}), 1)
+    
+    def test_run_pipeline_records_in_quarantine_mode(self):
+        """测试隔离模式下记录的整数字段为int（块中含无效值时校验结果为float64）"""
+        df = pd.read_csv(io.StringIO("name,age,city\nAlice,25,Tokyo\nBob,abc,Oslo\n"))
+        rejects = CsvAppendWriter(self._output_path())
+        with rejects:
+            _, records = run_pipeline(df, return_records=True, rejects=rejects)
+        self.assertEqual([r.name for r in records], ['Alice'])
+        self.assertIs(type(records[0].age), int)
+        self.assertEqual(records[0].age, 25)
+    
+    def _output_path(self):
+        output = tempfile.NamedTemporaryFile(delete=False, suffix='.csv')
+        output.close()
+        self.addCleanup(os.unlink, output.name)
+        return output.name
+    
+    def test_process_file_streaming_identical(self):
+        """测试流式处理的输出与整体处理逐字节一致"""
+        full_output = self._output_path()
+        stream_output = self._output_path()
+        
+        rows = process_file(self.temp_file.name, full_output)
+        for chunksize in (1, 2, 5):
+            self.assertEqual(process_file(self.temp_file.name, stream_output, chunksize=chunksize), rows)
+            with open(full_output, 'rb') as f1, open(stream_output, 'rb') as f2:
+                self.assertEqual(f1.read(), f2.read())
+    
+    def test_streaming_identical_with_missing_values(self):
+        """测试只有部分分块含缺失值时流式处理输出仍与整体处理逐字节一致"""
+        with open(self.temp_file.name, 'w') as f:
+            f.write("name,age,city,score\nAlice,25,New York,1\nBob,30,London,2\n"
+                    "Charlie,35,Tokyo,\nDave,40,Paris,4\n")
+        full_output = self._output_path()
+        stream_output = self._output_path()
+        process_file(self.temp_file.name, full_output)
+        with open(full_output) as f:
+            self.assertEqual([line.split(',')[3] for line in f.read().splitlines()[1:]], ['1', '2', '', '4'])
+        for chunksize in (1, 2, 3):
+            process_file(self.temp_file.name, stream_output, chunksize=chunksize)
+            with open(full_output, 'rb') as f1, open(stream_output, 'rb') as f2:
+                self.assertEqual(f1.read(), f2.read(), chunksize)
+        
+        process_file(self.temp_file.name, stream_output, chunksize=2, columns=['name', 'age', 'city'])
+        self.assertEqual(list(pd.read_csv(stream_output).columns), ['name', 'age', 'city', 'processed'])
+    
+    def test_api_matches_process_file(self):
+        """测试load_data与process_data组成的兼容接口与process_file的输出逐字节一致"""
+        with open(self.temp_file.name, 'w') as f:
+            f.write("name,age,city,score\nAlice,25,New York,1.50\nBob,30,London,\nCharlie,35,Tokyo,007\n")
+        cli_output = self._output_path()
+        api_output = self._output_path()
+        process_file(self.temp_file.name, cli_output)
+        process_data(load_data(self.temp_file.name)).to_csv(api_output, index=False)
+        with open(cli_output, 'rb') as f1, open(api_output, 'rb') as f2:
+            content = f1.read()
+            self.assertEqual(content, f2.read())
+        self.assertIn(b"1.50", content)
+        self.assertIn(b"007", content)
+    
+    def test_streaming_error_row_number(self):
+        """测试流式处理时错误行号对应整个文件"""
+        with open(self.temp_file.name, 'a') as f:
+            f.write("\nDave,200,Paris")
+        with self.assertRaises(Exception) as ctx:
+            process_file(self.temp_file.name, self._output_path(), chunksize=2)
+        self.assertIn("第4行", str(ctx.exception))
+    
+    def test_plan_partitions(self):
+        """测试字节分区覆盖全部数据且对齐到行首"""
+        header, ranges = plan_partitions(self.temp_file.name, 3, partition_bytes=8)
+        self.assertEqual(header, b"name,age,city\n")
+        with open(self.temp_file.name, 'rb') as f:
+            content = f.read()
+        self.assertEqual(b"".join(content[start:end] for start, end in ranges), content[len(header):])
+        for start, _ in ranges:
+            self.assertEqual(content[start - 1:start], b"\n")
+    
+    def test_process_file_parallel_identical(self):
+        """测试并行处理的输出与串行处理逐字节一致"""
+        serial_output = self._output_path()
+        parallel_output = self._output_path()
+        process_file(self.temp_file.name, serial_output)
+        self.assertEqual(process_file(self.temp_file.name, parallel_output, workers=3), 3)
+        with open(serial_output, 'rb') as f1, open(parallel_output, 'rb') as f2:
+            self.assertEqual(f1.read(), f2.read())
+    
+    def test_parallel_identical_with_missing_values(self):
+        """测试小分区中只有部分分区含缺失值时并行输出仍与串行输出一致"""
+        with open(self.temp_file.name, 'w') as f:
+            f.write("name,age,city,score\n" + "".join(
+                f"user{i},{20 + i},City{i},{'' if i == 5 else i}\n" for i in range(12)))
+        serial_output = self._output_path()
+        parallel_output = self._output_path()
+        process_file(self.temp_file.name, serial_output)
+        # 3个分区各4行，只有第二个分区含缺失值
+        self.assertEqual(process_file(self.temp_file.name, parallel_output, workers=3), 12)
+        with open(serial_output, 'rb') as f1, open(parallel_output, 'rb') as f2:
+            self.assertEqual(f1.read(), f2.read())
+    
+    def test_parallel_error_row_number(self):
+        """测试并行处理时错误行号对应整个文件"""
+        with open(self.temp_file.name, 'a') as f:
+            f.write("\nDave,200,Paris")
+        with self.assertRaises(Exception) as ctx:
+            process_file(self.temp_file.name, self._output_path(), workers=4)
+        self.assertIn("第4行", str(ctx.exception))
+    
+    def test_quarantine_mode(self):
+        """测试隔离模式：无效行写入隔离文件，有效行继续处理"""
+        with open(self.temp_file.name, 'a') as f:
+            f.write("\nDave,200,Paris\n ,40,Rome\nEve,28,Berlin")
+        expected_rows = [4, 5]
+        for options in ({}, {'chunksize': 2}, {'workers': 3}):
+            output = self._output_path()
+            reject_path = output + '.rejects.csv'
+            self.addCleanup(lambda path=reject_path: os.path.exists(path) and os.unlink(path))
+            rows = process_file(self.temp_file.name, output, on_error='quarantine', **options)
+            self.assertEqual(rows, 4)
+            result = pd.read_csv(output)
+            self.assertEqual(list(result['name']), ['Alice', 'Bob', 'Charlie', 'Eve'])
+            rejects = pd.read_csv(reject_path)
+            self.assertEqual(list(rejects['row']), expected_rows)
+            self.assertEqual(list(rejects.columns), ['row', 'name', 'age', 'city', 'error'])
+            self.assertEqual(rejects['error'].iloc[0], "age: Input should be less than or equal to 150")
+            self.assertEqual(rejects['error'].iloc[1], "name: Value error, 姓名不能为空")
+    
+    def test_quarantine_writes_validated_values(self):
+        """测试隔离模式下有效行输出校验后的值，不受无效行影响"""
+        with open(self.temp_file.name, 'w') as f:
+            f.write("name,age,city\n  Alice  ,25,New York\nBob,,London\nCarol,30,Paris\n")
+        expected = "name,age,city,processed\nAlice,25,New York,True\nCarol,30,Paris,True\n"
+        for options in ({}, {'chunksize': 2}, {'workers': 2}):
+            output = self._output_path()
+            reject_path = output + '.rejects.csv'
+            self.addCleanup(lambda path=reject_path: os.path.exists(path) and os.unlink(path))
+            self.assertEqual(process_file(self.temp_file.name, output, on_error='quarantine', **options), 2)
+            with open(output) as f:
+                self.assertEqual(f.read(), expected, options)
+    
+    def test_raise_mode_keeps_input_values(self):
+        """测试默认模式（on_error='raise'）与原有输出一致，不去除字段首尾空白"""
+        with open(self.temp_file.name, 'w') as f:
+            f.write('name,age,city\n" Alice ",30, Tokyo \nBob,25,Oslo\n')
+        expected = "name,age,city,processed\n Alice ,30, Tokyo ,True\nBob,25,Oslo,True\n"
+        for options in ({}, {'chunksize': 1}, {'workers': 2}):
+            output = self._output_path()
+            self.assertEqual(process_file(self.temp_file.name, output, **options), 2)
+            with open(output) as f:
+                self.assertEqual(f.read(), expected, options)
+        result = process_data(load_data(self.temp_file.name))
+        self.assertEqual(result['name'].tolist(), [' Alice ', 'Bob'])
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
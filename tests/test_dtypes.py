@@ -0,0 +1,76 @@
+# tests/test_dtypes.py
+import unittest
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+from loguru import logger
+from src.dtypes import plan_dtypes, compact_frame
+from src.data_processor import load_data, process_file
+
+try:
+    import pyarrow  # noqa: F401
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+class TestDtypePlanner(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.input = os.path.join(self.tmp_dir.name, 'input.csv')
+        rows = ["name,age,city"] + [f"User{i},{i % 151},{['New York', 'London', 'Tokyo'][i % 3]}" for i in range(300)]
+        with open(self.input, 'w') as f:
+            f.write("\n".join(rows))
+
+    def test_plan_from_model(self):
+        """测试根据UserData约束规划dtype"""
+        plan = plan_dtypes()
+        self.assertEqual(plan['age'], np.dtype('uint8'))
+        self.assertEqual(plan['city'], 'category')
+        if HAS_PYARROW:
+            self.assertEqual(plan['name'], pd.StringDtype('pyarrow'))
+
+    def test_compact_frame_reduces_memory(self):
+        """测试紧凑dtype降低内存占用"""
+        df = pd.read_csv(self.input, dtype={'name': object, 'city': object})
+        compacted, before, after = compact_frame(df)
+        self.assertLess(after, before)
+        self.assertEqual(compacted['age'].dtype, np.uint8)
+        self.assertEqual(str(compacted['city'].dtype), 'category')
+
+    def test_load_data_compact(self):
+        """测试紧凑模式加载数据"""
+        df = load_data(self.input, compact=True)
+        self.assertEqual(df['age'].dtype, np.uint8)
+        self.assertEqual(list(df['age'][:3]), [0, 1, 2])
+
+    def test_process_file_output_unchanged(self):
+        """测试紧凑模式输出与默认模式一致"""
+        outputs = []
+        for options in ({}, {'compact': True}, {'compact': True, 'chunksize': 64}, {'compact': True, 'workers': 2}):
+            output = os.path.join(self.tmp_dir.name, f"output{len(outputs)}.csv")
+            process_file(self.input, output, **options)
+            with open(output, 'rb') as f:
+                outputs.append(f.read())
+        self.assertTrue(all(output == outputs[0] for output in outputs))
+
+    def test_process_file_reports_memory(self):
+        """测试紧凑模式在INFO级别记录转换前后的内存占用"""
+        messages = []
+        handler = logger.add(messages.append, level='INFO', format='{message}')
+        self.addCleanup(logger.remove, handler)
+        process_file(self.input, os.path.join(self.tmp_dir.name, 'output.csv'), compact=True)
+        self.assertTrue(any(message.startswith('内存占用:') for message in messages), messages)
+
+    @unittest.skipUnless(HAS_PYARROW, "需要pyarrow")
+    def test_streaming_parquet_compact(self):
+        """测试紧凑模式分块写出Parquet"""
+        output = os.path.join(self.tmp_dir.name, 'output.parquet')
+        self.assertEqual(process_file(self.input, output, chunksize=64, compact=True), 300)
+        result = pd.read_parquet(output)
+        self.assertEqual(result['age'].dtype, np.uint8)
+        self.assertEqual(list(result['city'][:3]), ['New York', 'London', 'Tokyo'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+# tests/test_export.py
+import unittest
+import os
+import json
+import tempfile
+from datetime import datetime
+import pandas as pd
+from unittest import mock
+from click.testing import CliRunner
+from sqlalchemy import text
+from src.db import DatabaseManager
+from src.db.example_models import User
+from src.export import detect_export_format, export_table
+from src.main import cli
+
+try:
+    import pyarrow  # noqa: F401
+except ImportError:  # pragma: no cover
+    pyarrow = None
+
+class TestExport(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.manager = DatabaseManager(f"sqlite:///{os.path.join(self.tmp_dir.name, 'test.db')}")
+        self.addCleanup(self.manager.dispose)
+        self.manager.create_tables()
+        with self.manager.get_db_session() as db:
+            User.bulk_create(db, [{'name': f"user{i}", 'age': 20 + i if i != 3 else None,
+                                   'email': f"user{i}@example.com"} for i in range(25)])
+            db.commit()
+
+    def _path(self, name):
+        return os.path.join(self.tmp_dir.name, name)
+
+    def test_export_csv_in_batches(self):
+        """测试分批导出CSV，行数与顺序正确"""
+        output = self._path('users.csv')
+        rows, seconds = export_table(output, batch_size=10, manager=self.manager)
+        self.assertEqual(rows, 25)
+        self.assertGreaterEqual(seconds, 0)
+        df = pd.read_csv(output)
+        self.assertEqual(list(df['name']), [f"user{i}" for i in range(25)])
+        self.assertEqual(df.columns[0], 'id')
+        self.assertFalse(os.path.exists(output + '.tmp'))
+
+    def test_export_ndjson_with_filters(self):
+        """测试按模型类名、过滤条件和字段子集导出NDJSON"""
+        output = self._path('users.jsonl')
+        rows, _ = export_table(output, table='User', where=['age>=40', 'name!=user21'],
+                               fields=['id', 'name', 'created_at'], batch_size=2, manager=self.manager)
+        with open(output, encoding='utf-8') as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual(rows, 4)
+        self.assertEqual([record['name'] for record in records], ['user20', 'user22', 'user23', 'user24'])
+        self.assertEqual(set(records[0]), {'id', 'name', 'created_at'})
+        datetime.fromisoformat(records[0]['created_at'])
+
+        rows, _ = export_table(self._path('null.ndjson'), where=['age=null'], manager=self.manager)
+        self.assertEqual(rows, 1)
+
+    @unittest.skipIf(pyarrow is None, "需要安装pyarrow")
+    def test_export_parquet(self):
+        """测试导出Parquet，可空整数列保持整数类型"""
+        output = self._path('users.parquet')
+        rows, _ = export_table(output, batch_size=7, manager=self.manager)
+        df = pd.read_parquet(output)
+        self.assertEqual(rows, len(df))
+        self.assertEqual(str(df['age'].dtype), 'Int64')
+        self.assertTrue(pd.isna(df.loc[3, 'age']))
+
+    @unittest.skipIf(pyarrow is None, "需要安装pyarrow")
+    def test_export_parquet_nullable_date_and_numeric(self):
+        """测试日期和Numeric列在第一批中全为NULL时导出Parquet，各批表结构一致"""
+        with self.manager.get_engine().begin() as conn:
+            conn.execute(text("CREATE TABLE t (id INTEGER PRIMARY KEY, d DATE, n NUMERIC, p NUMERIC(10, 2))"))
+            conn.execute(text("INSERT INTO t (d, n, p) VALUES (NULL, NULL, NULL), (NULL, NULL, NULL), "
+                              "('2024-01-02', 1.5, 3.25), (NULL, 2, NULL)"))
+        for name in ('t.parquet', 't.feather'):
+            output = self._path(name)
+            self.assertEqual(export_table(output, table='t', batch_size=2, manager=self.manager)[0], 4)
+            df = pd.read_parquet(output) if name.endswith('.parquet') else pd.read_feather(output)
+            self.assertEqual(str(df.loc[2, 'd']), '2024-01-02')
+            self.assertTrue(df['d'].isna()[[0, 1, 3]].all())
+            self.assertEqual(list(df['n'].iloc[2:]), [1.5, 2.0])
+            self.assertEqual(str(df.loc[2, 'p']), '3.25')
+
+    def test_export_reflected_table_and_empty_result(self):
+        """测试导出没有模型的表，无数据时只写表头"""
+        with self.manager.get_engine().begin() as conn:
+            conn.execute(text("CREATE TABLE audit (id INTEGER PRIMARY KEY, action TEXT)"))
+            conn.execute(text("INSERT INTO audit (action) VALUES ('login'), ('logout')"))
+        output = self._path('audit.csv')
+        self.assertEqual(export_table(output, table='audit', manager=self.manager)[0], 2)
+        self.assertEqual(list(pd.read_csv(output)['action']), ['login', 'logout'])
+
+        self.assertEqual(export_table(output, where=['age>1000'], manager=self.manager)[0], 0)
+        self.assertEqual(len(pd.read_csv(output)), 0)
+
+    def test_invalid_arguments(self):
+        """测试无效的表、过滤条件和字段"""
+        output = self._path('out.csv')
+        for kwargs in ({'table': 'missing'}, {'where': ['unknown=1']}, {'where': ['age']},
+                       {'where': ['age>null']}, {'fields': ['unknown']}):
+            with self.assertRaises(ValueError):
+                export_table(output, manager=self.manager, **kwargs)
+        self.assertFalse(os.path.exists(output))
+
+    def test_export_db_command(self):
+        """测试export-db命令输出行数和吞吐量"""
+        output = self._path('cli.csv')
+        with mock.patch('src.db.database.db_manager', self.manager):
+            result = CliRunner().invoke(cli, ['export-db', '--output', output, '--where', 'age<25',
+                                              '--fields', 'id,name', '--batch-size', '2'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("写入 4 行", result.output)
+        self.assertIn("行/秒", result.output)
+        self.assertEqual(list(pd.read_csv(output).columns), ['id', 'name'])
+
+    def test_detect_export_format(self):
+        """测试按扩展名识别导出格式"""
+        self.assertEqual(detect_export_format('a.jsonl'), 'ndjson')
+        self.assertEqual(detect_export_format('a.parquet'), 'parquet')
+        self.assertEqual(detect_export_format('a.txt', 'ndjson'), 'ndjson')
+        self.assertEqual(detect_export_format('a.txt'), 'csv')
+
+if __name__ == '__main__':
+    unittest.main()
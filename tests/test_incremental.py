@@ -0,0 +1,85 @@
+# tests/test_incremental.py
+import unittest
+import os
+import tempfile
+from src.data_processor import process_file
+from src.incremental import process_incremental, load_watermark
+
+class TestIncremental(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.input = os.path.join(self.tmp_dir.name, 'input.csv')
+        self.output = os.path.join(self.tmp_dir.name, 'output.csv')
+        self.expected = os.path.join(self.tmp_dir.name, 'expected.csv')
+        with open(self.input, 'w') as f:
+            f.write("name,age,city\nAlice,25,New York\nBob,30,London")
+
+    def _append(self, text):
+        with open(self.input, 'a') as f:
+            f.write(text)
+
+    def _assert_matches_full_run(self):
+        process_file(self.input, self.expected)
+        with open(self.expected, 'rb') as f1, open(self.output, 'rb') as f2:
+            self.assertEqual(f1.read(), f2.read())
+
+    def test_append_only_new_rows(self):
+        """测试只处理新追加的行"""
+        self.assertEqual(process_incremental(self.input, self.output), (2, True))
+        self._append("\nCharlie,35,Tokyo\n")
+        self.assertEqual(process_incremental(self.input, self.output), (1, False))
+        self._append("Dave,40,Paris\nEve,28,Berlin\n")
+        self.assertEqual(process_incremental(self.input, self.output, chunksize=1), (2, False))
+        self.assertEqual(process_incremental(self.input, self.output), (0, False))
+        self.assertEqual(load_watermark(self.output)['row_count'], 5)
+        self._assert_matches_full_run()
+
+    def test_prefix_change_rebuilds(self):
+        """测试已处理部分变化时全量重建"""
+        process_incremental(self.input, self.output)
+        with open(self.input, 'w') as f:
+            f.write("name,age,city\nAlicia,25,New York\nBob,30,London\nCharlie,35,Tokyo\n")
+        self.assertEqual(process_incremental(self.input, self.output), (3, True))
+        self._assert_matches_full_run()
+
+    def test_last_line_extended_rebuilds(self):
+        """测试最后一行被续写时全量重建"""
+        process_incremental(self.input, self.output)
+        self._append("ton\n")
+        self.assertEqual(process_incremental(self.input, self.output), (2, True))
+        self._assert_matches_full_run()
+
+    def test_failed_append_keeps_output(self):
+        """测试追加失败时输出和水位线保持不变"""
+        process_incremental(self.input, self.output)
+        with open(self.output, 'rb') as f:
+            before = f.read()
+        self._append("\nCharlie,35,Tokyo\nDave,200,Paris\n")
+        with self.assertRaises(Exception) as ctx:
+            process_incremental(self.input, self.output, chunksize=1)
+        self.assertIn("第4行", str(ctx.exception))
+        with open(self.output, 'rb') as f:
+            self.assertEqual(f.read(), before)
+        self.assertEqual(load_watermark(self.output)['row_count'], 2)
+
+    def test_quarantine_appends_rejects(self):
+        """测试增量隔离模式下隔离文件随输出追加"""
+        reject_path = self.output + '.rejects.csv'
+        process_incremental(self.input, self.output, on_error='quarantine')
+        self.assertFalse(os.path.exists(reject_path))
+        self._append("\nCharlie,35,Tokyo\nDave,200,Paris\n")
+        self.assertEqual(process_incremental(self.input, self.output, on_error='quarantine'), (1, False))
+        self._append("Eve,,Berlin\nFrank,50,Oslo\n")
+        self.assertEqual(process_incremental(self.input, self.output, on_error='quarantine'), (1, False))
+        with open(reject_path) as f:
+            lines = f.read().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[1].startswith("4,Dave"))
+        self.assertTrue(lines[2].startswith("5,Eve"))
+        self.assertEqual(load_watermark(self.output)['row_count'], 6)
+        with open(self.output) as f:
+            self.assertIn("Frank,50,Oslo,True\n", f.read())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+# tests/test_ingest.py
+import unittest
+import os
+import tempfile
+from unittest import mock
+from src.db import DatabaseManager
+from src.db.example_models import User
+from src.ingest import ingest_file, load_checkpoint
+
+class TestIngest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.manager = DatabaseManager(f"sqlite:///{os.path.join(self.tmp_dir.name, 'test.db')}")
+        self.addCleanup(lambda: self.manager.get_engine().dispose())
+        self.input = os.path.join(self.tmp_dir.name, 'input.csv')
+        with open(self.input, 'w') as f:
+            f.write("name,age,city\n")
+            for i in range(10):
+                f.write(f"user{i},{20 + i},Tokyo\n")
+
+    def _names(self):
+        with self.manager.get_db_session() as db:
+            return [user.name for user in db.query(User).order_by(User.id)]
+
+    def test_ingest_in_chunks(self):
+        """测试分块入库并记录检查点"""
+        self.assertEqual(ingest_file(self.input, chunksize=4, manager=self.manager), (10, 0))
+        self.assertEqual(self._names(), [f"user{i}" for i in range(10)])
+        checkpoint = load_checkpoint(self.manager, 'default', os.path.abspath(self.input), 'users')
+        self.assertEqual((checkpoint['rows_done'], checkpoint['chunks_done']), (10, 3))
+        # 再次运行不会重复写入
+        self.assertEqual(ingest_file(self.input, chunksize=4, manager=self.manager), (0, 10))
+
+    def test_resume_after_failure(self):
+        """测试失败后从最后提交的块继续"""
+        original = User.bulk_create.__func__
+        calls = []
+
+        def failing(cls, db, records, **kwargs):
+            calls.append(len(records))
+            if len(calls) == 2:
+                raise RuntimeError("connection lost")
+            return original(cls, db, records, **kwargs)
+
+        with mock.patch.object(User, 'bulk_create', classmethod(failing)):
+            with self.assertRaises(RuntimeError):
+                ingest_file(self.input, chunksize=4, manager=self.manager)
+        self.assertEqual(self._names(), [f"user{i}" for i in range(4)])
+        self.assertEqual(ingest_file(self.input, chunksize=4, manager=self.manager), (6, 4))
+        self.assertEqual(self._names(), [f"user{i}" for i in range(10)])
+
+    def test_stores_validated_values(self):
+        """测试写入校验后的值（去除首尾空白）"""
+        with open(self.input, 'w') as f:
+            f.write('name,age,city\n"  Alice  ",30, Tokyo \n')
+        self.assertEqual(ingest_file(self.input, manager=self.manager), (1, 0))
+        with self.manager.get_db_session() as db:
+            user = db.query(User).one()
+            self.assertEqual((user.name, user.age), ('Alice', 30))
+
+    def test_invalid_row_keeps_committed_chunks(self):
+        """测试校验失败时已提交的块保留"""
+        with open(self.input, 'a') as f:
+            f.write("bad,200,Tokyo\n")
+        with self.assertRaises(Exception) as ctx:
+            ingest_file(self.input, chunksize=5, manager=self.manager)
+        self.assertIn("第11行", str(ctx.exception))
+        self.assertEqual(len(self._names()), 10)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+# tests/test_io_formats.py
+import unittest
+import os
+import tempfile
+import pandas as pd
+from src.io_formats import ArrowAppendWriter, detect_format, iter_frames, read_frame, write_frame
+from src.data_processor import process_file
+
+try:
+    import pyarrow  # noqa: F401
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+class TestIOFormats(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.df = pd.DataFrame({
+            'name': ['Alice', 'Bob', 'Charlie'],
+            'age': [25, 30, 35],
+            'city': ['New York', 'London', 'Tokyo'],
+            'note': ['a', 'b', 'c'],
+        })
+
+    def _path(self, name):
+        return os.path.join(self.tmp_dir.name, name)
+
+    def test_detect_format(self):
+        """测试按扩展名识别格式"""
+        self.assertEqual(detect_format('data/input.csv'), 'csv')
+        self.assertEqual(detect_format('out.parquet'), 'parquet')
+        self.assertEqual(detect_format('out.feather'), 'feather')
+        self.assertEqual(detect_format('out.txt'), 'csv')
+        self.assertEqual(detect_format('out.csv', 'parquet'), 'parquet')
+        with self.assertRaises(ValueError):
+            detect_format('out.csv', 'xlsx')
+
+    def test_csv_column_projection(self):
+        """测试CSV列投影"""
+        path = self._path('input.csv')
+        write_frame(self.df, path)
+        df = read_frame(path, columns=['name', 'age', 'city'])
+        self.assertEqual(list(df.columns), ['name', 'age', 'city'])
+
+    @unittest.skipUnless(HAS_PYARROW, "需要pyarrow")
+    def test_parquet_roundtrip(self):
+        """测试CSV转Parquet，整体与流式输出一致"""
+        source = self._path('input.csv')
+        write_frame(self.df, source)
+        full = self._path('full.parquet')
+        streamed = self._path('streamed.parquet')
+        process_file(source, full, columns=['name', 'age', 'city'])
+        process_file(source, streamed, chunksize=2, columns=['name', 'age', 'city'])
+        pd.testing.assert_frame_equal(read_frame(full), read_frame(streamed))
+        self.assertEqual(list(read_frame(full).columns), ['name', 'age', 'city', 'processed'])
+
+    @unittest.skipUnless(HAS_PYARROW, "需要pyarrow")
+    def test_streaming_parquet_column_empty_in_first_chunk(self):
+        """测试可选列在第一块中全为空时流式写出Parquet"""
+        source = self._path('input.csv')
+        with open(source, 'w') as f:
+            f.write("name,age,city,note\nAlice,25,New York,\nBob,30,London,\nCharlie,35,Tokyo,hi\n")
+        output = self._path('output.parquet')
+        self.assertEqual(process_file(source, output, chunksize=2), 3)
+        result = read_frame(output)
+        self.assertEqual(result['note'].isna().tolist(), [True, True, False])
+        self.assertEqual(result['note'].iloc[2], 'hi')
+
+    @unittest.skipUnless(HAS_PYARROW, "需要pyarrow")
+    def test_chunked_feather_with_compact_dtypes(self):
+        """测试紧凑dtype（city为category）分块、并行写出Feather，各块字典不同"""
+        source = self._path('input.csv')
+        cities = ['Tokyo', 'Oslo', 'Paris'] + ['Berlin'] * 200
+        with open(source, 'w') as f:
+            f.write("name,age,city\n")
+            f.writelines(f"u{i},{20 + i % 50},{city}\n" for i, city in enumerate(cities))
+        output = self._path('output.feather')
+        for options in ({'chunksize': 2}, {'workers': 2}):
+            self.assertEqual(process_file(source, output, compact=True, **options), len(cities))
+            result = read_frame(output)
+            self.assertIsInstance(result['city'].dtype, pd.CategoricalDtype)
+            self.assertEqual(result['city'].tolist(), cities)
+
+    @unittest.skipUnless(HAS_PYARROW, "需要pyarrow")
+    def test_arrow_writer_null_columns(self):
+        """测试Arrow写入器：第一块全为空的列按字符串写出，之后全为空的块写为空值"""
+        output = self._path('output.feather')
+        with ArrowAppendWriter(output, 'feather') as writer:
+            writer.write(pd.DataFrame({'id': [1, 2], 'note': pd.Series([None, None], dtype=object)}))
+            writer.write(pd.DataFrame({'id': [3], 'note': ['hi']}))
+            writer.write(pd.DataFrame({'id': [4], 'note': [float('nan')]}))
+        result = read_frame(output)
+        self.assertEqual(list(result['id']), [1, 2, 3, 4])
+        self.assertEqual(result['note'].isna().tolist(), [True, True, False, True])
+
+    @unittest.skipUnless(HAS_PYARROW, "需要pyarrow")
+    def test_feather_chunks(self):
+        """测试Feather分块读取与列投影"""
+        path = self._path('input.feather')
+        write_frame(self.df, path)
+        chunks = list(iter_frames(path, 2, columns=['name', 'age']))
+        self.assertEqual([len(c) for c in chunks], [2, 1])
+        self.assertEqual(list(chunks[1].index), [2])
+        self.assertEqual(list(chunks[0].columns), ['name', 'age'])
+
+    @unittest.skipUnless(HAS_PYARROW, "需要pyarrow")
+    def test_parallel_to_feather(self):
+        """测试并行处理输出Feather"""
+        source = self._path('input.csv')
+        write_frame(self.df, source)
+        output = self._path('output.feather')
+        self.assertEqual(process_file(source, output, workers=2), 3)
+        result = read_frame(output)
+        self.assertEqual(list(result['name']), ['Alice', 'Bob', 'Charlie'])
+        self.assertTrue(result['processed'].all())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+# tests/test_result_cache.py
+import unittest
+import os
+import tempfile
+import time
+from src.data_processor import process_file
+from src.result_cache import ResultCache, pipeline_modules, run_cached
+
+class TestResultCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.cache = ResultCache(os.path.join(self.tmp_dir.name, 'cache'), max_bytes=10 * 1024 * 1024)
+        self.input = self._path('input.csv')
+        with open(self.input, 'w') as f:
+            f.write("name,age,city\nAlice,25,New York\nBob,30,London\n")
+        self.calls = 0
+
+    def _path(self, name):
+        return os.path.join(self.tmp_dir.name, name)
+
+    def _run(self, output, params=None):
+        def run():
+            self.calls += 1
+            return process_file(self.input, output)
+        return run_cached(self.cache, self.input, output, params or {'output_format': 'csv'}, run)
+
+    def test_hit_skips_processing(self):
+        """测试命中缓存时不再执行处理"""
+        first = self._path('first.csv')
+        second = self._path('second.csv')
+        self.assertEqual(self._run(first), (2, False))
+        self.assertEqual(self._run(second), (2, True))
+        self.assertEqual(self.calls, 1)
+        with open(first, 'rb') as f1, open(second, 'rb') as f2:
+            self.assertEqual(f1.read(), f2.read())
+
+    def test_key_depends_on_content_and_params(self):
+        """测试输入内容或参数变化时不命中"""
+        output = self._path('output.csv')
+        self._run(output)
+        self._run(output, {'output_format': 'csv', 'columns': ['name', 'age', 'city']})
+        with open(self.input, 'a') as f:
+            f.write("Charlie,35,Tokyo\n")
+        self.assertEqual(self._run(output), (3, False))
+        self.assertEqual(self.calls, 3)
+
+    def test_lru_eviction(self):
+        """测试超出容量时淘汰最久未使用的条目"""
+        output = self._path('output.csv')
+        size = os.path.getsize(self.input) + 20
+        self.cache.store('a' * 64, self.input, 2, {})
+        time.sleep(0.05)
+        self.cache.store('b' * 64, self.input, 2, {})
+        time.sleep(0.05)
+        self.assertIsNotNone(self.cache.materialize('a' * 64, output))
+        self.cache.max_bytes = 2 * size
+        self.cache.store('c' * 64, self.input, 2, {})
+        keys = {entry['key'][0] for entry in self.cache.entries()}
+        self.assertEqual(keys, {'a', 'c'})
+
+    def test_corrupt_entry_is_dropped(self):
+        """测试损坏的条目被删除"""
+        output = self._path('output.csv')
+        self._run(output)
+        key = self.cache.entries()[0]['key']
+        with open(os.path.join(self.cache._entry_dir(key), 'output'), 'a') as f:
+            f.write("garbage\n")
+        self.assertEqual(self._run(output), (2, False))
+        self.assertEqual(self.calls, 2)
+
+    def test_hardlinked_output_modified_in_place(self):
+        """测试硬链接输出被原地修改（大小不变）后条目失效"""
+        self.cache.hardlink = True
+        first = self._path('first.csv')
+        second = self._path('second.csv')
+        self._run(first)
+        self.assertEqual(self._run(second), (2, True))
+        with open(second, 'r+b') as f:
+            f.write(b'X')
+        self.assertEqual(self._run(self._path('third.csv')), (2, False))
+        self.assertEqual(self.calls, 2)
+        with open(first, 'rb') as f1, open(self._path('third.csv'), 'rb') as f3:
+            self.assertEqual(f1.read(), f3.read())
+
+    def test_code_version_covers_pipeline_imports(self):
+        """测试代码版本包含流水线导入的模块（如dtype规划）"""
+        modules = pipeline_modules()
+        for name in ('src.data_processor', 'src.dtypes', 'src.io_formats', 'src.validation', 'src.models'):
+            self.assertIn(name, modules)
+
+    def test_purge(self):
+        """测试清空缓存"""
+        self._run(self._path('output.csv'))
+        self.assertEqual(self.cache.purge(), 1)
+        self.assertEqual(self.cache.entries(), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+# tests/test_validation.py
+import unittest
+import numpy as np
+import pandas as pd
+from pydantic import ValidationError
+from src.models import UserData
+from src.validation import validate_frame, first_error
+
+class TestColumnarValidation(unittest.TestCase):
+    """测试列式校验引擎"""
+
+    def test_valid_frame(self):
+        """测试全部有效的数据"""
+        df = pd.DataFrame({
+            'name': [' Alice ', 'Bob'],
+            'age': [25, 30],
+            'city': ['New York', ' London'],
+        })
+        cleaned, errors = validate_frame(df)
+        self.assertTrue(errors.isna().all())
+        self.assertEqual(list(cleaned['name']), ['Alice', 'Bob'])
+        self.assertEqual(list(cleaned['city']), ['New York', 'London'])
+        self.assertEqual(cleaned['age'].dtype, np.int64)
+        self.assertIsNone(first_error(errors))
+
+    def test_messages_match_pydantic(self):
+        """测试错误信息与Pydantic校验器一致"""
+        rows = [
+            {'name': 'Alice', 'age': 200, 'city': ''},
+            {'name': '  ', 'age': -1, 'city': 'Tokyo'},
+            {'name': 'Bob', 'age': 'abc', 'city': 'Paris'},
+            {'name': 'Eve', 'age': 2.5, 'city': 'Berlin'},
+        ]
+        _, errors = validate_frame(pd.DataFrame(rows))
+        for row, message in zip(rows, errors):
+            with self.assertRaises(ValidationError) as ctx:
+                UserData(**row)
+            expected = "; ".join(
+                f"{err['loc'][0]}: {err['msg']}" for err in ctx.exception.errors()
+            )
+            self.assertEqual(message, expected)
+
+    def test_missing_values(self):
+        """测试缺失字段和空值"""
+        df = pd.DataFrame({'name': ['Alice', None], 'age': [25, 30]})
+        _, errors = validate_frame(df)
+        self.assertEqual(errors.iloc[0], "city: Field required")
+        self.assertEqual(errors.iloc[1], "name: Field required; city: Field required")
+        self.assertEqual(first_error(errors), "第1行: city: Field required")
+
+if __name__ == '__main__':
+    unittest.main()